@@ -0,0 +1,213 @@
+# agentsville/activity_store.py
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_DESTINATION = "AgentsVille"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    cost_usd REAL NOT NULL,
+    duration_hours REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS activity_tags (
+    activity INTEGER NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS activity_weather (
+    activity INTEGER NOT NULL,
+    weather TEXT NOT NULL
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS activities_by_date ON activities(date, destination, cost_usd);
+CREATE INDEX IF NOT EXISTS activities_by_destination ON activities(destination, date);
+CREATE INDEX IF NOT EXISTS activities_by_cost ON activities(cost_usd);
+CREATE INDEX IF NOT EXISTS activities_by_id ON activities(id);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON activity_tags(tag, activity);
+CREATE INDEX IF NOT EXISTS weather_by_weather ON activity_weather(weather, activity);
+"""
+
+
+def _iter_source(
+    source: Path, destination: str
+) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Yields (date, destination, activity) from either the activities_db.json layout
+    ({date: [activity, ...]}) or a JSONL file with one activity per line carrying
+    its own "date" (and optionally "destination"). JSONL is streamed line by line.
+    """
+    if source.suffix == ".jsonl":
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    activity = json.loads(line)
+                    yield (
+                        activity.pop("date"),
+                        activity.pop("destination", destination),
+                        activity,
+                    )
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        by_date = json.load(f)
+    for date, activities in by_date.items():
+        for activity in activities:
+            yield date, destination, activity
+
+
+class ActivityStore:
+    """
+    Indexed, on-disk activity catalog (SQLite, memory-mapped, opened read-only).
+
+    Queries by date, destination, weather suitability, interest tags and cost
+    range are answered from indexes instead of scanning the catalog. The store
+    also implements get(date, default) so it can stand in for the
+    {date: [activity, ...]} dict expected by the tools.
+    """
+
+    def __init__(self, path: Path, destination: str = DEFAULT_DESTINATION):
+        self.path = Path(path)
+        self.destination = destination
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._db.execute("PRAGMA mmap_size = 268435456")
+
+    @classmethod
+    def build(
+        cls,
+        source: Path,
+        path: Path,
+        destination: str = DEFAULT_DESTINATION,
+    ) -> "ActivityStore":
+        """
+        Converts a JSON/JSONL catalog into the indexed on-disk format at `path`.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+
+        db = sqlite3.connect(str(tmp_path))
+        db.executescript(_SCHEMA)
+        for date, dest, activity in _iter_source(Path(source), destination):
+            cur = db.execute(
+                "INSERT INTO activities (id, date, destination, cost_usd, duration_hours, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    activity["id"],
+                    date,
+                    dest,
+                    float(activity.get("cost_usd", 0.0)),
+                    float(activity.get("duration_hours", 0.0)),
+                    json.dumps(activity, separators=(",", ":")),
+                ),
+            )
+            rowid = cur.lastrowid
+            db.executemany(
+                "INSERT INTO activity_tags (activity, tag) VALUES (?, ?)",
+                [(rowid, tag) for tag in activity.get("suitability", [])],
+            )
+            db.executemany(
+                "INSERT INTO activity_weather (activity, weather) VALUES (?, ?)",
+                [(rowid, w) for w in activity.get("weather_suitable", [])],
+            )
+        db.executescript(_INDEXES)
+        db.commit()
+        db.close()
+        tmp_path.replace(path)
+        return cls(path, destination=destination)
+
+    def query(
+        self,
+        date: Optional[str] = None,
+        destination: Optional[str] = None,
+        weather: Optional[str] = None,
+        tags: Iterable[str] = (),
+        min_cost: Optional[float] = None,
+        max_cost: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Activities matching every given filter, e.g. indoor food activities on
+        2025-07-16 under $40: query(date="2025-07-16", tags=["indoor", "food"], max_cost=40).
+        `weather` keeps activities listing it in weather_suitable; all `tags` must
+        appear in suitability.
+        """
+        clauses, params = [], []
+        if date is not None:
+            clauses.append("a.date = ?")
+            params.append(str(date))
+        if destination is not None:
+            clauses.append("a.destination = ?")
+            params.append(destination)
+        if min_cost is not None:
+            clauses.append("a.cost_usd >= ?")
+            params.append(min_cost)
+        if max_cost is not None:
+            clauses.append("a.cost_usd <= ?")
+            params.append(max_cost)
+        if weather is not None:
+            clauses.append(
+                "a.rowid IN (SELECT activity FROM activity_weather WHERE weather = ?)"
+            )
+            params.append(weather)
+        for tag in tags:
+            clauses.append(
+                "a.rowid IN (SELECT activity FROM activity_tags WHERE tag = ?)"
+            )
+            params.append(tag)
+
+        sql = "SELECT a.payload FROM activities a"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY a.rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def dates(self, destination: Optional[str] = None) -> List[str]:
+        destination = destination or self.destination
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT date FROM activities WHERE destination = ? ORDER BY date",
+                (destination,),
+            ).fetchall()
+        return [date for (date,) in rows]
+
+    def by_date(
+        self, dates: Iterable[str], destination: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        {date: [activity, ...]} for just the given dates (dates without activities are omitted).
+        """
+        destination = destination or self.destination
+        result = {}
+        for date in dates:
+            activities = self.query(date=str(date), destination=destination)
+            if activities:
+                result[str(date)] = activities
+        return result
+
+    def get(self, date_str: str, default: Any = None) -> Any:
+        activities = self.query(date=str(date_str), destination=self.destination)
+        return activities if activities else default
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM activities").fetchone()
+        return count
@@ -25,46 +25,17 @@ def calculator_tool(expression: str) -> str:
     return json.dumps({"expression": expression, "result": res})
 
 
-def run_evals_tool(itinerary_json: str, weather_json: str, activities_db: dict) -> str:
+def run_evals_tool(
+    itinerary_json: str, weather_json: str, activities_db: dict, **options
+) -> str:
     """
     Evaluator: checks >=2 activities/day and flags weather-incompatible activities.
-    Weather compatibility is evaluated via LLM.
+    Weather compatibility is evaluated via LLM, concurrently; see
+    agentsville.tools.run_evals_tool for the options (max_concurrency, timeout).
     """
-    import json
-    from agentsville.weather import check_weather_compatibility
+    from agentsville.tools import run_evals_tool as _run_evals_tool
 
-    plan = json.loads(itinerary_json)
-    weather = json.loads(weather_json)
-    issues = []
-
-    for day in plan.get("days", []):
-        date = day.get("date")
-
-        # Minimum activities per day
-        if len(day.get("activities", [])) < 2:
-            issues.append({"date": date, "issue": "fewer than 2 activities"})
-
-        day_weather = weather.get(date)
-        if not day_weather:
-            continue
-
-        for act in day.get("activities", []):
-            result = check_weather_compatibility(act, day_weather)
-
-            if result == "IS_INCOMPATIBLE":
-                issues.append(
-                    {
-                        "date": date,
-                        "activity": act.get("name"),
-                        "issue": f"incompatible with {day_weather}",
-                    }
-                )
-
-    passed = len(issues) == 0
-
-    return json.dumps(
-        {"passed": passed, "issues": issues, "summary": f"{len(issues)} issue(s)"}
-    )
+    return _run_evals_tool(itinerary_json, weather_json, activities_db, **options)
 
 
 def final_answer_tool(final_travelplan_json: str) -> str:
@@ -0,0 +1,133 @@
+# agentsville/aio.py
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional
+
+from agentsville.models import TravelPlan, VacationInfo
+from agentsville.planner import generate_itinerary, generate_itinerary_parallel
+from agentsville.react_agent import revise_itinerary_with_react_agent
+from agentsville.sessions import ReActSessionPool
+from agentsville.solver import solve_itinerary
+from agentsville.tracing import propagate, span
+from agentsville.tools import (
+    calculator_tool,
+    get_activities_by_date_tool,
+    run_evals_tool,
+)
+
+# Async entry points for serving many plans from one event loop.
+# The blocking work runs on blocking_executor if set (e.g. by the service, for
+# the tasks it starts), else on the loop's default executor; every LLM request
+# still goes through agentsville.llm.create_response, so all plans share one
+# client, its connection pool and the global in-flight limit.
+
+blocking_executor: contextvars.ContextVar[Optional[Executor]] = contextvars.ContextVar(
+    "agentsville_blocking_executor", default=None
+)
+
+
+async def _run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        blocking_executor.get(), propagate(functools.partial(func, *args, **kwargs))
+    )
+
+
+async def agenerate_itinerary(
+    vacation_info: VacationInfo,
+    activities_by_date: Dict[str, List[dict]],
+    weather_by_date: Dict[str, str],
+) -> TravelPlan:
+    return await _run_blocking(
+        generate_itinerary, vacation_info, activities_by_date, weather_by_date
+    )
+
+
+async def arevise_itinerary_with_react_agent(
+    initial_itinerary: Dict[str, Any],
+    weather_data: Dict[str, Any],
+    activities_db: Dict[str, Any],
+    **options,
+) -> TravelPlan:
+    return await _run_blocking(
+        revise_itinerary_with_react_agent,
+        initial_itinerary,
+        weather_data,
+        activities_db,
+        **options,
+    )
+
+
+async def aget_activities_by_date_tool(date_str: str, activities_db: dict) -> str:
+    return await _run_blocking(get_activities_by_date_tool, date_str, activities_db)
+
+
+async def acalculator_tool(expression: str) -> str:
+    return await _run_blocking(calculator_tool, expression)
+
+
+async def arun_evals_tool(
+    itinerary_json: str, weather_json: str, activities_db: dict, **options
+) -> str:
+    return await _run_blocking(
+        run_evals_tool, itinerary_json, weather_json, activities_db, **options
+    )
+
+
+async def aplan_vacation(
+    vacation_info: VacationInfo,
+    activities_db: Dict[str, List[dict]],
+    weather_data: Dict[str, str],
+    max_iterations: Optional[int] = 8,
+    planner: str = "llm",
+    sessions: Optional[ReActSessionPool] = None,
+) -> TravelPlan:
+    """
+    Full pipeline for one vacation: initial itinerary, then ReAct revision.
+    planner="solver" builds the plan with the local solver; a strictly feasible
+    plan meets the eval constraints and skips the revision pass, otherwise the
+    solver's best effort (days short of compatible activities) is revised
+    like an LLM draft. planner="parallel"
+    drafts the itinerary with one concurrent LLM call per day.
+    max_iterations=None skips the revision pass. With sessions, the revision
+    runs on that pool and shares its caches with the other plans on it.
+    """
+    with span("plan_vacation", planner=planner):
+        if planner == "solver":
+            try:
+                return await _run_blocking(
+                    solve_itinerary,
+                    vacation_info,
+                    activities_db,
+                    weather_data,
+                    strict=True,
+                )
+            except ValueError:
+                plan = await _run_blocking(
+                    solve_itinerary, vacation_info, activities_db, weather_data
+                )
+        elif planner == "parallel":
+            plan = await _run_blocking(
+                generate_itinerary_parallel, vacation_info, activities_db, weather_data
+            )
+        else:
+            plan = await agenerate_itinerary(vacation_info, activities_db, weather_data)
+        if max_iterations is None:
+            return plan
+        if sessions is not None:
+            return await asyncio.wrap_future(
+                sessions.submit(
+                    plan.model_dump(),
+                    vacation_info=vacation_info,
+                    max_iterations=max_iterations,
+                )
+            )
+        return await arevise_itinerary_with_react_agent(
+            initial_itinerary=plan.model_dump(),
+            weather_data=weather_data,
+            activities_db=activities_db,
+            max_iterations=max_iterations,
+            vacation_info=vacation_info,
+        )
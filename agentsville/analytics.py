@@ -0,0 +1,306 @@
+# agentsville/analytics.py
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agentsville.retrieval import interest_score
+from agentsville.weather import rule_based_verdict
+
+# Weather verdict codes per catalog row: 0 means the rules cannot tell and the
+# pair needs the LLM check (run_evals_tool decides it).
+COMPATIBLE, UNVERIFIED, INCOMPATIBLE = 1, 0, -1
+_VERDICT_CODES = {"IS_COMPATIBLE": COMPATIBLE, "IS_INCOMPATIBLE": INCOMPATIBLE}
+
+SCORE_COLUMNS = [
+    "total_cost_usd",
+    "within_budget",
+    "total_hours",
+    "max_day_hours",
+    "min_day_activities",
+    "interest_coverage",
+    "unknown_activities",
+    "incompatible",
+    "unverified",
+    "feasible",
+]
+
+
+class CatalogArrays:
+    """
+    The activity catalog of a trip as columns: one row per (date, activity)
+    with cost, hours, the activity's weather verdict for that date (from the
+    local rules) and which of the traveler's interests it matches.
+    Built once per trip; score() then works on whole batches of plans with
+    array operations instead of per-plan Python loops.
+    """
+
+    __slots__ = (
+        "dates",
+        "interests",
+        "ids",
+        "rows",
+        "cost",
+        "hours",
+        "verdict",
+        "interest_hits",
+    )
+
+    def __init__(
+        self,
+        activities_by_date: Dict[str, List[dict]],
+        weather_by_date: Optional[Dict[str, str]] = None,
+        interests: Sequence[str] = (),
+    ):
+        weather_by_date = weather_by_date or {}
+        self.dates = sorted(activities_by_date)
+        self.interests = list(interests)
+        self.ids: List[Tuple[str, Any]] = []
+        # date -> {activity id: row}
+        self.rows: Dict[str, Dict[Any, int]] = {}
+        cost, hours, verdict, interest_hits = [], [], [], []
+        for date in self.dates:
+            weather = weather_by_date.get(date)
+            date_rows = self.rows.setdefault(date, {})
+            for act in activities_by_date[date] or []:
+                activity_id = act.get("id", act.get("name"))
+                if activity_id in date_rows:
+                    continue
+                date_rows[activity_id] = len(self.ids)
+                self.ids.append((date, activity_id))
+                cost.append(float(act.get("cost_usd", 0.0)))
+                hours.append(float(act.get("duration_hours", 0.0)))
+                verdict.append(
+                    COMPATIBLE
+                    if weather is None
+                    else _VERDICT_CODES.get(
+                        rule_based_verdict(act, weather), UNVERIFIED
+                    )
+                )
+                interest_hits.append(
+                    [interest_score(act, [i]) > 0 for i in self.interests]
+                )
+        self.cost = np.array(cost, dtype=np.float64)
+        self.hours = np.array(hours, dtype=np.float64)
+        self.verdict = np.array(verdict, dtype=np.int8)
+        self.interest_hits = np.array(interest_hits, dtype=bool).reshape(
+            len(self.ids), len(self.interests)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _flatten(
+        self, plans: Sequence[Any]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Tuple[int, str]]]:
+        """
+        (plan of each activity, day of each activity, catalog row or -1, and
+        (plan, date) per day) over all plans. The id -> row lookup is the only
+        per-activity Python work.
+        """
+        rows: List[int] = []
+        day_sizes: List[int] = []
+        days: List[Tuple[int, str]] = []
+        no_rows: Dict[Any, int] = {}
+        for plan_index, plan in enumerate(plans):
+            for date, activities in _plan_days(plan):
+                date_rows = self.rows.get(date, no_rows)
+                day_rows = [
+                    date_rows.get(
+                        a.get("id", a.get("name")) if isinstance(a, dict) else a, -1
+                    )
+                    for a in activities
+                ]
+                rows.extend(day_rows)
+                day_sizes.append(len(day_rows))
+                days.append((plan_index, date))
+        day_plan = np.array([plan for plan, _ in days], dtype=np.int64)
+        day_of = np.repeat(np.arange(len(days), dtype=np.int64), day_sizes)
+        return day_plan[day_of], day_of, np.array(rows, dtype=np.int64), days
+
+    def day_totals(self, plans: Sequence[Any]) -> pd.DataFrame:
+        """
+        One row per (plan, date): activities, cost_usd and hours of that day.
+        """
+        plan_of, day_of, rows, days = self._flatten(plans)
+        known = rows >= 0
+        safe_rows = np.where(known, rows, 0)
+        frame = pd.DataFrame(days, columns=["plan", "date"])
+        frame["activities"] = np.bincount(day_of, minlength=len(days))
+        frame["cost_usd"] = np.bincount(
+            day_of,
+            weights=np.where(known, self.cost[safe_rows], 0.0),
+            minlength=len(days),
+        ).round(2)
+        frame["hours"] = np.bincount(
+            day_of,
+            weights=np.where(known, self.hours[safe_rows], 0.0),
+            minlength=len(days),
+        )
+        return frame
+
+    def score(
+        self,
+        plans: Sequence[Any],
+        budget_usd: Optional[float] = None,
+        max_hours_per_day: Optional[float] = None,
+        min_activities: int = 2,
+        trip_dates: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Scores every plan at once; one row per plan (in input order) with the
+        SCORE_COLUMNS. Plans are TravelPlans (models or dicts, activities as
+        dicts or ids) or {date: [activity ids]} mappings.
+
+        Costs and hours come from the catalog, so activities that are not
+        offered on their date count as unknown_activities and add nothing.
+        incompatible / unverified count activities the weather rules reject /
+        cannot decide; unverified pairs still need run_evals_tool.
+        With trip_dates, a date_issues column counts trip dates missing,
+        repeated or outside the trip.
+        feasible: no unknown or incompatible activities, every day has
+        min_activities, and within budget_usd, max_hours_per_day and
+        trip_dates when given.
+        """
+        count = len(plans)
+        plan_of, day_of, rows, days = self._flatten(plans)
+        known = rows >= 0
+        safe_rows = np.where(known, rows, 0)
+        day_plan = np.array([plan for plan, _ in days], dtype=np.int64)
+
+        cost = np.where(known, self.cost[safe_rows], 0.0)
+        hours = np.where(known, self.hours[safe_rows], 0.0)
+        verdict = np.where(known, self.verdict[safe_rows], COMPATIBLE)
+        total_cost = np.bincount(plan_of, weights=cost, minlength=count).round(2)
+
+        day_hours = np.bincount(day_of, weights=hours, minlength=len(days))
+        day_activities = np.bincount(day_of, minlength=len(days))
+        max_day_hours = np.zeros(count)
+        np.maximum.at(max_day_hours, day_plan, day_hours)
+        min_day_activities = np.full(count, np.iinfo(np.int64).max)
+        np.minimum.at(min_day_activities, day_plan, day_activities)
+        min_day_activities[min_day_activities == np.iinfo(np.int64).max] = 0
+
+        covered = np.zeros((count, len(self.interests)), dtype=bool)
+        np.logical_or.at(
+            covered, plan_of, self.interest_hits[safe_rows] & known[:, None]
+        )
+        coverage = (
+            covered.mean(axis=1) if self.interests else np.ones(count, dtype=float)
+        )
+
+        frame = pd.DataFrame(
+            {
+                "total_cost_usd": total_cost,
+                "within_budget": (
+                    total_cost <= budget_usd
+                    if budget_usd is not None
+                    else np.ones(count, dtype=bool)
+                ),
+                "total_hours": np.bincount(plan_of, weights=hours, minlength=count),
+                "max_day_hours": max_day_hours,
+                "min_day_activities": min_day_activities,
+                "interest_coverage": coverage.round(3),
+                "unknown_activities": np.bincount(
+                    plan_of, weights=~known, minlength=count
+                ).astype(int),
+                "incompatible": np.bincount(
+                    plan_of, weights=verdict == INCOMPATIBLE, minlength=count
+                ).astype(int),
+                "unverified": np.bincount(
+                    plan_of, weights=verdict == UNVERIFIED, minlength=count
+                ).astype(int),
+            }
+        )
+        feasible = (
+            frame["within_budget"]
+            & (frame["unknown_activities"] == 0)
+            & (frame["incompatible"] == 0)
+            & (frame["min_day_activities"] >= min_activities)
+        )
+        if max_hours_per_day is not None:
+            feasible &= frame["max_day_hours"] <= max_hours_per_day
+        frame["feasible"] = feasible
+        if trip_dates is None:
+            return frame[SCORE_COLUMNS]
+
+        frame["date_issues"] = _date_issues(count, days, day_plan, trip_dates)
+        frame["feasible"] &= frame["date_issues"] == 0
+        return frame[SCORE_COLUMNS + ["date_issues"]]
+
+
+def _date_issues(
+    count: int,
+    days: List[Tuple[int, str]],
+    day_plan: np.ndarray,
+    trip_dates: Sequence[str],
+) -> np.ndarray:
+    """
+    Per plan: trip dates without a day, plus days beyond the first for a
+    date, plus days outside the trip.
+    """
+    position = {date: index for index, date in enumerate(trip_dates)}
+    day_date = np.array([position.get(date, -1) for _, date in days], dtype=np.int64)
+    inside = day_date >= 0
+    per_date = np.bincount(
+        day_plan[inside] * len(trip_dates) + day_date[inside],
+        minlength=count * len(trip_dates),
+    ).reshape(count, len(trip_dates))
+    missing = (per_date == 0).sum(axis=1)
+    repeated = np.clip(per_date - 1, 0, None).sum(axis=1)
+    outside = np.bincount(day_plan, weights=~inside, minlength=count)
+    return (missing + repeated + outside).astype(int)
+
+
+def _plan_days(plan: Any) -> List[Tuple[str, List[Any]]]:
+    """
+    (date, activities) per day of a TravelPlan (model or dict) or a
+    {date: [activity ids]} mapping.
+    """
+    if hasattr(plan, "model_dump"):
+        plan = plan.model_dump(mode="json")
+    if not isinstance(plan, dict):
+        raise ValueError(f"Not a plan: {str(plan)[:200]}")
+    if isinstance(plan.get("days"), list):
+        return [
+            (str(day.get("date")), day.get("activities") or [])
+            for day in plan["days"]
+            if isinstance(day, dict)
+        ]
+    return [(str(date), activities or []) for date, activities in plan.items()]
+
+
+def day_combinations(
+    activities: List[dict],
+    interests: List[str],
+    sizes: Iterable[int],
+    max_hours: float,
+) -> List[Tuple[float, int, Tuple[dict, ...]]]:
+    """
+    (cost, interest score, activities) of every set of `sizes` activities of
+    one day that fits within max_hours, with the sums computed per size as
+    one array operation over all combinations.
+    """
+    costs = np.array([a.get("cost_usd", 0.0) for a in activities], dtype=np.float64)
+    hours = np.array(
+        [a.get("duration_hours", 0.0) for a in activities], dtype=np.float64
+    )
+    scores = np.array(
+        [interest_score(a, interests) for a in activities], dtype=np.int64
+    )
+
+    options = []
+    for size in sizes:
+        combos = np.array(
+            list(combinations(range(len(activities)), size)), dtype=np.int64
+        ).reshape(-1, size)
+        fits = hours[combos].sum(axis=1) <= max_hours
+        combos = combos[fits]
+        for combo, cost, score in zip(
+            combos.tolist(),
+            costs[combos].sum(axis=1).tolist(),
+            scores[combos].sum(axis=1).tolist(),
+        ):
+            options.append((cost, score, tuple(activities[i] for i in combo)))
+    return options
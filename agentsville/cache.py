@@ -0,0 +1,195 @@
+# agentsville/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+
+
+def verdict_key(activity: dict, weather: str, model: str, prompt_version: str) -> str:
+    """
+    Content address for a weather verdict.
+    The activity is serialized canonically so key order and whitespace never matter.
+    """
+    canonical = json.dumps(activity, sort_keys=True, separators=(",", ":"), default=str)
+    payload = "\x1f".join([canonical, weather, model, prompt_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Two-tier verdict cache: an in-process LRU in front of an optional SQLite file.
+
+    path: SQLite file for the persistent tier, or None for memory only
+    max_memory_entries: LRU capacity
+    max_disk_entries: rows kept on disk; oldest rows are evicted first
+    ttl_seconds: entries older than this are treated as misses (None = never expire)
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_memory_entries: int = 4096,
+        max_disk_entries: int = 100_000,
+        ttl_seconds: Optional[float] = 30 * 24 * 3600,
+    ):
+        self.path = Path(path) if path else None
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        self._db = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "key TEXT PRIMARY KEY, verdict TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS verdicts_created_at ON verdicts(created_at)"
+            )
+            self._db.commit()
+            # Kept up to date on every write instead of counted per set()
+            (self._disk_rows,) = self._db.execute(
+                "SELECT COUNT(*) FROM verdicts"
+            ).fetchone()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, verdict: str, created_at: float) -> None:
+        self._memory[key] = (verdict, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT verdict, created_at FROM verdicts WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    self._remember(key, row[0], row[1])
+                    self._counters["disk_hits"] += 1
+                    return row[0]
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key: str, verdict: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, verdict, now)
+            self._counters["writes"] += 1
+            if self._db is not None:
+                # Delete, then insert: the new row gets the highest rowid
+                replaced = self._db.execute(
+                    "DELETE FROM verdicts WHERE key = ?", (key,)
+                ).rowcount
+                self._db.execute(
+                    "INSERT INTO verdicts (key, verdict, created_at) VALUES (?, ?, ?)",
+                    (key, verdict, now),
+                )
+                self._disk_rows += 1 - max(replaced, 0)
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _evict_disk(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            cur = self._db.execute(
+                "DELETE FROM verdicts WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._counters["evictions"] += max(cur.rowcount, 0)
+            self._disk_rows -= max(cur.rowcount, 0)
+        overflow = self._disk_rows - self.max_disk_entries
+        if overflow > 0:
+            # rowid breaks created_at ties, so the row just written stays
+            cur = self._db.execute(
+                "DELETE FROM verdicts WHERE rowid IN (SELECT rowid FROM verdicts "
+                "ORDER BY created_at ASC, rowid ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._counters["evictions"] += max(cur.rowcount, 0)
+            self._disk_rows -= max(cur.rowcount, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM verdicts")
+                self._db.commit()
+                self._disk_rows = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+            return stats
+
+
+_verdict_cache: Optional[VerdictCache] = None
+_verdict_cache_lock = threading.Lock()
+
+
+def cache_dir() -> Optional[Path]:
+    """
+    Directory for persistent caches: AGENTSVILLE_CACHE_DIR, default .cache/.
+    None when it is set to an empty string, meaning nothing is persisted.
+    """
+    value = os.getenv("AGENTSVILLE_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+    return Path(value) if value else None
+
+
+def get_verdict_cache() -> VerdictCache:
+    """
+    Process-wide verdict cache, stored under cache_dir() (memory only when
+    caching to disk is turned off).
+    """
+    global _verdict_cache
+    with _verdict_cache_lock:
+        if _verdict_cache is None:
+            directory = cache_dir()
+            path = directory / "verdicts.sqlite3" if directory else None
+            _verdict_cache = VerdictCache(path=path)
+        return _verdict_cache
+
+
+def set_verdict_cache(cache: Optional[VerdictCache]) -> Optional[VerdictCache]:
+    """
+    Replaces the process-wide verdict cache (None rebuilds it from the
+    environment on next use) and returns the previous one, e.g. to run a
+    benchmark on a memory-only cache and restore the caller's afterwards.
+    """
+    global _verdict_cache
+    with _verdict_cache_lock:
+        previous, _verdict_cache = _verdict_cache, cache
+        return previous
@@ -0,0 +1,152 @@
+# agentsville/compact.py
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from agentsville.schemas import parse_json_output
+from agentsville.utils import to_json
+
+# Runtime representation for the eval and tool layer. Plans stay plain dicts
+# (that is what the LLM reads and writes), but the hot loops work on slotted
+# views over them: no copies of the activity dicts, activity ids and
+# fingerprints computed once per day, and JSON encoded only when a plan goes
+# back to the LLM.
+
+
+class ActivityTable:
+    """
+    Interned activity dicts by id. Every plan the model sends is a fresh JSON
+    document, so the same activity otherwise exists once per plan version per
+    session; interning replaces equal copies with one shared dict.
+    Thread-safe, so one table can serve every session of a ReActSessionPool.
+    Interned dicts are shared: treat them as read-only.
+    """
+
+    __slots__ = ("_by_id", "_lock", "hits", "misses")
+
+    def __init__(self):
+        self._by_id: Dict[Any, dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, activity_id: Any) -> Optional[dict]:
+        return self._by_id.get(activity_id)
+
+    def intern(self, activity: Any) -> Any:
+        """
+        The table's dict equal to `activity`, registering it if its id is new.
+        An activity that differs from the interned one with its id (edited by
+        the model) is returned as is.
+        """
+        if not isinstance(activity, dict):
+            return activity
+        key = activity.get("id", activity.get("name"))
+        with self._lock:
+            known = self._by_id.get(key)
+            if known is None:
+                self._by_id[key] = activity
+                self.misses += 1
+                return activity
+        if known is not activity and known != activity:
+            return activity
+        with self._lock:
+            self.hits += 1
+        return known
+
+    def intern_plan(self, plan: dict) -> dict:
+        """
+        Interns the activities of a plan the caller owns (e.g. just parsed from
+        the model's JSON), in place. Returns the plan.
+        """
+        for day in plan.get("days") or []:
+            if isinstance(day, dict) and isinstance(day.get("activities"), list):
+                day["activities"] = [self.intern(a) for a in day["activities"]]
+        return plan
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._by_id),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class CompactDay:
+    """
+    View of one plan day: the activity dicts are referenced, not copied.
+    """
+
+    __slots__ = ("date", "activities", "activity_ids")
+
+    def __init__(self, date: Optional[str], activities: List[dict]):
+        self.date = date
+        self.activities = activities
+        self.activity_ids = tuple(act.get("id", act.get("name")) for act in activities)
+
+    @classmethod
+    def from_dict(cls, day: dict) -> "CompactDay":
+        return cls(day.get("date"), day.get("activities") or [])
+
+    def fingerprint(self, weather: Dict[str, str]) -> Tuple[Any, ...]:
+        """
+        (date, weather, activity ids, activity content digests): what the
+        day's eval result depends on. The digests tell apart an activity the
+        model edited under an existing id (e.g. relabelled indoor), so shared
+        day results are never reused for it.
+        """
+        return (
+            self.date,
+            weather.get(self.date),
+            self.activity_ids,
+            tuple(_digest(act) for act in self.activities),
+        )
+
+
+def _digest(activity: dict) -> bytes:
+    return hashlib.blake2b(
+        to_json(activity, sort_keys=True).encode("utf-8"), digest_size=8
+    ).digest()
+
+
+class CompactPlan:
+    """
+    View of a TravelPlan dict for the eval and tool layer. `source` is the
+    dict itself; to_json() is the only place the plan is encoded.
+    """
+
+    __slots__ = ("source", "days")
+
+    def __init__(self, source: dict):
+        self.source = source
+        self.days = [
+            CompactDay.from_dict(day)
+            for day in source.get("days") or []
+            if isinstance(day, dict)
+        ]
+
+    @classmethod
+    def from_plan(
+        cls,
+        plan: Union[dict, str, "CompactPlan"],
+        table: Optional[ActivityTable] = None,
+    ) -> "CompactPlan":
+        """
+        Wraps a plan dict, or parses a plan JSON string (with json-repair) and
+        interns its activities in `table`.
+        """
+        if isinstance(plan, CompactPlan):
+            return plan
+        if isinstance(plan, str):
+            parsed = parse_json_output(plan)
+            if not isinstance(parsed, dict):
+                raise ValueError(f"Plan is not a JSON object: {plan[:200]}")
+            plan = table.intern_plan(parsed) if table is not None else parsed
+        return cls(plan)
+
+    def to_json(self, **kwargs) -> str:
+        return to_json(self.source, **kwargs)
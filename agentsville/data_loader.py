@@ -1,5 +1,11 @@
+import hashlib
 import json
+import tempfile
 from pathlib import Path
+from typing import Optional
+
+from agentsville.activity_store import ActivityStore
+from agentsville.cache import cache_dir
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 
@@ -12,3 +18,34 @@ def load_activities():
 def load_weather():
     with open(DATA_DIR / "weather.json", "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+# Stores built while disk caching is off; removed when the process exits.
+_scratch_dir: Optional[tempfile.TemporaryDirectory] = None
+
+
+def load_activity_store(source=None, path=None):
+    """
+    Opens the indexed activity store, (re)building it from `source`
+    (default data/activities_db.json) when it is missing or older than the source.
+    By default it lives under cache.cache_dir(), named after the source and a
+    hash of its resolved path; with disk caching off it is built in a
+    temporary directory for this process only.
+    """
+    global _scratch_dir
+    source = Path(source) if source else DATA_DIR / "activities_db.json"
+    if path is None:
+        directory = cache_dir()
+        if directory is None:
+            if _scratch_dir is None:
+                _scratch_dir = tempfile.TemporaryDirectory(prefix="agentsville-")
+            directory = Path(_scratch_dir.name)
+        digest = hashlib.blake2b(
+            str(source.resolve()).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        path = directory / f"{source.stem}-{digest}.sqlite3"
+    path = Path(path)
+
+    if not path.exists() or path.stat().st_mtime < source.stat().st_mtime:
+        return ActivityStore.build(source, path)
+    return ActivityStore(path)
@@ -0,0 +1,200 @@
+# agentsville/history.py
+import json
+from typing import Any, Dict, List, Optional
+
+from agentsville.schemas import parse_json_output
+from agentsville.utils import to_json
+
+# Tool arguments that carry a whole TravelPlan.
+PLAN_ARGUMENT_KEYS = ("itinerary_json", "final_travelplan_json")
+
+# Plan argument value (or omitted argument) meaning "the session's current plan".
+CURRENT_PLAN_REF = "CURRENT_PLAN"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (~4 characters per token); good enough to track growth.
+    """
+    return len(text) // 4 + 1
+
+
+def _as_plan(value: Any) -> Optional[dict]:
+    if isinstance(value, str):
+        value = parse_json_output(value)
+    if isinstance(value, dict) and "days" in value:
+        return value
+    return None
+
+
+def plan_diff(old: dict, new: dict) -> str:
+    """
+    One-line summary of what changed between two plans, by day and activity id.
+    e.g. "2025-07-16: -A5 +A6; total_cost_usd 150.0 -> 175.0"
+    """
+
+    def activity_ids(plan: dict) -> Dict[str, List[str]]:
+        return {
+            str(day.get("date")): [
+                str(act.get("id", act.get("name"))) for act in day.get("activities", [])
+            ]
+            for day in plan.get("days", [])
+        }
+
+    before, after = activity_ids(old), activity_ids(new)
+    changes = []
+    for date in sorted(set(before) | set(after)):
+        removed = [i for i in before.get(date, []) if i not in after.get(date, [])]
+        added = [i for i in after.get(date, []) if i not in before.get(date, [])]
+        if date not in after:
+            changes.append(f"{date}: day removed")
+        elif date not in before:
+            changes.append(f"{date}: day added")
+        elif removed or added:
+            parts = [f"-{i}" for i in removed] + [f"+{i}" for i in added]
+            changes.append(f"{date}: {' '.join(parts)}")
+    if old.get("total_cost_usd") != new.get("total_cost_usd"):
+        changes.append(
+            f"total_cost_usd {old.get('total_cost_usd')} -> {new.get('total_cost_usd')}"
+        )
+    return "; ".join(changes) or "no changes"
+
+
+class ConversationHistory:
+    """
+    ReAct conversation with one canonical CURRENT PLAN slot.
+
+    Plans passed in tool arguments replace the slot whenever they differ in any
+    field; the stored ACTION keeps only a short reference plus a diff against
+    the previous version. Only the most
+    recent observations are kept in full, older ones are truncated, and if the
+    rendered history still exceeds max_tokens the oldest turns are dropped.
+    The system prompt and static_context (the byte-identical prefix shared
+    across requests, e.g. the activity catalog) are sent first and do not
+    count against max_tokens.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        plan: dict,
+        context: Optional[List[str]] = None,
+        max_tokens: int = 8000,
+        static_context: Optional[List[str]] = None,
+        keep_recent_observations: int = 2,
+        old_observation_chars: int = 300,
+    ):
+        self.system_prompt = system_prompt
+        self.context = list(context or [])
+        self.static_context = list(static_context or [])
+        self.plan = plan
+        self.plan_version = 1
+        # (plan, its JSON): the plan is encoded once per version, not per call
+        self._plan_json: Optional[tuple] = None
+        self.max_tokens = max_tokens
+        self.keep_recent_observations = keep_recent_observations
+        self.old_observation_chars = old_observation_chars
+        # {"role", "content", "kind"}; kind is "action", "raw" or "observation"
+        self.turns: List[Dict[str, str]] = []
+
+    def plan_json(self) -> str:
+        if self._plan_json is None or self._plan_json[0] is not self.plan:
+            self._plan_json = (self.plan, to_json(self.plan))
+        return self._plan_json[1]
+
+    def record_raw_reply(self, text: str) -> None:
+        self.turns.append({"role": "assistant", "content": text, "kind": "raw"})
+
+    def record_action(self, thought: str, action: Dict[str, Any]) -> None:
+        arguments = action.get("arguments")
+        if isinstance(arguments, dict):
+            compacted = dict(arguments)
+            for key in PLAN_ARGUMENT_KEYS:
+                plan = _as_plan(arguments.get(key))
+                if plan is None:
+                    continue
+                diff = plan_diff(self.plan, plan)
+                if to_json(plan, sort_keys=True) != to_json(self.plan, sort_keys=True):
+                    if diff == "no changes":
+                        diff = "costs, notes or activity details edited"
+                    self.plan = plan
+                    self.plan_version += 1
+                compacted[key] = f"<CURRENT PLAN v{self.plan_version}; changes: {diff}>"
+            action = {**action, "arguments": compacted}
+
+        self.turns.append(
+            {
+                "role": "assistant",
+                # Rendered in the structured reply format the model is asked for
+                "content": json.dumps({"thought": thought, **action}),
+                "kind": "action",
+            }
+        )
+
+    def record_observation(self, observation: str) -> None:
+        self.turns.append(
+            {
+                "role": "user",
+                "content": f"OBSERVATION: {observation}",
+                "kind": "observation",
+            }
+        )
+
+    def _render_turns(self, turns: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        observations = [i for i, t in enumerate(turns) if t["kind"] == "observation"]
+        recent = set(observations[-self.keep_recent_observations :])
+        rendered = []
+        for index, turn in enumerate(turns):
+            content = turn["content"]
+            limit = self.old_observation_chars
+            if (
+                turn["kind"] != "action"
+                and index not in recent
+                and index < len(turns) - 1
+                and len(content) > limit
+            ):
+                content = content[:limit] + " ...[truncated]"
+            rendered.append({"role": turn["role"], "content": content})
+        return rendered
+
+    def messages(self) -> List[Dict[str, str]]:
+        """
+        Responses API input for the next step, within max_tokens where possible.
+        """
+        prefix = [{"role": "system", "content": self.system_prompt}]
+        prefix += [{"role": "user", "content": text} for text in self.static_context]
+        head = [{"role": "user", "content": text} for text in self.context]
+        head.append(
+            {
+                "role": "user",
+                "content": (
+                    f"CURRENT PLAN (v{self.plan_version}; tools use it when the "
+                    "plan argument is omitted, earlier copies in this conversation "
+                    "are replaced by <CURRENT PLAN ...> references): "
+                    f"{self.plan_json()}"
+                ),
+            }
+        )
+
+        turns = self.turns
+        dropped = 0
+        while True:
+            rendered = self._render_turns(turns)
+            if dropped:
+                rendered.insert(
+                    0,
+                    {
+                        "role": "user",
+                        "content": f"[{dropped} earlier messages omitted]",
+                    },
+                )
+            messages = head + rendered
+            # Always keep the latest action/observation exchange.
+            if self.count_tokens(messages) <= self.max_tokens or len(turns) <= 2:
+                return prefix + messages
+            turns = turns[1:]
+            dropped += 1
+
+    @staticmethod
+    def count_tokens(messages: List[Dict[str, str]]) -> int:
+        return sum(estimate_tokens(m["content"]) for m in messages)
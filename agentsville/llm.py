@@ -1,11 +1,214 @@
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
+import queue
+import threading
+from typing import Iterator, Optional
+
+from agentsville import cache
+from agentsville import routing
+from agentsville.llm_cache import CachingClient
+from agentsville.prompt_cache import prefix_stats
+from agentsville.routing import DEFAULT_MODEL  # noqa: F401
+from agentsville.tracing import propagate, record_usage, span
+from agentsville.transport import Transport
 
 load_dotenv()
 
-client = OpenAI(
-    base_url="https://openai.vocareum.com/v1", api_key=os.getenv("OPENAI_API_KEY")
+# Endpoint, configurable per deployment (models are picked by agentsville.routing).
+# VOC_API_BASE and VOC_API_KEY select the Vocareum proxy; otherwise the OpenAI
+# API is used.
+LLM_BASE_URL = os.getenv("AGENTSVILLE_LLM_BASE_URL") or os.getenv("VOC_API_BASE")
+LLM_API_KEY = (
+    os.getenv("AGENTSVILLE_LLM_API_KEY")
+    or (os.getenv("VOC_API_KEY") if os.getenv("VOC_API_BASE") else None)
+    or os.getenv("OPENAI_API_KEY")
 )
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Retries are owned by the transport below, not by the client.
+client = OpenAI(base_url=LLM_BASE_URL or None, api_key=LLM_API_KEY, max_retries=0)
+transport = Transport.from_env()
+
+
+def use_llm_cache(mode: str, cache_dir=None, base_client=None) -> CachingClient:
+    """
+    Routes every LLM call through a CachingClient ("live", "record" or "replay").
+    base_client defaults to the current OpenAI client; pass a local stand-in to
+    run the pipeline offline. Responses are stored under cache_dir
+    (default <cache.cache_dir()>/responses).
+    """
+    global client
+    if base_client is None:
+        base_client = client.client if isinstance(client, CachingClient) else client
+    if cache_dir is None and mode != "live":
+        directory = cache.cache_dir()
+        if directory is None:
+            raise ValueError(
+                f"LLM cache mode {mode!r} needs a cache directory, but "
+                "AGENTSVILLE_CACHE_DIR is empty; pass cache_dir instead."
+            )
+        cache_dir = directory / "responses"
+    client = CachingClient(base_client, mode=mode, cache_dir=cache_dir)
+    return client
+
+
+if os.getenv("AGENTSVILLE_LLM_CACHE", "live") != "live":
+    use_llm_cache(os.environ["AGENTSVILLE_LLM_CACHE"])
+
+# Global cap on concurrent LLM requests, shared by every call site and thread.
+MAX_IN_FLIGHT = int(os.getenv("AGENTSVILLE_MAX_IN_FLIGHT", "16"))
+_in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+
+
+def set_max_in_flight(limit: int) -> None:
+    """
+    Replaces the global in-flight limit (e.g. from a service's command line).
+    """
+    global _in_flight
+    _in_flight = threading.BoundedSemaphore(limit)
+
+
+def _send(**kwargs):
+    # Looks the client up per call so use_llm_cache (and tests) can swap it.
+    return client.responses.create(**kwargs)
+
+
+def _route(kwargs: dict, site: Optional[str], escalation: int) -> dict:
+    """
+    Fills in kwargs["model"] from the router for `site` (unless the caller
+    pinned a model) and returns the span attributes describing the choice.
+    """
+    if site is None:
+        return {"model": kwargs.get("model", "")}
+    router = routing.router
+    if "model" in kwargs:
+        tier = router.tier_of(kwargs["model"])
+    else:
+        kwargs["model"], tier = router.model_for(site, escalation)
+    router.record(site, kwargs["model"], tier)
+    return {"model": kwargs["model"], "site": site, "model_tier": tier}
+
+
+def _record_usage(current, site: Optional[str], response) -> None:
+    record_usage(current, response)
+    prefix_stats.record(site, response)
+
+
+def create_response(
+    deadline_s: Optional[float] = None,
+    site: Optional[str] = None,
+    escalation: int = 0,
+    **kwargs,
+):
+    """
+    client.responses.create behind the global in-flight limit and the shared
+    transport policy (retries, deadline, hedging, rate limits, circuit breaker).
+    Every call site goes through here so one limit covers all plans and threads;
+    each request sent (a hedge included) holds a slot only while it runs.
+    deadline_s overrides the transport's deadline for this call. site (and
+    escalation) let agentsville.routing pick the model when none is given.
+    Each call is traced as an "llm.call" span with its token usage, retries
+    and model tier; cached prompt tokens are also tallied per site in
+    prompt_cache.prefix_stats.
+    """
+    with span("llm.call", **_route(kwargs, site, escalation)) as current:
+        response = transport.call(
+            _send, kwargs, deadline_s=deadline_s, span=current, in_flight=_in_flight
+        )
+        _record_usage(current, site, response)
+        return response
+
+
+def _stream_deltas(
+    kwargs: dict, site: Optional[str], current, cancelled: threading.Event
+) -> Iterator[str]:
+    """
+    Output text deltas of one streamed request until it ends or `cancelled`
+    is set; the stream is closed either way.
+    """
+    if isinstance(client, CachingClient):
+        response = transport.call(_send, kwargs, span=current)
+        _record_usage(current, site, response)
+        yield response.output_text
+        return
+
+    # Retries cover opening the stream; a stream is never hedged.
+    stream = transport.call(
+        _send, {**kwargs, "stream": True}, hedge=False, span=current
+    )
+    if hasattr(stream, "output_text"):
+        _record_usage(current, site, stream)
+        yield stream.output_text
+        return
+
+    try:
+        for event in stream:
+            if cancelled.is_set():
+                current.set("cancelled", True)
+                return
+            event_type = getattr(event, "type", "")
+            if event_type == "response.output_text.delta":
+                yield event.delta
+            elif event_type == "response.completed":
+                _record_usage(current, site, event.response)
+            elif event_type in ("response.failed", "error"):
+                raise RuntimeError(f"LLM stream failed: {event}")
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+def stream_response(
+    site: Optional[str] = None, escalation: int = 0, **kwargs
+) -> Iterator[str]:
+    """
+    Streaming variant of create_response: yields output text deltas as they
+    arrive. Closing the generator early cancels the request. The record/replay
+    cache and clients without streaming support answer with the whole text as
+    a single delta.
+
+    The stream is read on its own thread, which owns the "llm.call" span and
+    the in-flight slot until the request ends, reading at most one delta
+    ahead. Work the caller does between deltas is therefore not traced under
+    llm.call, and the generator can be closed from any thread.
+    """
+    attributes = _route(kwargs, site, escalation)
+    deltas: queue.Queue = queue.Queue(maxsize=1)
+    cancelled = threading.Event()
+
+    def put(item: tuple) -> bool:
+        while not cancelled.is_set():
+            try:
+                deltas.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read() -> None:
+        try:
+            with span("llm.call", stream=True, **attributes) as current:
+                with _in_flight:
+                    for delta in _stream_deltas(kwargs, site, current, cancelled):
+                        if not put(("delta", delta)):
+                            current.set("cancelled", True)
+                            break
+        except BaseException as exc:
+            put(("error", exc))
+        else:
+            put(("done", None))
+
+    threading.Thread(
+        target=propagate(read), name="agentsville-stream", daemon=True
+    ).start()
+    try:
+        while True:
+            kind, value = deltas.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        cancelled.set()
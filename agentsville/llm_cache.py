@@ -0,0 +1,122 @@
+# agentsville/llm_cache.py
+import hashlib
+import json
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+LLM_CACHE_MODES = ("live", "record", "replay")
+
+# Request options that do not change the response.
+_TRANSPORT_OPTIONS = ("timeout", "extra_headers")
+
+
+class CacheMissError(RuntimeError):
+    """
+    Raised in replay mode when a request has no recorded response.
+    """
+
+
+def request_key(kwargs: Dict[str, Any]) -> str:
+    """
+    Content address of a responses.create request (model, input, temperature, ...).
+    """
+    relevant = {k: v for k, v in kwargs.items() if k not in _TRANSPORT_OPTIONS}
+    canonical = json.dumps(relevant, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for a Responses API response loaded from the cache.
+    """
+
+    cached = True
+
+    def __init__(self, output_text: str, usage: Optional[Dict[str, Any]] = None):
+        self.output_text = output_text
+        self.usage = _namespace(usage) if usage else None
+
+
+def _namespace(value: Any) -> Any:
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    return value
+
+
+def _usage_dict(response: Any) -> Optional[Dict[str, Any]]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    if isinstance(usage, SimpleNamespace):
+        return json.loads(json.dumps(usage, default=lambda o: vars(o)))
+    return None
+
+
+class _CachingResponses:
+    def __init__(self, owner: "CachingClient"):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner.create(**kwargs)
+
+
+class CachingClient:
+    """
+    Wraps any client exposing responses.create and stores responses on disk.
+
+    mode="live":   every request goes to the wrapped client, nothing is stored
+    mode="record": cached responses are returned instantly, misses are sent and stored
+    mode="replay": only cached responses are returned, misses raise CacheMissError
+                   (the wrapped client may be None)
+    """
+
+    def __init__(self, client: Any, mode: str = "record", cache_dir: Path = None):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode}")
+        self.client = client
+        self.mode = mode
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.responses = _CachingResponses(self)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def create(self, **kwargs):
+        if self.mode == "live":
+            return self.client.responses.create(**kwargs)
+
+        key = request_key(kwargs)
+        path = self._path(key)
+        if path.exists():
+            with self._lock:
+                self.hits += 1
+            record = json.loads(path.read_text(encoding="utf-8"))
+            return CachedResponse(record["output_text"], record.get("usage"))
+
+        with self._lock:
+            self.misses += 1
+        if self.mode == "replay":
+            raise CacheMissError(f"No recorded response for request {key[:12]}")
+
+        response = self.client.responses.create(**kwargs)
+        record = {
+            "model": kwargs.get("model"),
+            "output_text": response.output_text,
+            "usage": _usage_dict(response),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(record), encoding="utf-8")
+        tmp_path.replace(path)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -1,62 +1,577 @@
 import json
-from typing import Dict, List
+import os
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generator, List, Optional, Union
 
+from agentsville.activity_store import ActivityStore
+from agentsville.history import estimate_tokens
+from agentsville.retrieval import DEFAULT_TOP_K, select_candidates
+from agentsville.utils import trip_dates
 from agentsville.prompts import ITINERARY_AGENT_SYSTEM_PROMPT
-from agentsville.models import VacationInfo, TravelPlan
-from agentsville.llm import client
+from agentsville.models import Activity, DayPlan, VacationInfo, TravelPlan
+from agentsville.llm import create_response, stream_response
+from agentsville import prompt_cache
+from agentsville.schemas import (
+    TRAVEL_PLAN_SCHEMA,
+    parse_json_output,
+    structured_output,
+)
+from agentsville.speculation import (
+    SPECULATION_FANOUT,
+    SPECULATION_TEMPERATURE,
+    speculate,
+    stream_text,
+)
+from agentsville.streaming import DayStreamParser, MalformedDayError
+from agentsville.tracing import propagate, span, traced
+from agentsville.weather import rule_based_verdict
+
+# Retries on the next model tier when the planner's reply is not a valid TravelPlan.
+PLANNER_ESCALATIONS = int(os.getenv("AGENTSVILLE_PLANNER_ESCALATIONS", "1"))
+
+# Concurrent sub-requests for generate_itinerary_parallel.
+PLAN_MAX_CONCURRENCY = int(os.getenv("AGENTSVILLE_PLAN_CONCURRENCY", "8"))
 
 
 def build_user_prompt(
+    vacation_info: VacationInfo,
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
+    weather_by_date: Dict[str, str],
+    prefilter: bool = True,
+    top_k: Optional[int] = DEFAULT_TOP_K,
+    prompt_stats: Optional[Dict[str, Any]] = None,
+    by_id: bool = False,
+) -> str:
+    """
+    Builds the itinerary agent's user prompt.
+
+    With prefilter, candidates are pruned per day by retrieval.select_candidates
+    and everything is printed as compact JSON. prompt_stats, if given, receives
+    the estimated prompt tokens without ("before_tokens") and with
+    ("after_tokens") pre-filtering. by_id lists only activity ids per date, for
+    requests that carry the catalog in their prefix (see build_planner_input).
+    """
+    if isinstance(activities_by_date, ActivityStore):
+        # Only the trip's dates at the trip's destination are read from the store.
+        activities_by_date = activities_by_date.by_date(
+            trip_dates(vacation_info), destination=vacation_info.destination
+        )
+
+    if prompt_stats is not None or not prefilter:
+        unfiltered = _format_user_prompt(
+            vacation_info, activities_by_date, weather_by_date, indent=2
+        )
+        if not prefilter:
+            return unfiltered
+
+    dates = set(trip_dates(vacation_info))
+    result = _format_user_prompt(
+        vacation_info,
+        select_candidates(vacation_info, activities_by_date, weather_by_date, top_k),
+        {d: w for d, w in weather_by_date.items() if d in dates},
+        indent=None,
+        by_id=by_id,
+    )
+    if prompt_stats is not None:
+        prompt_stats["before_tokens"] = estimate_tokens(unfiltered)
+        prompt_stats["after_tokens"] = estimate_tokens(result)
+    return result
+
+
+def _format_user_prompt(
     vacation_info: VacationInfo,
     activities_by_date: Dict[str, List[dict]],
     weather_by_date: Dict[str, str],
+    indent: Optional[int],
+    by_id: bool = False,
 ) -> str:
+    separators = None if indent else (",", ":")
+    if by_id:
+        activities_by_date = {
+            day: [a["id"] for a in activities]
+            for day, activities in activities_by_date.items()
+        }
     result = f"""
         VacationInfo:
-    {vacation_info.model_dump_json(indent=2)}
+    {vacation_info.model_dump_json(indent=indent)}
 
     Activities:
-    {json.dumps(activities_by_date, indent=2)}
+    {json.dumps(activities_by_date, indent=indent, separators=separators)}
 
     Weather:
-    {json.dumps(weather_by_date, indent=2)}
+    {json.dumps(weather_by_date, indent=indent, separators=separators)}
     """.strip()
     return result
 
 
+def build_planner_input(
+    vacation_info: VacationInfo,
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
+    weather_by_date: Dict[str, str],
+    prefilter: bool = True,
+    prompt_stats: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Responses API input for the itinerary agent.
+
+    With prompt_cache.PREFIX_CATALOG the system prompt and the activity catalog
+    for the trip's dates form a byte-identical prefix, shared by every planner
+    request for those dates (other travelers, retries, escalations), and the
+    user prompt after it holds the trip, its weather and the candidate ids per
+    date. Otherwise the user prompt carries the (filtered) activities
+    themselves. prompt_stats also receives "prefix_tokens".
+    """
+    if not prompt_cache.PREFIX_CATALOG:
+        prefix = prompt_cache.static_prefix(ITINERARY_AGENT_SYSTEM_PROMPT)
+        user_prompt = build_user_prompt(
+            vacation_info,
+            activities_by_date,
+            weather_by_date,
+            prefilter=prefilter,
+            prompt_stats=prompt_stats,
+        )
+    else:
+        catalog = prompt_cache.catalog_for(
+            activities_by_date,
+            trip_dates(vacation_info),
+            destination=vacation_info.destination,
+        )
+        prefix = prompt_cache.static_prefix(ITINERARY_AGENT_SYSTEM_PROMPT, catalog)
+        user_prompt = build_user_prompt(
+            vacation_info,
+            catalog,
+            weather_by_date,
+            prefilter=prefilter,
+            prompt_stats=prompt_stats,
+            by_id=True,
+        )
+    if prompt_stats is not None:
+        prompt_stats["prefix_tokens"] = sum(
+            estimate_tokens(m["content"]) for m in prefix
+        )
+    return prefix + [{"role": "user", "content": user_prompt}]
+
+
+@traced("generate_itinerary")
 def generate_itinerary(
     vacation_info: VacationInfo,
-    activities_by_date: Dict[str, List[dict]],
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
     weather_by_date: Dict[str, str],
+    prefilter: bool = True,
+    prompt_stats: Optional[Dict[str, Any]] = None,
+    stream: bool = False,
+    on_day: Optional[Callable[[DayPlan], None]] = None,
+    candidates: int = SPECULATION_FANOUT,
 ) -> TravelPlan:
     """
     Calls the LLM itinerary agent and returns a validated TravelPlan.
+    prefilter / prompt_stats are passed to build_user_prompt.
+
+    stream (implied by on_day) uses stream_itinerary: on_day is called with each
+    validated DayPlan while later days are still being generated, and a malformed
+    day cancels the request early with MalformedDayError.
+
+    candidates > 1 requests that many plans concurrently and keeps the first
+    one that passes the local checks (see _speculative_itinerary), else the
+    best one; prompt_stats then receives a "speculation" entry.
+    """
+    if stream or on_day is not None:
+        days = stream_itinerary(
+            vacation_info,
+            activities_by_date,
+            weather_by_date,
+            prefilter=prefilter,
+            prompt_stats=prompt_stats,
+        )
+        while True:
+            try:
+                day = next(days)
+            except StopIteration as done:
+                return done.value
+            if on_day is not None:
+                on_day(day)
+
+    messages = build_planner_input(
+        vacation_info,
+        activities_by_date,
+        weather_by_date,
+        prefilter=prefilter,
+        prompt_stats=prompt_stats,
+    )
+
+    raw_output = ""
+    # An unusable reply is retried once on the next model tier up.
+    for escalation in range(PLANNER_ESCALATIONS + 1):
+        if escalation == 0 and candidates > 1:
+            try:
+                return _speculative_itinerary(
+                    vacation_info,
+                    activities_by_date,
+                    weather_by_date,
+                    messages,
+                    candidates,
+                    prompt_stats,
+                )
+            except ValueError as e:
+                # No candidate was a valid TravelPlan; transport errors propagate
+                error = e
+                continue
+        response = create_response(
+            site="planner",
+            escalation=escalation,
+            input=messages,
+            temperature=0.3,
+            **prompt_cache.cache_options(messages[:-1]),
+            **structured_output("TravelPlan", TRAVEL_PLAN_SCHEMA),
+        )
+
+        # Extract raw text output
+        raw_output = response.output_text.strip()
+
+        # Parse (repairing near-miss JSON) and validate into the Pydantic model
+        try:
+            with span("parse_travel_plan", chars=len(raw_output)):
+                travel_plan = TravelPlan.model_validate(parse_json_output(raw_output))
+            break
+        except Exception as e:
+            error = e
+    else:
+        raise ValueError(
+            f"LLM output is not valid TravelPlan JSON.\n\nOutput:\n{raw_output}"
+        ) from error
+
+    return travel_plan
+
+
+def _speculative_itinerary(
+    vacation_info: VacationInfo,
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
+    weather_by_date: Dict[str, str],
+    messages: List[Dict[str, str]],
+    candidates: int,
+    prompt_stats: Optional[Dict[str, Any]] = None,
+) -> TravelPlan:
+    """
+    Requests `candidates` plans concurrently and scores each on arrival with
+    analytics.CatalogArrays (no LLM calls). The first plan the revision
+    agent's pre-flight validator would accept is kept at once: activities
+    offered on their dates, weather fit decided by the rules, at least two
+    activities a day, every trip date once, and within budget. The remaining
+    requests are cancelled (they are streamed, so closing the stream stops
+    them). Otherwise the plan with the fewest issues is kept.
+    Raises the first candidate's error if no reply was a valid TravelPlan.
+    """
+    from agentsville.analytics import CatalogArrays
+
+    dates = trip_dates(vacation_info)
+    catalog = CatalogArrays(
+        prompt_cache.catalog_for(
+            activities_by_date, dates, destination=vacation_info.destination
+        ),
+        weather_by_date,
+        vacation_info.interests,
+    )
+
+    def request(index: int, cancelled) -> TravelPlan:
+        deltas = stream_response(
+            site="planner",
+            input=messages,
+            temperature=0.3 if index == 0 else SPECULATION_TEMPERATURE,
+            **prompt_cache.cache_options(messages[:-1]),
+            **structured_output("TravelPlan", TRAVEL_PLAN_SCHEMA),
+        )
+        raw_output = stream_text(deltas, cancelled).strip()
+        with span("parse_travel_plan", chars=len(raw_output)):
+            return TravelPlan.model_validate(parse_json_output(raw_output))
+
+    def score(plan: TravelPlan) -> tuple:
+        row = catalog.score([plan], vacation_info.budget_usd, trip_dates=dates).iloc[0]
+        issues = row.unknown_activities + row.incompatible + row.date_issues
+        return (
+            bool(row.feasible) and row.unverified == 0,
+            bool(row.feasible),
+            -int(issues),
+            float(row.interest_coverage),
+        )
+
+    result = speculate(
+        request, candidates, score, accept=lambda s: s[0], site="planner"
+    )
+    if prompt_stats is not None:
+        prompt_stats["speculation"] = {
+            "candidates": candidates,
+            "kept": result.index,
+            "passed": result.accepted,
+            "cancelled": result.cancelled,
+            "iterations_saved": result.iterations_saved,
+        }
+    return result.value
+
+
+def _check_day(
+    raw_day: str,
+    remaining: List[str],
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
+) -> DayPlan:
+    """
+    Validates one streamed day and repairs what can be repaired locally:
+    activities are replaced by their catalog entries (matched by id) and
+    estimated_cost_usd is recomputed from them. Raises ValueError when the
+    day's date is not one of the `remaining` trip dates (outside the trip or
+    already planned), it names an activity not offered that day, or it fails
+    DayPlan validation. Days are matched by their own date, not position, so a
+    day the model leaves out does not fail the ones after it.
     """
+    day = json.loads(raw_day)
+    day_date = day.get("date")
+    if day_date not in remaining:
+        raise ValueError(
+            f"date {day_date!r} is not a trip date still to plan "
+            f"(remaining: {', '.join(remaining) or 'none'})"
+        )
+
+    catalog = {a["id"]: a for a in activities_by_date.get(day_date, None) or []}
+    activities = []
+    for activity in day.get("activities") or []:
+        activity_id = activity.get("id") if isinstance(activity, dict) else None
+        if activity_id not in catalog:
+            raise ValueError(f"activity {activity_id!r} is not offered on {day_date}")
+        activities.append(catalog[activity_id])
 
-    user_prompt = build_user_prompt(
+    day["activities"] = activities
+    day["estimated_cost_usd"] = round(
+        sum(a.get("cost_usd", 0.0) for a in activities), 2
+    )
+    return DayPlan.model_validate(day)
+
+
+def stream_itinerary(
+    vacation_info: VacationInfo,
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
+    weather_by_date: Dict[str, str],
+    prefilter: bool = True,
+    prompt_stats: Optional[Dict[str, Any]] = None,
+) -> Generator[DayPlan, None, TravelPlan]:
+    """
+    Streaming generate_itinerary. Yields each DayPlan as soon as its JSON is
+    complete and validated (see _check_day), then returns the TravelPlan as the
+    generator's return value (StopIteration.value). Its days are the validated
+    days in trip order and total_cost_usd is their sum; trip dates the model
+    left out are listed in its notes.
+
+    A malformed day closes the stream, which cancels the request, and raises
+    MalformedDayError carrying the days accepted so far.
+    """
+    messages = build_planner_input(
         vacation_info,
         activities_by_date,
         weather_by_date,
+        prefilter=prefilter,
+        prompt_stats=prompt_stats,
     )
 
-    response = client.responses.create(
-        model="gpt-4.1-mini",
-        input=[
-            {"role": "system", "content": ITINERARY_AGENT_SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ],
+    parser = DayStreamParser()
+    days: List[DayPlan] = []
+    dates = trip_dates(vacation_info)
+    remaining = list(dates)
+    deltas = stream_response(
+        site="planner",
+        input=messages,
         temperature=0.3,
+        **prompt_cache.cache_options(messages[:-1]),
+        **structured_output("TravelPlan", TRAVEL_PLAN_SCHEMA),
     )
+    try:
+        for delta in deltas:
+            for raw_day in parser.feed(delta):
+                try:
+                    day = _check_day(raw_day, remaining, activities_by_date)
+                except ValueError as e:
+                    raise MalformedDayError(
+                        f"Day {len(days) + 1} of the streamed itinerary is malformed: {e}",
+                        index=len(days),
+                        days=days,
+                    ) from e
+                remaining.remove(day.date.isoformat())
+                days.append(day)
+                yield day
+    finally:
+        deltas.close()
 
-    # Extract raw text output
-    raw_output = response.output_text.strip()
+    days.sort(key=lambda day: dates.index(day.date.isoformat()))
 
-    # Validate + parse JSON into Pydantic model
+    raw_output = parser.text.strip()
     try:
-        travel_plan = TravelPlan.model_validate_json(raw_output)
+        with span("parse_travel_plan", chars=len(raw_output)):
+            payload = parse_json_output(raw_output)
+            payload["days"] = [day.model_dump() for day in days]
+            payload["total_cost_usd"] = round(
+                sum(day.estimated_cost_usd for day in days), 2
+            )
+            notes = [payload["notes"]] if payload.get("notes") else []
+            notes += [
+                f"{d}: not planned, the planner returned no day for it"
+                for d in remaining
+            ]
+            payload["notes"] = "; ".join(notes) or None
+            return TravelPlan.model_validate(payload)
     except Exception as e:
         raise ValueError(
             f"LLM output is not valid TravelPlan JSON.\n\nOutput:\n{raw_output}"
         ) from e
 
-    return travel_plan
+
+def _chunk_vacation(vacation_info: VacationInfo, dates: List[str]) -> VacationInfo:
+    """
+    The part of the trip covering `dates`, with a proportional share of the budget.
+    """
+    share = vacation_info.budget_usd * len(dates) / len(trip_dates(vacation_info))
+    return vacation_info.model_copy(
+        update={
+            "start_date": date.fromisoformat(dates[0]),
+            "end_date": date.fromisoformat(dates[-1]),
+            "budget_usd": round(share, 2),
+        }
+    )
+
+
+def _settle_budget(
+    days: List[DayPlan],
+    budget_usd: float,
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
+    weather_by_date: Dict[str, str],
+    min_activities: int = 2,
+) -> List[str]:
+    """
+    Brings the merged days within budget_usd, in place. Repeatedly applies the
+    swap that saves the most: an activity replaced by a cheaper one offered
+    the same day that the weather rules accept. When no swap is left, the most
+    expensive activity is dropped from a day that keeps min_activities.
+    Returns a note per change.
+    """
+    notes = []
+    total = sum(day.estimated_cost_usd for day in days)
+    while total > budget_usd:
+        best = None  # (saving, day, index, replacement)
+        for day in days:
+            iso = day.date.isoformat()
+            weather = weather_by_date.get(iso)
+            chosen = {a.id for a in day.activities}
+            alternatives = [
+                alt
+                for alt in activities_by_date.get(iso, None) or []
+                if alt["id"] not in chosen
+                and (
+                    weather is None
+                    or rule_based_verdict(alt, weather) == "IS_COMPATIBLE"
+                )
+            ]
+            for index, activity in enumerate(day.activities):
+                for alt in alternatives:
+                    saving = activity.cost_usd - alt.get("cost_usd", 0.0)
+                    if saving > 0 and (best is None or saving > best[0]):
+                        best = (saving, day, index, alt)
+
+        if best is not None:
+            saving, day, index, alt = best
+            old = day.activities[index]
+            day.activities[index] = Activity.model_validate(alt)
+            notes.append(
+                f"{day.date}: swapped {old.id} for {alt['id']} (-${saving:.2f})"
+            )
+        else:
+            droppable = [
+                (max(day.activities, key=lambda a: a.cost_usd), day)
+                for day in days
+                if len(day.activities) > min_activities
+            ]
+            if not droppable:
+                notes.append(f"over budget by ${total - budget_usd:.2f}")
+                break
+            activity, day = max(droppable, key=lambda pair: pair[0].cost_usd)
+            day.activities.remove(activity)
+            notes.append(
+                f"{day.date}: dropped {activity.id} (-${activity.cost_usd:.2f})"
+            )
+
+        day.estimated_cost_usd = sum(a.cost_usd for a in day.activities)
+        total = sum(d.estimated_cost_usd for d in days)
+    return notes
+
+
+@traced("generate_itinerary_parallel")
+def generate_itinerary_parallel(
+    vacation_info: VacationInfo,
+    activities_by_date: Union[Dict[str, List[dict]], ActivityStore],
+    weather_by_date: Dict[str, str],
+    chunk_days: int = 1,
+    max_concurrency: int = PLAN_MAX_CONCURRENCY,
+    prefilter: bool = True,
+) -> TravelPlan:
+    """
+    Map-reduce generate_itinerary for long trips.
+
+    The trip is split into chunks of chunk_days days; each chunk is planned by
+    its own generate_itinerary call (that chunk's activities and weather, and a
+    proportional share of budget_usd), up to max_concurrency at once. The merge
+    step keeps each chunk's days for its own dates, concatenates them, and
+    settles the total against budget_usd with _settle_budget. Dates a chunk's
+    reply left out are planned again one day at a time; a date still missing
+    after that is named in the plan's notes. Wall time follows the slowest
+    chunk instead of the trip length.
+    """
+    dates = trip_dates(vacation_info)
+    chunks = [dates[i : i + chunk_days] for i in range(0, len(dates), chunk_days)]
+
+    def plan_chunk(chunk: List[str]) -> TravelPlan:
+        return generate_itinerary(
+            _chunk_vacation(vacation_info, chunk),
+            activities_by_date,
+            {d: weather_by_date[d] for d in chunk if d in weather_by_date},
+            prefilter=prefilter,
+        )
+
+    def plan_chunks(chunks: List[List[str]]) -> List[TravelPlan]:
+        if max_concurrency <= 1 or len(chunks) == 1:
+            return [plan_chunk(chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks))) as pool:
+            return list(pool.map(propagate(plan_chunk), chunks))
+
+    def collect(chunks: List[List[str]], parts: List[TravelPlan]) -> None:
+        # Each chunk's days for its own dates only
+        for chunk, part in zip(chunks, parts):
+            by_date = {day.date.isoformat(): day for day in part.days}
+            planned.update((d, by_date[d]) for d in chunk if d in by_date)
+
+    planned: Dict[str, DayPlan] = {}
+    parts = plan_chunks(chunks)
+    collect(chunks, parts)
+    missing = [[d] for d in dates if d not in planned]
+    if missing:
+        retried = plan_chunks(missing)
+        collect(missing, retried)
+        parts += retried
+
+    with span("merge_itinerary", chunks=len(chunks), retried_days=len(missing)):
+        days = [planned[d] for d in dates if d in planned]
+        for day in days:
+            day.estimated_cost_usd = sum(a.cost_usd for a in day.activities)
+
+        notes = [part.notes for part in parts if part.notes]
+        notes += [
+            f"{d}: not planned, the planner returned no day for it"
+            for d in dates
+            if d not in planned
+        ]
+        notes += _settle_budget(
+            days, vacation_info.budget_usd, activities_by_date, weather_by_date
+        )
+        return TravelPlan(
+            destination=vacation_info.destination,
+            start_date=vacation_info.start_date,
+            end_date=vacation_info.end_date,
+            total_cost_usd=sum(day.estimated_cost_usd for day in days),
+            days=days,
+            notes="; ".join(notes) or None,
+        )
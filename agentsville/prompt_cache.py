@@ -0,0 +1,145 @@
+# agentsville/prompt_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Providers cache the longest previously seen prompt prefix, so every request
+# starts with a byte-identical static part (system prompt with the tool specs,
+# then the activity catalog for the trip's dates) and ends with the per-request
+# data.
+# Set AGENTSVILLE_PREFIX_CATALOG=0 to send filtered activities in the user
+# prompt instead of the shared catalog.
+PREFIX_CATALOG = os.getenv("AGENTSVILLE_PREFIX_CATALOG", "1") != "0"
+
+# Sends a prompt_cache_key derived from the static prefix so requests sharing it
+# are routed to the same cache. Set to 0 for endpoints that reject the parameter.
+PROMPT_CACHE_KEYS = os.getenv("AGENTSVILLE_PROMPT_CACHE_KEY", "1") != "0"
+
+CATALOG_HEADER = (
+    "ACTIVITY CATALOG (activities offered per date; the Activities in the "
+    "request list ids from this catalog):"
+)
+
+
+def canonical_json(value: Any) -> str:
+    """
+    Deterministic compact JSON: the same data always renders to the same bytes.
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def catalog_for(
+    activities_by_date: Any, dates: Iterable[str], destination: Optional[str] = None
+) -> Dict[str, List[dict]]:
+    """
+    The catalog to put in the prefix: the activities offered on `dates`, from a
+    dict or an ActivityStore (at `destination`), with the dates in order.
+    """
+    dates = sorted(set(dates))
+    if hasattr(activities_by_date, "by_date"):
+        return activities_by_date.by_date(dates, destination=destination)
+    return {day: activities_by_date[day] for day in dates if day in activities_by_date}
+
+
+# Rendered catalogs, keyed by the identity of their per-date activity lists
+# (catalog data is read-only), so sessions over the same dates encode it once.
+CATALOG_TEXT_CACHE_SIZE = 32
+_catalog_texts: "OrderedDict[tuple, Tuple[list, str]]" = OrderedDict()
+_catalog_texts_lock = threading.Lock()
+
+
+def catalog_text(activities_by_date: Dict[str, List[dict]]) -> str:
+    key = tuple((day, id(acts)) for day, acts in activities_by_date.items())
+    with _catalog_texts_lock:
+        cached = _catalog_texts.get(key)
+        if cached is not None:
+            _catalog_texts.move_to_end(key)
+            return cached[1]
+    text = f"{CATALOG_HEADER} {canonical_json(activities_by_date)}"
+    with _catalog_texts_lock:
+        # The lists are kept alive with the text so their ids stay unique.
+        _catalog_texts[key] = (list(activities_by_date.values()), text)
+        while len(_catalog_texts) > CATALOG_TEXT_CACHE_SIZE:
+            _catalog_texts.popitem(last=False)
+    return text
+
+
+def static_prefix(
+    system_prompt: str, activities_by_date: Optional[Dict[str, List[dict]]] = None
+) -> List[Dict[str, str]]:
+    """
+    The leading messages shared by every request of a call site (and destination).
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    if activities_by_date is not None:
+        messages.append({"role": "user", "content": catalog_text(activities_by_date)})
+    return messages
+
+
+def cache_options(prefix: List[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Request options routing requests that share `prefix` to the same cache, e.g.
+    create_response(input=prefix + rest, **cache_options(prefix)).
+    Empty when PROMPT_CACHE_KEYS is off.
+    """
+    if not PROMPT_CACHE_KEYS:
+        return {}
+    # The contents are already rendered text; hash them as is rather than
+    # re-encoding the (catalog-sized) messages.
+    digest = hashlib.sha256()
+    for message in prefix:
+        digest.update(f"{message['role']}\0{len(message['content'])}\0".encode())
+        digest.update(message["content"].encode("utf-8"))
+    digest = digest.hexdigest()
+    return {"prompt_cache_key": f"agentsville-{digest[:32]}"}
+
+
+class PrefixCacheStats:
+    """
+    Provider-side prompt cache usage per call site, from each response's
+    usage.input_tokens_details.cached_tokens.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites: Dict[str, Dict[str, int]] = defaultdict(
+                lambda: {"calls": 0, "input_tokens": 0, "cached_tokens": 0}
+            )
+
+    def record(self, site: Optional[str], response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "input_tokens_details", None)
+        with self._lock:
+            counts = self._sites[site or "other"]
+            counts["calls"] += 1
+            counts["input_tokens"] += getattr(usage, "input_tokens", None) or 0
+            counts["cached_tokens"] += getattr(details, "cached_tokens", None) or 0
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        {site: {"calls", "input_tokens", "cached_tokens", "cached_share"}}.
+        """
+        with self._lock:
+            return {
+                site: {
+                    **counts,
+                    "cached_share": (
+                        round(counts["cached_tokens"] / counts["input_tokens"], 3)
+                        if counts["input_tokens"]
+                        else 0.0
+                    ),
+                }
+                for site, counts in self._sites.items()
+            }
+
+
+prefix_stats = PrefixCacheStats()
@@ -1,33 +1,65 @@
+import functools
 import json
+import os
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from agentsville.utils import make_json_safe
+from agentsville.utils import make_json_safe, to_json, trip_dates
+from agentsville.compact import ActivityTable
+from agentsville.history import (
+    CURRENT_PLAN_REF,
+    PLAN_ARGUMENT_KEYS,
+    ConversationHistory,
+)
 
 from agentsville.prompts import ITINERARY_REVISION_AGENT_SYSTEM_PROMPT
-from agentsville.models import TravelPlan
-from agentsville.llm import client
+from agentsville.models import TravelPlan, VacationInfo
+from agentsville.validator import validate_plan
+from agentsville.llm import create_response, stream_response
+from agentsville import prompt_cache
+from agentsville.schemas import ACTION_SCHEMA, parse_json_output, structured_output
+from agentsville.speculation import (
+    SPECULATION_FANOUT,
+    SPECULATION_TEMPERATURE,
+    speculate,
+    stream_text,
+)
+from agentsville.tracing import span, traced
 from agentsville.tools import (
     get_activities_by_date_tool,
     run_evals_tool,
+    IncrementalEvaluator,
+    ToolResultCache,
     calculator_tool,
     final_answer_tool,
+    score_plans_tool,
 )
 
+# Failed evals / parse errors before the ReAct agent moves up one model tier.
+REACT_ESCALATE_AFTER = int(os.getenv("AGENTSVILLE_REACT_ESCALATE_AFTER", "2"))
+
+
+_JSON_DECODER = json.JSONDecoder()
+
 
 # Think -> Act -> feedback -> Observation
 # Helpers: parse ACTION JSON robustly
+def _action_start(text: str) -> int:
+    start = text.find("{", text.find("ACTION"))
+    if start == -1:
+        # fallback: find first '{' anywhere
+        start = text.find("{")
+    return start
+
+
 def _find_json_substring(text: str) -> Optional[str]:
     """
     Find the first balanced JSON object starting at the first '{' after 'ACTION:'.
     Returns the JSON substring or None.
     """
-    start = text.find("{", text.find("ACTION"))
+    start = _action_start(text)
     if start == -1:
-        # fallback: find first '{' anywhere
-        start = text.find("{")
-        if start == -1:
-            return None
+        return None
 
     depth = 0
     for i in range(start, len(text)):
@@ -43,13 +75,27 @@ def _find_json_substring(text: str) -> Optional[str]:
 
 def parse_thought_and_action(response_text: str) -> Dict[str, Any]:
     """
-    Parses a response containing THOUGHT: ... ACTION: {...}
+    Parses a response containing THOUGHT: ... ACTION: {...}, or the structured
+    {"thought", "tool_name", "arguments"} object requested with ACTION_SCHEMA
+    (null arguments count as omitted).
     Returns {"thought": str, "action": dict}
     Raises ValueError if parsing fails.
     """
     # Normalize whitespace
     t = response_text.strip()
 
+    if t.startswith("{"):
+        step = parse_json_output(t)
+        if isinstance(step, dict) and "tool_name" in step:
+            arguments = step.get("arguments") or {}
+            return {
+                "thought": str(step.get("thought", "")),
+                "action": {
+                    "tool_name": step["tool_name"],
+                    "arguments": {k: v for k, v in arguments.items() if v is not None},
+                },
+            }
+
     # Extract THOUGHT (text between 'THOUGHT:' and 'ACTION:')
     thought_match = re.search(
         r"THOUGHT\s*:\s*(.*?)\s*ACTION\s*:", t, flags=re.IGNORECASE | re.DOTALL
@@ -60,184 +106,518 @@ def parse_thought_and_action(response_text: str) -> Dict[str, Any]:
         # Attempt fallback: take first line as thought
         thought = t.splitlines()[0].strip()
 
-    # Extract JSON after ACTION:
+    # Decode the ACTION object in place (one pass, no substring); the
+    # brace scan and json-repair below handle anything that is not valid JSON
+    start = _action_start(t)
+    if start != -1:
+        try:
+            action, _ = _JSON_DECODER.raw_decode(t, start)
+        except json.JSONDecodeError:
+            action = None
+        if isinstance(action, dict):
+            return {"thought": thought, "action": action}
+
+    # Extract JSON after ACTION: (an unbalanced tail is left to json-repair)
     json_sub = _find_json_substring(t)
+    if not json_sub:
+        start = t.find("{", t.find("ACTION"))
+        json_sub = t[start:] if start != -1 else None
     if not json_sub:
         raise ValueError("Could not find ACTION JSON in LLM response.")
 
     try:
         action = json.loads(json_sub)
     except json.JSONDecodeError as e:
-        raise ValueError(
-            f"ACTION JSON invalid: {e}; substring: {json_sub[:200]}"
-        ) from e
+        action = parse_json_output(json_sub)
+        if not isinstance(action, dict):
+            raise ValueError(
+                f"ACTION JSON invalid: {e}; substring: {json_sub[:200]}"
+            ) from e
 
     return {"thought": thought, "action": action}
 
 
-def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> str:
+def _plan_argument(value: Any, context: Dict[str, Any]) -> Any:
+    """
+    Resolves a plan argument: omitted or CURRENT_PLAN_REF means the session's
+    current plan (dict); a dict is returned as is; a string is parsed, with
+    json-repair if it is not valid JSON, or passed through if that fails.
+    """
+    if value is None or value == CURRENT_PLAN_REF:
+        return context.get("current_plan")
+    if isinstance(value, str):
+        repaired = parse_json_output(value)
+        value = repaired if isinstance(repaired, dict) else value
+    return value
+
+
+def _unvalidated(plan: Any, exc: Exception) -> Dict[str, Any]:
+    """
+    A failing validate_plan result for a plan whose checks raised (e.g. the
+    weather check hit an open circuit), so it is never accepted unchecked.
+    """
+    return {
+        "passed": False,
+        "issues": [{"issue": f"plan could not be validated: {exc}"}],
+        "corrections": [],
+        "plan": plan,
+    }
+
+
+def _parse_plan_arguments(
+    arguments: Dict[str, Any], table: ActivityTable
+) -> Dict[str, Any]:
+    """
+    Plan arguments sent as JSON strings, parsed once and interned in `table`,
+    so the history and the tools share one dict instead of parsing it each.
+    """
+    parsed = dict(arguments)
+    for key in PLAN_ARGUMENT_KEYS:
+        value = parsed.get(key)
+        if isinstance(value, str) and value != CURRENT_PLAN_REF:
+            plan = parse_json_output(value)
+            if isinstance(plan, dict):
+                parsed[key] = table.intern_plan(plan)
+    return parsed
+
+
+def _response_text(response: Any) -> str:
+    # Prefer response.output_text if available
+    resp_text = getattr(response, "output_text", None)
+    if not resp_text:
+        # Fallback: try to extract first text chunk
+        try:
+            resp_text = ""
+            for out in response.output:
+                for item in out.get("content", []):
+                    if item.get("type") == "output_text":
+                        resp_text += item.get("text", "")
+        except Exception:
+            resp_text = str(response)
+    return resp_text
+
+
+def _step_score(
+    step: tuple,
+    current_plan: dict,
+    evals_passed: bool,
+    score_plan: Callable[[dict], Tuple[int, int]],
+) -> tuple:
+    """
+    Ranks a speculative ReAct step (response, text, parsed action or parse
+    error) as (accept, kind, -issues, -unverified); higher is better.
+    Accepted: an eval of a plan with no local issues and no pair left for
+    the LLM check, or the final answer once the evals passed. A lookup or
+    calculator step ranks like the unchanged current plan, a rejected final
+    answer below any eval and an unparseable reply last.
+    """
+    parsed = step[2]
+    if isinstance(parsed, Exception):
+        return (False, -2, 0, 0)
+    action = parsed["action"]
+    tool_name = action.get("tool_name")
+    arguments = action.get("arguments") or {}
+    if tool_name == "final_answer_tool":
+        return (evals_passed, 1 if evals_passed else -1, 0, 0)
+    plan = current_plan
+    if tool_name == "run_evals_tool":
+        value = arguments.get("itinerary_json")
+        if value is not None and value != CURRENT_PLAN_REF:
+            plan = value
+    if not isinstance(plan, dict):
+        return (False, -1, 0, 0)
+    issues, unverified = score_plan(plan)
+    accepted = tool_name == "run_evals_tool" and issues == 0 and unverified == 0
+    return (accepted, 0, -issues, -unverified)
+
+
+def execute_tool(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    context: Optional[Dict[str, Any]] = None,
+) -> str:
     """
     Map tool_name to the actual tool function and execute it.
     Returns the tool's observation string (JSON string).
+
+    context: session data bound server-side so the model never has to send it:
+        "activities_db" (dict), "weather_json" (str) and "current_plan" (dict),
+        plus an optional "evaluator" (IncrementalEvaluator) for run_evals_tool
+        (which then takes the parsed "weather_data" dict when given, skipping
+        the JSON round trip), an optional "tool_cache" (ToolResultCache) for
+        the lookup tools, and for score_plans_tool an optional "catalog_arrays"
+        (analytics.CatalogArrays, or a function building it on first use) and
+        "budget_usd".
+    Without a context the model-supplied arguments are used as before.
     """
+    with span("execute_tool", tool=str(tool_name)):
+        return _dispatch_tool(tool_name, arguments, context or {})
+
+
+def _dispatch_tool(
+    tool_name: str, arguments: Dict[str, Any], context: Dict[str, Any]
+) -> str:
+    activities_db = context.get("activities_db", arguments.get("activities_db"))
+    tool_cache = context.get("tool_cache")
+
     if tool_name == "get_activities_by_date_tool":
-        # expected arguments: date_str, activities_db
+        # expected arguments: date_str
         date_str = arguments.get("date_str")
-        activities_db = arguments.get("activities_db")
+        if tool_cache is not None:
+            return tool_cache.get_or_call(
+                tool_name,
+                {"date_str": date_str},
+                lambda: get_activities_by_date_tool(date_str, activities_db),
+            )
         return get_activities_by_date_tool(date_str, activities_db)
     elif tool_name == "run_evals_tool":
-        itinerary_json = arguments.get("itinerary_json")
-        weather_json = arguments.get("weather_json")
-        activities_db = arguments.get("activities_db")
-        return run_evals_tool(itinerary_json, weather_json, activities_db)
+        itinerary = _plan_argument(arguments.get("itinerary_json"), context)
+        weather_json = context.get("weather_json", arguments.get("weather_json"))
+        weather = context.get("weather_data")
+        evaluator = context.get("evaluator")
+        if evaluator is not None and isinstance(itinerary, dict) and weather:
+            return json.dumps(evaluator.evaluate(itinerary, weather))
+        if isinstance(itinerary, dict):
+            itinerary = json.dumps(itinerary)
+        if evaluator is not None:
+            return evaluator.run(itinerary, weather_json)
+        return run_evals_tool(itinerary, weather_json, activities_db)
     elif tool_name == "calculator_tool":
         expr = arguments.get("expression")
+        if tool_cache is not None:
+            return tool_cache.get_or_call(
+                tool_name, {"expression": expr}, lambda: calculator_tool(expr)
+            )
         return calculator_tool(expr)
+    elif tool_name == "score_plans_tool":
+        catalog = context.get("catalog_arrays")
+        if callable(catalog):
+            catalog = catalog()
+        if catalog is None:
+            from agentsville.analytics import CatalogArrays
+
+            weather = context.get("weather_data")
+            if weather is None and context.get("weather_json"):
+                weather = json.loads(context["weather_json"])
+            catalog = CatalogArrays(activities_db, weather)
+        return score_plans_tool(
+            arguments.get("candidates_json"),
+            catalog,
+            budget_usd=context.get("budget_usd"),
+        )
     elif tool_name == "final_answer_tool":
-        final_json = arguments.get("final_travelplan_json")
-        return final_answer_tool(final_json)
+        final = _plan_argument(arguments.get("final_travelplan_json"), context)
+        return final_answer_tool(final if isinstance(final, str) else to_json(final))
     else:
         return json.dumps({"error": f"Unknown tool: {tool_name}"})
 
 
 # ReAct loop
+@traced("react.revise")
 def revise_itinerary_with_react_agent(
     initial_itinerary: Dict[str, Any],
     weather_data: Dict[str, Any],
     activities_db: Dict[str, Any],
     max_iterations: int = 15,
-    model: str = "gpt-4.1-mini",
+    model: Optional[str] = None,
+    max_history_tokens: int = 8000,
+    iteration_log: Optional[List[Dict[str, Any]]] = None,
+    vacation_info: Optional[VacationInfo] = None,
+    preflight: bool = True,
+    evaluator: Optional[IncrementalEvaluator] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    speculation: int = SPECULATION_FANOUT,
 ) -> TravelPlan:
     """
     Use a ReAct agent to iteratively revise the itinerary until run_evals_tool passes and final_answer_tool is called.
     initial_itinerary: dict (TravelPlan JSON-like)
     weather_data: dict
     activities_db: dict
+    model: pins one model; by default agentsville.routing picks the "react" tier
+        and escalates one tier per REACT_ESCALATE_AFTER failed evals or parse errors
+    max_history_tokens: prompt budget for the compacted conversation history
+        (the static system prompt + catalog prefix is not counted)
+    iteration_log: if given, one {"iteration", "estimated_prompt_tokens", "input_tokens"}
+        entry is appended per LLM call
+    vacation_info: enables the budget and date-coverage checks of the pre-flight validator
+    preflight: validate the initial itinerary locally first; a passing plan is
+        returned without any LLM iteration, a failing one seeds the loop with its issues.
+        The final answer always passes the same checks (validator.validate_plan)
+        before it is accepted
+    evaluator / tool_cache: eval state and tool results, e.g. shared with other
+        sessions by sessions.ReActSessionPool (default: fresh per call)
+    speculation: candidate steps requested per iteration (1 = off). Each
+        candidate is scored locally (analytics.CatalogArrays, no LLM calls)
+        and the first that passes is kept (see _step_score and
+        speculation.speculate); iteration_log entries then also record the
+        candidates, the kept index and the iterations saved
     Returns: validated TravelPlan
     """
 
     safe_itinerary = make_json_safe(initial_itinerary)
     safe_weather = make_json_safe(weather_data)
 
-    # conversation history for the Responses API input
-    conversation = [
-        {"role": "system", "content": ITINERARY_REVISION_AGENT_SYSTEM_PROMPT},
-        {
-            "role": "user",
-            "content": f"Initial itinerary: {json.dumps(safe_itinerary)}",
-        },
-        {
-            "role": "user",
-            "content": f"Weather data: {json.dumps(safe_weather)}",
-        },
-    ]
+    # Eval state: only days changed since the last eval are rechecked
+    if evaluator is None:
+        evaluator = IncrementalEvaluator()
 
-    # Track whether run_evals_tool has been called and passed
-    run_evals_called_and_passed = False
+    preflight_issues = None
+    if preflight:
+        try:
+            validation = validate_plan(
+                safe_itinerary, safe_weather, activities_db, vacation_info, evaluator
+            )
+        except Exception as exc:
+            validation = _unvalidated(safe_itinerary, exc)
+        safe_itinerary = validation["plan"]
+        if validation["passed"]:
+            return TravelPlan.model_validate(safe_itinerary)
+        preflight_issues = validation["issues"]
 
-    for iteration in range(max_iterations):
-        # Call the LLM
-        response = client.responses.create(
-            model=model,
-            input=conversation,
-            temperature=0.2,
+    weather_json = json.dumps(safe_weather)
+
+    # Static prefix first (system prompt, then the catalog), session data after it
+    context = [f"Weather data: {weather_json}"]
+    static_context = []
+    prefix = prompt_cache.static_prefix(ITINERARY_REVISION_AGENT_SYSTEM_PROMPT)
+    plan_dates = [str(day.get("date")) for day in safe_itinerary.get("days", [])]
+    if prompt_cache.PREFIX_CATALOG and activities_db is not None:
+        catalog = prompt_cache.catalog_for(
+            activities_db, plan_dates, destination=safe_itinerary.get("destination")
         )
-        # Prefer response.output_text if available
-        resp_text = getattr(response, "output_text", None)
-        if not resp_text:
-            # Fallback: try to extract first text chunk
-            try:
-                resp_text = ""
-                for out in response.output:
-                    for item in out.get("content", []):
-                        if item.get("type") == "output_text":
-                            resp_text += item.get("text", "")
-            except Exception:
-                resp_text = str(response)
-
-        # Parse thought and action
+        prefix = prompt_cache.static_prefix(
+            ITINERARY_REVISION_AGENT_SYSTEM_PROMPT, catalog
+        )
+        static_context.append(prefix[1]["content"])
+    request_cache_options = prompt_cache.cache_options(prefix)
+
+    trip = trip_dates(vacation_info) if vacation_info is not None else plan_dates
+    # Trip dates too: the agent may add a day the draft is missing
+    catalog_dates = sorted(set(plan_dates) | set(trip))
+    budget_usd = vacation_info.budget_usd if vacation_info is not None else None
+
+    @functools.lru_cache(maxsize=None)
+    def catalog_arrays():
+        # Built on first use (score_plans_tool, speculative steps)
+        from agentsville.analytics import CatalogArrays
+
+        return CatalogArrays(
+            prompt_cache.catalog_for(
+                activities_db,
+                catalog_dates,
+                destination=safe_itinerary.get("destination"),
+            ),
+            safe_weather,
+            vacation_info.interests if vacation_info is not None else (),
+        )
+
+    def score_plan(plan: dict) -> Tuple[int, int]:
+        # (local issues, pairs left for the LLM weather check)
+        row = catalog_arrays().score([plan], budget_usd, trip_dates=trip).iloc[0]
+        issues = (
+            row.unknown_activities
+            + row.incompatible
+            + row.date_issues
+            + int(not row.within_budget)
+            + int(row.min_day_activities < 2)
+        )
+        return int(issues), int(row.unverified)
+
+    def request_step(
+        index: int, messages: list, model_options: dict, cancelled=None
+    ) -> tuple:
+        # (response, text, parsed step or the parse error). Speculative
+        # candidates are streamed so that losing ones can be cancelled; they
+        # have no response object.
+        options = dict(
+            site="react",
+            **model_options,
+            input=messages,
+            temperature=0.2 if index == 0 else SPECULATION_TEMPERATURE,
+            **structured_output("ReActStep", ACTION_SCHEMA),
+            **request_cache_options,
+        )
+        if cancelled is None:
+            response = create_response(**options)
+            resp_text = _response_text(response)
+        else:
+            response = None
+            resp_text = stream_text(stream_response(**options), cancelled)
         try:
             parsed = parse_thought_and_action(resp_text)
         except ValueError as e:
-            # If parsing fails, add observation and continue
-            conversation.append({"role": "assistant", "content": resp_text})
-            conversation.append(
-                {
-                    "role": "user",
-                    "content": f"OBSERVATION: Could not parse ACTION JSON: {e}",
-                }
-            )
-            continue
-
-        thought = parsed["thought"]
+            return response, resp_text, e
         action = parsed["action"]
+        if isinstance(action.get("arguments"), dict):
+            action["arguments"] = _parse_plan_arguments(
+                action["arguments"], evaluator.activity_table
+            )
+        return response, resp_text, parsed
 
-        # Append assistant message with THOUGHT+ACTION (so history records their reply)
-        conversation.append(
-            {
-                "role": "assistant",
-                "content": f"THOUGHT: {thought}\nACTION: {json.dumps(action)}",
-            }
+    # conversation history for the Responses API input; keeps a single current plan
+    conversation = ConversationHistory(
+        ITINERARY_REVISION_AGENT_SYSTEM_PROMPT,
+        plan=safe_itinerary,
+        context=context,
+        max_tokens=max_history_tokens,
+        static_context=static_context,
+    )
+    if preflight_issues:
+        conversation.record_observation(
+            "PRE-FLIGHT VALIDATION failed with these issues; fix them, then run "
+            f"run_evals_tool: {json.dumps(preflight_issues)}"
         )
 
-        tool_name = action.get("tool_name")
-        arguments = action.get("arguments", {})
+    # Track whether run_evals_tool has been called and passed
+    run_evals_called_and_passed = False
+    # Failed evals and unparseable replies so far; drives model escalation
+    failures = 0
 
-        # Enforce that final_answer_tool cannot be called before run_evals_tool has passed
-        if tool_name == "final_answer_tool" and not run_evals_called_and_passed:
-            obs = json.dumps(
-                {
-                    "error": "final_answer_tool not allowed until run_evals_tool has been run and passed."
-                }
+    for iteration in range(max_iterations):
+        with span("react.iteration", iteration=iteration) as current:
+            # Call the LLM
+            messages = conversation.messages()
+            model_options = (
+                {"model": model}
+                if model
+                else {"escalation": failures // REACT_ESCALATE_AFTER}
             )
-            conversation.append({"role": "user", "content": f"OBSERVATION: {obs}"})
-            continue
+            speculative = None
+            if speculation > 1:
+                current_plan, evals_passed = (
+                    conversation.plan,
+                    run_evals_called_and_passed,
+                )
+                speculative = speculate(
+                    lambda index, cancelled: request_step(
+                        index, messages, model_options, cancelled
+                    ),
+                    speculation,
+                    lambda step: _step_score(
+                        step, current_plan, evals_passed, score_plan
+                    ),
+                    accept=lambda score: score[0],
+                    site="react",
+                )
+                response, resp_text, parsed = speculative.value
+            else:
+                response, resp_text, parsed = request_step(0, messages, model_options)
+            if iteration_log is not None:
+                entry = {
+                    "iteration": iteration,
+                    "estimated_prompt_tokens": conversation.count_tokens(messages),
+                    "input_tokens": getattr(
+                        getattr(response, "usage", None), "input_tokens", None
+                    ),
+                }
+                if speculative is not None:
+                    entry.update(
+                        candidates=speculation,
+                        kept=speculative.index,
+                        iterations_saved=speculative.iterations_saved,
+                    )
+                iteration_log.append(entry)
 
-        # Execute the tool
-        try:
-            observation = execute_tool(tool_name, arguments)
-        except Exception as exc:
-            observation = json.dumps({"error": f"Tool execution error: {exc}"})
+            if isinstance(parsed, ValueError):
+                # If parsing fails, add observation and continue
+                failures += 1
+                conversation.record_raw_reply(resp_text)
+                conversation.record_observation(
+                    f"Could not parse ACTION JSON: {parsed}"
+                )
+                continue
 
-        # Add observation to conversation
-        conversation.append({"role": "user", "content": f"OBSERVATION: {observation}"})
+            thought = parsed["thought"]
+            action = parsed["action"]
 
-        # If tool was run_evals_tool, inspect result and set flag
-        if tool_name == "run_evals_tool":
+            # Record THOUGHT+ACTION (plan arguments are folded into the current plan slot)
+            conversation.record_action(thought, action)
+
+            tool_name = action.get("tool_name")
+            arguments = action.get("arguments", {})
+            current.set("tool", str(tool_name))
+
+            # Enforce that final_answer_tool cannot be called before run_evals_tool has passed
+            if tool_name == "final_answer_tool" and not run_evals_called_and_passed:
+                obs = json.dumps(
+                    {
+                        "error": "final_answer_tool not allowed until run_evals_tool has been run and passed."
+                    }
+                )
+                conversation.record_observation(obs)
+                continue
+
+            # Execute the tool; large inputs are bound from the session, not the model
+            context = {
+                "activities_db": activities_db,
+                "weather_json": weather_json,
+                "weather_data": safe_weather,
+                "current_plan": conversation.plan,
+                "evaluator": evaluator,
+                "tool_cache": tool_cache,
+                "catalog_arrays": catalog_arrays,
+                "budget_usd": budget_usd,
+            }
             try:
-                eval_result = json.loads(observation)
-
-                if eval_result.get("passed") is True:
-                    run_evals_called_and_passed = True
-
-                    conversation.append(
-                        {
-                            "role": "user",
-                            "content": (
-                                "OBSERVATION: Evaluation PASSED. "
-                                "You MUST now call final_answer_tool with the final TravelPlan JSON."
-                            ),
-                        }
+                observation = execute_tool(tool_name, arguments, context)
+            except Exception as exc:
+                observation = json.dumps({"error": f"Tool execution error: {exc}"})
+
+            # Add observation to conversation
+            conversation.record_observation(observation)
+
+            # If tool was run_evals_tool, inspect result and set flag
+            if tool_name == "run_evals_tool":
+                try:
+                    eval_result = json.loads(observation)
+
+                    if eval_result.get("passed") is True:
+                        run_evals_called_and_passed = True
+
+                        conversation.record_observation(
+                            "Evaluation PASSED. "
+                            "You MUST now call final_answer_tool with the final TravelPlan JSON."
+                        )
+                    else:
+                        run_evals_called_and_passed = False
+                        failures += 1
+                except Exception:
+                    run_evals_called_and_passed = False
+                    failures += 1
+
+            # If tool was final_answer_tool and run_evals_called_and_passed True, return final TravelPlan
+            if tool_name == "final_answer_tool":
+                # final_travelplan_json may be omitted to submit the current plan; validate it
+                final = _plan_argument(arguments.get("final_travelplan_json"), context)
+                # The pre-flight checks (budget, trip dates, known ids) gate it too
+                try:
+                    validation = validate_plan(
+                        final, safe_weather, activities_db, vacation_info, evaluator
                     )
-                else:
+                except Exception as exc:
+                    # Fails closed: a plan that could not be checked is rejected
+                    validation = _unvalidated(final, exc)
+                if not validation["passed"]:
                     run_evals_called_and_passed = False
-            except Exception:
-                run_evals_called_and_passed = False
-
-        # If tool was final_answer_tool and run_evals_called_and_passed True, return final TravelPlan
-        if tool_name == "final_answer_tool":
-            # final_answer_tool's arguments should have included final_travelplan_json; validate it
-            final_json_str = arguments.get("final_travelplan_json")
-            if not final_json_str:
-                raise RuntimeError(
-                    "final_answer_tool called without final_travelplan_json argument."
-                )
-            # Validate with Pydantic
-            try:
-                plan = TravelPlan.model_validate_json(final_json_str)
-                return plan
-            except Exception as e:
-                raise RuntimeError(f"Final TravelPlan invalid: {e}")
+                    failures += 1
+                    conversation.record_observation(
+                        json.dumps(
+                            {
+                                "error": "final_answer_tool rejected; fix these "
+                                "issues, then run run_evals_tool again.",
+                                "issues": validation["issues"],
+                            }
+                        )
+                    )
+                    continue
+                final = validation["plan"]
+                # Validate with Pydantic
+                try:
+                    if isinstance(final, dict):
+                        return TravelPlan.model_validate(final)
+                    return TravelPlan.model_validate_json(final)
+                except Exception as e:
+                    raise RuntimeError(f"Final TravelPlan invalid: {e}")
 
     # If loop ends without final, raise
     raise RuntimeError(
@@ -0,0 +1,69 @@
+# agentsville/retrieval.py
+from typing import Dict, List, Optional
+
+from agentsville.models import VacationInfo
+from agentsville.utils import trip_dates
+from agentsville.weather import rule_based_verdict
+
+DEFAULT_TOP_K = 6
+
+
+def interest_score(activity: dict, interests: List[str]) -> int:
+    """
+    Number of traveler interests matched by the activity's suitability tags,
+    name or description.
+    """
+    tags = {tag.lower() for tag in activity.get("suitability", [])}
+    text = f"{activity.get('name', '')} {activity.get('description', '')}".lower()
+    return sum(
+        1
+        for interest in interests
+        if interest.lower() in tags or interest.lower() in text
+    )
+
+
+def select_candidates(
+    vacation_info: VacationInfo,
+    activities_by_date: Dict[str, List[dict]],
+    weather_by_date: Dict[str, str],
+    top_k: Optional[int] = DEFAULT_TOP_K,
+) -> Dict[str, List[dict]]:
+    """
+    Ranks and prunes the candidate activities for each trip date before prompting:
+    - dates outside start_date..end_date are dropped
+    - activities the weather rules mark IS_INCOMPATIBLE are dropped
+      (ambiguous ones are kept for the model to judge)
+    - activities that cannot fit the budget even if every other day used its
+      cheapest remaining activity are dropped
+    - the rest are ranked by interest match, then cost, and the top_k are kept
+    """
+    feasible = {}
+    for date in trip_dates(vacation_info):
+        weather = weather_by_date.get(date)
+        feasible[date] = [
+            act
+            for act in activities_by_date.get(date, [])
+            if weather is None or rule_based_verdict(act, weather) != "IS_INCOMPATIBLE"
+        ]
+
+    cheapest = {
+        date: min((act.get("cost_usd", 0.0) for act in acts), default=0.0)
+        for date, acts in feasible.items()
+    }
+    cheapest_total = sum(cheapest.values())
+
+    candidates = {}
+    for date, acts in feasible.items():
+        headroom = vacation_info.budget_usd - (cheapest_total - cheapest[date])
+        kept = [act for act in acts if act.get("cost_usd", 0.0) <= headroom]
+        kept.sort(
+            key=lambda act: (
+                -interest_score(act, vacation_info.interests),
+                act.get("cost_usd", 0.0),
+            )
+        )
+        if top_k is not None:
+            kept = kept[:top_k]
+        if kept:
+            candidates[date] = kept
+    return candidates
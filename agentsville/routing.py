@@ -0,0 +1,108 @@
+# agentsville/routing.py
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("agentsville.routing")
+
+# Model tiers, cheapest first; escalation moves a call site up this list.
+MODEL_TIERS = ("small", "standard", "strong")
+
+DEFAULT_MODEL = os.getenv("AGENTSVILLE_MODEL", "gpt-4.1-mini")
+
+DEFAULT_TIER_MODELS = {
+    "small": os.getenv("AGENTSVILLE_MODEL_SMALL", "gpt-4.1-nano"),
+    "standard": os.getenv("AGENTSVILLE_MODEL_STANDARD", DEFAULT_MODEL),
+    "strong": os.getenv("AGENTSVILLE_MODEL_STRONG", "gpt-4.1"),
+}
+
+# Base tier per call site. The binary weather verdicts and routine ReAct steps
+# start small; the planner writes the whole itinerary and starts at standard.
+DEFAULT_ROUTES = {
+    "planner": "standard",
+    "react": "small",
+    "weather": "small",
+    "weather_batch": "small",
+    "summaries": "small",
+}
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM call from its call site and escalation level.
+
+    tiers maps MODEL_TIERS to model names and routes maps call sites to their
+    base tier (unknown sites use "standard"). escalation=n moves n tiers up,
+    capped at the strongest. Every routed call is counted per site and tier
+    and logged on the "agentsville.routing" logger.
+    """
+
+    def __init__(
+        self,
+        tiers: Optional[Dict[str, str]] = None,
+        routes: Optional[Dict[str, str]] = None,
+    ):
+        self.tiers = {**DEFAULT_TIER_MODELS, **(tiers or {})}
+        self.routes = {**DEFAULT_ROUTES, **(routes or {})}
+        for site, tier in self.routes.items():
+            if tier not in MODEL_TIERS:
+                raise ValueError(f"Unknown model tier {tier!r} for call site {site!r}")
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """
+        AGENTSVILLE_ROUTES overrides base tiers as JSON, e.g. '{"react": "standard"}'.
+        """
+        return cls(routes=json.loads(os.getenv("AGENTSVILLE_ROUTES") or "{}"))
+
+    def model_for(self, site: str, escalation: int = 0) -> Tuple[str, str]:
+        """
+        (model, tier) for a call site, without counting a call.
+        """
+        base = MODEL_TIERS.index(self.routes.get(site, "standard"))
+        tier = MODEL_TIERS[min(len(MODEL_TIERS) - 1, base + max(0, escalation))]
+        return self.tiers[tier], tier
+
+    def tier_of(self, model: str) -> str:
+        for tier, name in self.tiers.items():
+            if name == model:
+                return tier
+        return "pinned"
+
+    def record(self, site: str, model: str, tier: str) -> None:
+        with self._lock:
+            self._counts[(site, tier)] += 1
+        logger.info("LLM call site=%s tier=%s model=%s", site, tier, model)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Calls per site and tier, e.g. {"weather": {"small": 12}, "react": {"small": 3, "standard": 1}}.
+        """
+        with self._lock:
+            result: Dict[str, Dict[str, int]] = {}
+            for (site, tier), count in self._counts.items():
+                result.setdefault(site, {})[tier] = count
+            return result
+
+
+router = ModelRouter.from_env()
+
+
+def configure_routes(
+    tiers: Optional[Dict[str, str]] = None, routes: Optional[Dict[str, str]] = None
+) -> ModelRouter:
+    """
+    Replaces the process-wide router, e.g. per deployment.
+    """
+    global router
+    router = ModelRouter(tiers=tiers, routes=routes)
+    return router
+
+
+def model_for(site: str, escalation: int = 0) -> str:
+    return router.model_for(site, escalation)[0]
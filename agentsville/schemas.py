@@ -0,0 +1,137 @@
+# agentsville/schemas.py
+import copy
+import json
+import os
+from typing import Any, Dict, Optional, Type
+
+import json_repair
+from pydantic import BaseModel
+
+from agentsville.models import TravelPlan
+
+# Set AGENTSVILLE_STRUCTURED_OUTPUTS=0 for endpoints without json_schema support.
+STRUCTURED_OUTPUTS = os.getenv("AGENTSVILLE_STRUCTURED_OUTPUTS", "1") != "0"
+
+# Arguments the model may send per tool; session data is bound server-side.
+TOOL_ARGUMENTS = {
+    "get_activities_by_date_tool": ("date_str",),
+    "run_evals_tool": ("itinerary_json",),
+    "calculator_tool": ("expression",),
+    "score_plans_tool": ("candidates_json",),
+    "final_answer_tool": ("final_travelplan_json",),
+}
+
+# Keywords strict mode rejects or ignores.
+_DROPPED_KEYWORDS = ("title", "default", "description")
+
+
+def _strict(node: Any) -> Any:
+    """
+    Rewrites a JSON schema in place for strict mode: every object lists all of
+    its properties as required and forbids additional ones. Optional fields
+    stay nullable through their anyOf [..., null].
+    """
+    if isinstance(node, dict):
+        for keyword in _DROPPED_KEYWORDS:
+            if not isinstance(node.get(keyword), dict):
+                node.pop(keyword, None)
+        if node.get("type") == "object" and "properties" in node:
+            node["required"] = list(node["properties"])
+            node["additionalProperties"] = False
+        for value in node.values():
+            _strict(value)
+    elif isinstance(node, list):
+        for value in node:
+            _strict(value)
+    return node
+
+
+def strict_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    return _strict(copy.deepcopy(model.model_json_schema()))
+
+
+def action_json_schema() -> Dict[str, Any]:
+    """
+    Schema of one ReAct step: {"thought", "tool_name", "arguments"}. Every known
+    argument is present and nullable; null means "omitted".
+    """
+    argument_names = sorted({a for args in TOOL_ARGUMENTS.values() for a in args})
+    return {
+        "type": "object",
+        "properties": {
+            "thought": {"type": "string"},
+            "tool_name": {"type": "string", "enum": list(TOOL_ARGUMENTS)},
+            "arguments": {
+                "type": "object",
+                "properties": {
+                    name: {"type": ["string", "null"]} for name in argument_names
+                },
+                "required": argument_names,
+                "additionalProperties": False,
+            },
+        },
+        "required": ["thought", "tool_name", "arguments"],
+        "additionalProperties": False,
+    }
+
+
+BATCH_VERDICTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdicts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "pair_id": {"type": "string"},
+                    "verdict": {
+                        "type": "string",
+                        "enum": ["IS_COMPATIBLE", "IS_INCOMPATIBLE"],
+                    },
+                },
+                "required": ["pair_id", "verdict"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["verdicts"],
+    "additionalProperties": False,
+}
+
+TRAVEL_PLAN_SCHEMA = strict_json_schema(TravelPlan)
+ACTION_SCHEMA = action_json_schema()
+
+
+def structured_output(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Request options for Responses API structured output, e.g.
+    create_response(..., **structured_output("TravelPlan", TRAVEL_PLAN_SCHEMA)).
+    Empty when STRUCTURED_OUTPUTS is off.
+    """
+    if not STRUCTURED_OUTPUTS:
+        return {}
+    return {
+        "text": {
+            "format": {
+                "type": "json_schema",
+                "name": name,
+                "schema": schema,
+                "strict": True,
+            }
+        }
+    }
+
+
+def parse_json_output(text: str) -> Optional[Any]:
+    """
+    Parses model output as JSON, falling back to json-repair for near-misses
+    (code fences, trailing commas, truncation, single quotes).
+    Returns None if nothing object- or list-shaped can be recovered.
+    """
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    repaired = json_repair.loads(text)
+    return repaired if isinstance(repaired, (dict, list)) and repaired else None
@@ -0,0 +1,196 @@
+# agentsville/service.py
+"""
+Long-lived planning service: a JSONL batch runner.
+
+Each input line is a VacationInfo JSON object, optionally with a "request_id".
+Each output line is {"request_id", "status", "latency_s", "plan" | "error"},
+written as soon as that plan finishes.
+
+    python -m agentsville.service vacations.jsonl -o plans.jsonl --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+from agentsville.aio import aplan_vacation, blocking_executor
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.llm import MAX_IN_FLIGHT, set_max_in_flight, use_llm_cache
+from agentsville.llm_cache import LLM_CACHE_MODES
+from agentsville.models import VacationInfo
+from agentsville.sessions import ReActSessionPool
+from agentsville.speculation import speculation_stats
+from agentsville.tracing import tracer
+
+
+async def _plan_one(
+    line_no: int,
+    line: str,
+    activities_db: Dict[str, Any],
+    weather_data: Dict[str, str],
+    max_iterations: Optional[int],
+    planner: str,
+    sessions: Optional[ReActSessionPool] = None,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    request_id = f"line-{line_no}"
+    try:
+        payload = json.loads(line)
+        request_id = str(payload.pop("request_id", request_id))
+        vacation = VacationInfo.model_validate(payload)
+        plan = await aplan_vacation(
+            vacation,
+            activities_db,
+            weather_data,
+            max_iterations=max_iterations,
+            planner=planner,
+            sessions=sessions,
+        )
+        result = {"status": "ok", "plan": plan.model_dump(mode="json")}
+    except Exception as exc:
+        result = {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+    result["request_id"] = request_id
+    result["latency_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def serve_jsonl(
+    lines: Iterable[str],
+    output: TextIO,
+    concurrency: int = 8,
+    max_iterations: Optional[int] = 8,
+    activities_db: Optional[Dict[str, Any]] = None,
+    weather_data: Optional[Dict[str, str]] = None,
+    planner: str = "llm",
+) -> Dict[str, Any]:
+    """
+    Plans every vacation in `lines` with up to `concurrency` plans in flight.
+    Input is read lazily through a bounded queue, so a huge file never gets
+    ahead of the workers (backpressure). ReAct revisions run on one
+    ReActSessionPool, so all plans share its caches. Returns aggregate
+    statistics, including the pool's under "sessions".
+    """
+    activities_db = load_activities() if activities_db is None else activities_db
+    weather_data = load_weather() if weather_data is None else weather_data
+    sessions = (
+        ReActSessionPool(activities_db, weather_data, max_workers=concurrency)
+        if max_iterations is not None and planner != "solver"
+        else None
+    )
+
+    # Our own executor, so the caller's event loop is left as it was
+    executor = ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="agentsville-serve"
+    )
+    executor_token = blocking_executor.set(executor)
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    stats = {"requests": 0, "ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    async def produce() -> None:
+        for line_no, line in enumerate(lines, start=1):
+            if line.strip():
+                await queue.put((line_no, line))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            result = await _plan_one(
+                *item,
+                activities_db,
+                weather_data,
+                max_iterations=max_iterations,
+                planner=planner,
+                sessions=sessions,
+            )
+            stats["requests"] += 1
+            stats[result["status"]] += 1
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    finally:
+        blocking_executor.reset(executor_token)
+        executor.shutdown(wait=False, cancel_futures=True)
+        if sessions is not None:
+            sessions.close()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["plans_per_s"] = round(stats["requests"] / elapsed, 3) if elapsed else 0.0
+    if sessions is not None:
+        stats["sessions"] = sessions.stats()
+    if speculation_stats.stats():
+        stats["speculation"] = speculation_stats.stats()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan many vacations concurrently.")
+    parser.add_argument("input", help="JSONL file of VacationInfo objects")
+    parser.add_argument("-o", "--output", default="plans.jsonl")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    parser.add_argument("--max-iterations", type=int, default=8)
+    parser.add_argument(
+        "--no-revise", action="store_true", help="skip the ReAct revision pass"
+    )
+    parser.add_argument(
+        "--planner",
+        choices=["llm", "parallel", "solver"],
+        default="llm",
+        help="parallel drafts one day per LLM call; solver plans locally without LLM calls",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        choices=LLM_CACHE_MODES,
+        default=None,
+        help="record/replay LLM responses on disk (default: AGENTSVILLE_LLM_CACHE or live)",
+    )
+    parser.add_argument(
+        "--trace-out", default=None, help="write spans as OTLP/JSON to this file"
+    )
+    parser.add_argument(
+        "--metrics-out",
+        default=None,
+        help="write Prometheus text metrics to this file",
+    )
+    args = parser.parse_args(argv)
+
+    set_max_in_flight(args.max_in_flight)
+    if args.llm_cache is not None:
+        use_llm_cache(args.llm_cache)
+    max_iterations = None if args.no_revise else args.max_iterations
+
+    with open(args.input, "r", encoding="utf-8") as src, open(
+        args.output, "w", encoding="utf-8"
+    ) as out:
+        stats = asyncio.run(
+            serve_jsonl(
+                src,
+                out,
+                concurrency=args.concurrency,
+                max_iterations=max_iterations,
+                planner=args.planner,
+            )
+        )
+    print(json.dumps(stats))
+
+    if args.trace_out:
+        tracer.export_otlp_json(args.trace_out)
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            f.write(tracer.prometheus_text())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# agentsville/sessions.py
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from agentsville.cache import get_verdict_cache
+from agentsville.compact import ActivityTable
+from agentsville.models import TravelPlan, VacationInfo
+from agentsville.react_agent import revise_itinerary_with_react_agent
+from agentsville.tools import IncrementalEvaluator, ToolResultCache
+from agentsville.tracing import propagate
+from agentsville.utils import make_json_safe
+from agentsville.weather import EVAL_MODE
+
+# Concurrent ReAct sessions per pool.
+SESSION_MAX_WORKERS = int(os.getenv("AGENTSVILLE_SESSION_WORKERS", "8"))
+
+
+class ReActSessionPool:
+    """
+    Runs many ReAct revision sessions on a worker pool, for travelers planning
+    the same destination and week.
+
+    Read-only data is prepared once and shared by every session: the activity
+    catalog, the weather, the day eval results (keyed by day fingerprint, see
+    tools.IncrementalEvaluator), the lookup tool results (ToolResultCache), the
+    interned activities of the plans the sessions exchange (ActivityTable) and
+    the process-wide weather verdict cache. Each session keeps its own
+    conversation and current plan. A day another session already evaluated is
+    not checked again, so eval work and weather LLM calls per plan fall as
+    more sessions share the pool.
+
+    react_options are passed to revise_itinerary_with_react_agent.
+    """
+
+    def __init__(
+        self,
+        activities_db: Dict[str, Any],
+        weather_data: Dict[str, Any],
+        max_workers: int = SESSION_MAX_WORKERS,
+        eval_mode: str = EVAL_MODE,
+        **react_options,
+    ):
+        self.activities_db = activities_db
+        self.weather_data = make_json_safe(weather_data)
+        self.eval_mode = eval_mode
+        self.react_options = react_options
+        self.day_evals: Dict[tuple, List[dict]] = {}
+        self.tool_cache = ToolResultCache()
+        self.activity_table = ActivityTable()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="agentsville-session"
+        )
+        self._lock = threading.Lock()
+        self._started: Optional[float] = None
+        self._verdicts_before = get_verdict_cache().stats()
+        self._stats = {
+            "sessions": 0,
+            "completed": 0,
+            "failed": 0,
+            "iterations": 0,
+            "days_evaluated": 0,
+            "days_reused": 0,
+            "session_s": 0.0,
+        }
+
+    def __enter__(self) -> "ReActSessionPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def submit(
+        self,
+        initial_itinerary: Dict[str, Any],
+        vacation_info: Optional[VacationInfo] = None,
+        **options,
+    ) -> "Future[TravelPlan]":
+        """
+        Starts one session; options override the pool's react_options.
+        """
+        with self._lock:
+            self._stats["sessions"] += 1
+            if self._started is None:
+                self._started = time.perf_counter()
+        return self._executor.submit(
+            propagate(self._run),
+            initial_itinerary,
+            vacation_info,
+            {**self.react_options, **options},
+        )
+
+    def revise_many(
+        self,
+        itineraries: List[Dict[str, Any]],
+        vacation_infos: Optional[List[Optional[VacationInfo]]] = None,
+    ) -> List[Any]:
+        """
+        Revises every itinerary; returns a TravelPlan or the raised exception
+        per itinerary, in input order.
+        """
+        vacation_infos = vacation_infos or [None] * len(itineraries)
+        futures = [
+            self.submit(itinerary, vacation_info)
+            for itinerary, vacation_info in zip(itineraries, vacation_infos)
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    def _run(
+        self,
+        initial_itinerary: Dict[str, Any],
+        vacation_info: Optional[VacationInfo],
+        options: Dict[str, Any],
+    ) -> TravelPlan:
+        evaluator = IncrementalEvaluator(
+            mode=self.eval_mode,
+            day_cache=self.day_evals,
+            activity_table=self.activity_table,
+        )
+        iteration_log: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        status = "failed"
+        try:
+            plan = revise_itinerary_with_react_agent(
+                initial_itinerary,
+                self.weather_data,
+                self.activities_db,
+                vacation_info=vacation_info,
+                evaluator=evaluator,
+                tool_cache=self.tool_cache,
+                iteration_log=iteration_log,
+                **options,
+            )
+            status = "completed"
+            return plan
+        finally:
+            with self._lock:
+                self._stats[status] += 1
+                self._stats["iterations"] += len(iteration_log)
+                self._stats["days_evaluated"] += evaluator.days_evaluated
+                self._stats["days_reused"] += evaluator.days_reused
+                self._stats["session_s"] += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Aggregate throughput and reuse: sessions, plans_per_s since the first
+        submit, LLM iterations per plan, eval days evaluated vs. reused, and
+        the tool-result and verdict cache hits during the pool's lifetime.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            elapsed = time.perf_counter() - self._started if self._started else 0.0
+        finished = stats["completed"] + stats["failed"]
+        checked = stats["days_evaluated"] + stats["days_reused"]
+        verdicts = get_verdict_cache().stats()
+        stats.update(
+            elapsed_s=round(elapsed, 3),
+            session_s=round(stats["session_s"], 3),
+            plans_per_s=round(stats["completed"] / elapsed, 3) if elapsed else 0.0,
+            iterations_per_plan=(
+                round(stats["iterations"] / finished, 2) if finished else 0.0
+            ),
+            day_reuse_rate=round(stats["days_reused"] / checked, 3) if checked else 0.0,
+            tool_cache=self.tool_cache.stats(),
+            activity_table=self.activity_table.stats(),
+            verdict_cache={
+                key: verdicts[key] - self._verdicts_before.get(key, 0)
+                for key in ("hits", "misses", "writes")
+            },
+        )
+        return stats
@@ -0,0 +1,180 @@
+# agentsville/solver.py
+import json
+from typing import Dict, List, Tuple
+
+from agentsville.llm import create_response
+from agentsville.models import Activity, DayPlan, TravelPlan, VacationInfo
+from agentsville.prompts import DAY_SUMMARY_SYSTEM_PROMPT
+from agentsville.schemas import parse_json_output
+from agentsville.utils import trip_dates
+from agentsville.weather import rule_based_verdict
+
+# (cost, score, chosen activities per day so far)
+_State = Tuple[float, int, Tuple[Tuple[dict, ...], ...]]
+
+
+def _day_options(
+    activities: List[dict],
+    interests: List[str],
+    min_activities: int,
+    max_activities: int,
+    max_hours: float,
+) -> List[Tuple[float, int, Tuple[dict, ...]]]:
+    """
+    The useful activity sets for one day as (cost, score, activities): only sets
+    no other feasible set beats on both cost and score are kept.
+    If fewer than min_activities are available, the only option is all of them.
+    """
+    if len(activities) < min_activities:
+        sizes = [len(activities)]
+    else:
+        sizes = range(min_activities, min(max_activities, len(activities)) + 1)
+
+    from agentsville.analytics import day_combinations
+
+    options = day_combinations(activities, interests, sizes, max_hours)
+    return _pareto(options, len(options))
+
+
+def _pareto(states: List[_State], limit: int) -> List[_State]:
+    """
+    Keeps states no other state beats on both cost and score, cheapest first.
+    """
+    states.sort(key=lambda s: (s[0], -s[1]))
+    front: List[_State] = []
+    for state in states:
+        if not front or state[1] > front[-1][1]:
+            front.append(state)
+    if len(front) > limit:
+        # Keep the best-scoring states; they are also the most expensive ones.
+        front = front[-limit:]
+    return front
+
+
+def solve_itinerary(
+    vacation_info: VacationInfo,
+    activities_by_date: Dict[str, List[dict]],
+    weather_by_date: Dict[str, str],
+    min_activities: int = 2,
+    max_activities: int = 3,
+    max_hours_per_day: float = 8.0,
+    beam_width: int = 256,
+    strict: bool = False,
+    write_summaries: bool = False,
+) -> TravelPlan:
+    """
+    Builds a TravelPlan locally, without the LLM.
+
+    Each day gets min_activities..max_activities weather-compatible activities
+    (per weather.rule_based_verdict) within max_hours_per_day, the trip stays
+    within budget_usd, and total interest match is maximized (ties go to the
+    cheaper plan). Days are combined with a Pareto-front dynamic program over
+    (cost, score), capped at beam_width states per day.
+
+    A day with too few compatible activities gets all of them and a note, or
+    raises ValueError when strict. write_summaries asks the LLM (one call) for
+    the day summaries; otherwise they are generated from the activity names.
+    """
+    notes = []
+    states: List[_State] = [(0.0, 0, ())]
+    for date in trip_dates(vacation_info):
+        weather = weather_by_date.get(date)
+        compatible = [
+            act
+            for act in activities_by_date.get(date, [])
+            if weather is None or rule_based_verdict(act, weather) == "IS_COMPATIBLE"
+        ]
+        if len(compatible) < min_activities:
+            message = (
+                f"{date}: only {len(compatible)} activity(ies) compatible with "
+                f"{weather or 'the forecast'}"
+            )
+            if strict:
+                raise ValueError(f"No feasible itinerary. {message}")
+            notes.append(message)
+
+        options = _day_options(
+            compatible,
+            vacation_info.interests,
+            min_activities,
+            max_activities,
+            max_hours_per_day,
+        )
+        states = _pareto(
+            [
+                (cost + option_cost, score + option_score, chosen + (option,))
+                for cost, score, chosen in states
+                for option_cost, option_score, option in options
+                if cost + option_cost <= vacation_info.budget_usd
+            ],
+            beam_width,
+        )
+        if not states:
+            raise ValueError(
+                f"No feasible itinerary within ${vacation_info.budget_usd:.2f} "
+                f"and {max_hours_per_day}h/day (failed on {date})."
+            )
+
+    total_cost, score, chosen = max(states, key=lambda s: (s[1], -s[0]))
+
+    days = []
+    for date, activities in zip(trip_dates(vacation_info), chosen):
+        weather = weather_by_date.get(date)
+        names = " and ".join(a["name"] for a in activities) or "Free time"
+        days.append(
+            DayPlan(
+                date=date,
+                summary=f"{names}" + (f" on a {weather} day." if weather else "."),
+                activities=[Activity.model_validate(a) for a in activities],
+                estimated_cost_usd=sum(a.get("cost_usd", 0.0) for a in activities),
+            )
+        )
+
+    plan = TravelPlan(
+        destination=vacation_info.destination,
+        start_date=vacation_info.start_date,
+        end_date=vacation_info.end_date,
+        total_cost_usd=total_cost,
+        days=days,
+        notes="; ".join([f"Planned by local solver (interest score {score})"] + notes),
+    )
+    if write_summaries:
+        _write_summaries(plan, vacation_info, weather_by_date)
+    return plan
+
+
+def _write_summaries(
+    plan: TravelPlan, vacation_info: VacationInfo, weather_by_date: Dict[str, str]
+) -> None:
+    """
+    One LLM call that rewrites every DayPlan.summary; other fields are untouched.
+    Keeps the generated summaries if the reply cannot be parsed.
+    """
+    days = [
+        {
+            "date": day.date.isoformat(),
+            "weather": weather_by_date.get(day.date.isoformat()),
+            "activities": [a.name for a in day.activities],
+        }
+        for day in plan.days
+    ]
+    response = create_response(
+        site="summaries",
+        input=[
+            {"role": "system", "content": DAY_SUMMARY_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": json.dumps(
+                    {"interests": vacation_info.interests, "days": days}
+                ),
+            },
+        ],
+        temperature=0.3,
+    )
+    summaries = parse_json_output(response.output_text or "")
+    if not isinstance(summaries, dict):
+        return
+    for day in plan.days:
+        summary = summaries.get(day.date.isoformat())
+        if isinstance(summary, str) and summary.strip():
+            day.summary = summary.strip()
@@ -0,0 +1,188 @@
+# agentsville/speculation.py
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from agentsville.tracing import propagate, span
+
+# Candidates requested per speculative step (1 turns speculation off). Each
+# candidate is a separate LLM request: the extra ones trade tokens for fewer
+# sequential repair iterations.
+SPECULATION_FANOUT = int(os.getenv("AGENTSVILLE_SPECULATION_FANOUT", "1"))
+
+# Sampling temperature of the candidates after the first, so they differ.
+SPECULATION_TEMPERATURE = float(os.getenv("AGENTSVILLE_SPECULATION_TEMPERATURE", "0.8"))
+
+
+class SpeculationResult:
+    """
+    Outcome of one speculative step: the kept candidate (index, value, score,
+    whether it was accepted) and what happened to the others.
+    iterations_saved is 1 when the kept candidate was accepted while the
+    first one (what a single request would have returned) failed or was
+    scored and rejected: a sequential run would have needed at least one
+    more round trip to repair it.
+    """
+
+    __slots__ = (
+        "index",
+        "value",
+        "score",
+        "accepted",
+        "scored",
+        "failed",
+        "cancelled",
+        "iterations_saved",
+    )
+
+    def __init__(self, index: int, value: Any, score: Any, accepted: bool):
+        self.index = index
+        self.value = value
+        self.score = score
+        self.accepted = accepted
+        self.scored = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.iterations_saved = 0
+
+
+def stream_text(deltas: Iterator[str], cancelled: threading.Event) -> str:
+    """
+    Joins the deltas of an llm.stream_response generator. Once `cancelled` is
+    set the generator is closed, which cancels the request and frees its
+    in-flight slot, and CancelledError is raised.
+    """
+    parts = []
+    try:
+        for delta in deltas:
+            if cancelled.is_set():
+                raise CancelledError("speculative candidate cancelled")
+            parts.append(delta)
+    finally:
+        deltas.close()
+    return "".join(parts)
+
+
+def speculate(
+    request: Callable[[int, threading.Event], Any],
+    fan_out: int,
+    score: Callable[[Any], Any],
+    accept: Callable[[Any], bool],
+    site: Optional[str] = None,
+) -> SpeculationResult:
+    """
+    Runs request(i, cancelled) for i in 0 .. fan_out - 1 concurrently and
+    scores each result as it arrives (score(value), higher is better; a
+    request or score that raises drops the candidate). The first candidate
+    whose score passes accept() is kept at once: requests not yet sent are
+    dropped and `cancelled` is set for the ones in flight, which should stop
+    reading their replies (see stream_text). Otherwise the best-scoring
+    candidate is kept, the lowest index on ties.
+    Raises the error of the first candidate if every candidate failed.
+    The outcome is tallied in speculation_stats under `site`.
+    """
+
+    cancelled = threading.Event()
+
+    def run(index: int):
+        value = request(index, cancelled)
+        return value, score(value)
+
+    executor = ThreadPoolExecutor(
+        max_workers=fan_out, thread_name_prefix="agentsville-speculate"
+    )
+    with span("speculate", site=site or "other", fan_out=fan_out) as current:
+        futures = {executor.submit(propagate(run), i): i for i in range(fan_out)}
+        scores: Dict[int, Any] = {}
+        values: Dict[int, Any] = {}
+        errors: Dict[int, BaseException] = {}
+        kept: Optional[int] = None
+        pending = set(futures)
+        try:
+            while pending and kept is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=futures.get):
+                    index = futures[future]
+                    if future.exception() is not None:
+                        errors[index] = future.exception()
+                        continue
+                    values[index], scores[index] = future.result()
+                    if kept is None and accept(scores[index]):
+                        kept = index
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if kept is None:
+            if not scores:
+                raise errors[min(errors)]
+            kept = max(sorted(scores), key=lambda index: scores[index])
+        result = SpeculationResult(
+            kept, values[kept], scores[kept], accept(scores[kept])
+        )
+        result.scored = len(scores)
+        result.failed = len(errors)
+        result.cancelled = len(pending)
+        first_failed = 0 in errors or (0 in scores and not accept(scores[0]))
+        if result.accepted and kept != 0 and first_failed:
+            result.iterations_saved = 1
+        current.set("kept", kept)
+        current.set("cancelled", result.cancelled)
+        current.set("iterations_saved", result.iterations_saved)
+    speculation_stats.record(site, fan_out, result)
+    return result
+
+
+class SpeculationStats:
+    """
+    Speculative steps per call site: candidates requested, scored, failed and
+    cancelled, steps settled early by an accepted candidate, and the estimated
+    sequential iterations saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites: Dict[str, Dict[str, int]] = defaultdict(
+                lambda: {
+                    "steps": 0,
+                    "candidates": 0,
+                    "scored": 0,
+                    "failed": 0,
+                    "cancelled": 0,
+                    "accepted": 0,
+                    "kept_other_than_first": 0,
+                    "iterations_saved": 0,
+                }
+            )
+
+    def record(self, site: Optional[str], fan_out: int, result: SpeculationResult):
+        with self._lock:
+            counts = self._sites[site or "other"]
+            counts["steps"] += 1
+            counts["candidates"] += fan_out
+            counts["scored"] += result.scored
+            counts["failed"] += result.failed
+            counts["cancelled"] += result.cancelled
+            counts["accepted"] += int(result.accepted)
+            counts["kept_other_than_first"] += int(result.index != 0)
+            counts["iterations_saved"] += result.iterations_saved
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {site: dict(counts) for site, counts in self._sites.items()}
+
+
+speculation_stats = SpeculationStats()
@@ -0,0 +1,83 @@
+# agentsville/streaming.py
+from typing import List, Optional
+
+
+class MalformedDayError(ValueError):
+    """
+    Raised while streaming an itinerary when a completed day cannot be used.
+    `index` is the day's position in the plan; `days` holds the DayPlans
+    accepted before it.
+    """
+
+    def __init__(self, message: str, index: int, days: Optional[list] = None):
+        super().__init__(message)
+        self.index = index
+        self.days = days or []
+
+
+class DayStreamParser:
+    """
+    Incremental scanner for a streamed TravelPlan JSON document.
+
+    feed(delta) returns the raw JSON text of every element of the top-level
+    "days" array that the delta completed, so each day can be parsed as soon as
+    its closing brace arrives. Only string/escape state and bracket depth are
+    tracked; the whole document is still available as .text for the final parse.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._days_depth: Optional[int] = None
+        self._day_start: Optional[int] = None
+
+    def feed(self, delta: str) -> List[str]:
+        self.text += delta
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_key = text[self._string_start : i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch in "{[":
+                if (
+                    ch == "["
+                    and len(self._stack) == 1
+                    and self._days_depth is None
+                    and self._last_key == "days"
+                ):
+                    self._days_depth = 2
+                elif ch == "{" and self._days_depth == len(self._stack):
+                    self._day_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if (
+                    ch == "}"
+                    and self._day_start is not None
+                    and len(self._stack) == self._days_depth
+                ):
+                    completed.append(text[self._day_start : i + 1])
+                    self._day_start = None
+                elif ch == "]" and self._days_depth == len(self._stack) + 1:
+                    self._days_depth = -1  # the days array is closed
+        self._pos = len(text)
+        return completed
@@ -1,6 +1,16 @@
 import json
-from typing import List
-from agentsville.weather import check_weather_compatibility
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from agentsville.compact import ActivityTable, CompactDay, CompactPlan
+from agentsville.weather import (
+    CHECK_FAILED,
+    EVAL_MAX_CONCURRENCY,
+    EVAL_MODE,
+    WEATHER_CHECK_TIMEOUT_S,
+    check_weather_compatibility_batch,
+    check_weather_compatibility_many,
+    count_tiers,
+)
 
 
 def get_activities_by_date_tool(date_str: str, activities_db: dict) -> str:
@@ -9,7 +19,7 @@ def get_activities_by_date_tool(date_str: str, activities_db: dict) -> str:
     Returns JSON string: {"date": "...", "activities": [ ... ]}
 
     date_str: "YYYY-MM-DD"
-    activities_db: dictionary mapping date->list(activity dicts)
+    activities_db: dictionary mapping date->list(activity dicts), or an ActivityStore
     """
     activities = activities_db.get(date_str, [])
     return json.dumps({"date": date_str, "activities": activities})
@@ -26,46 +36,280 @@ def calculator_tool(expression: str) -> str:
     return json.dumps({"expression": expression, "result": res})
 
 
-def run_evals_tool(itinerary_json: str, weather_json: str, activities_db: dict) -> str:
+def score_plans_tool(
+    candidates_json: Union[str, list],
+    catalog: Any,
+    budget_usd: Optional[float] = None,
+    max_hours_per_day: Optional[float] = None,
+) -> str:
     """
-    Evaluates itinerary constraints and flags issues.
-    Weather compatibility is evaluated via LLM.
+    score_plans_tool(candidates_json: str, catalog: CatalogArrays) -> str
+    Scores a batch of candidate plans in one call.
+    candidates_json: JSON list; each candidate is a TravelPlan or a
+        {"YYYY-MM-DD": [activity ids]} mapping
+    returns: {"candidates": [{"candidate": i, "total_cost_usd", "within_budget",
+        "total_hours", "max_day_hours", "min_day_activities", "interest_coverage",
+        "unknown_activities", "incompatible", "unverified", "feasible",
+        "day_costs": {date: cost}}, ...]}
     """
+    candidates = (
+        json.loads(candidates_json)
+        if isinstance(candidates_json, str)
+        else candidates_json
+    )
+    if isinstance(candidates, dict):
+        candidates = candidates.get("candidates", [candidates])
+    frame = catalog.score(candidates, budget_usd, max_hours_per_day)
+    records = json.loads(frame.to_json(orient="records"))
+    day_totals = catalog.day_totals(candidates)
+    for index, record in enumerate(records):
+        days = day_totals[day_totals["plan"] == index]
+        record["candidate"] = index
+        record["day_costs"] = dict(zip(days["date"], days["cost_usd"].tolist()))
+    return json.dumps({"candidates": records})
+
 
-    plan = json.loads(itinerary_json)
-    weather = json.loads(weather_json)
+# Issue text for a weather check that failed (timeout, open circuit): transient.
+UNVERIFIED_ISSUE = "could not verify compatibility with"
 
-    issues = []
 
-    for day in plan.get("days", []):
-        date = day.get("date")
+def _evaluate_days(
+    days: List[CompactDay],
+    weather: Dict[str, str],
+    max_concurrency: int,
+    timeout: Optional[float],
+    mode: str,
+) -> Tuple[List[List[dict]], List[Tuple[str, str]]]:
+    """
+    Runs the eval checks for the given days.
+    Returns the issues of each day (in day order) and the (verdict, tier)
+    of every weather check that was made.
+    """
+    day_issues = []
+    pairs = []
+    pair_days = []
+
+    for day in days:
+        date = day.date
+        issues_for_day = []
+        day_issues.append(issues_for_day)
 
         # Minimum activities per day
-        if len(day.get("activities", [])) < 2:
-            issues.append({"date": date, "issue": "fewer than 2 activities"})
+        if len(day.activities) < 2:
+            issues_for_day.append({"date": date, "issue": "fewer than 2 activities"})
 
         day_weather = weather.get(date)
 
         if not day_weather:
             continue
 
-        for act in day.get("activities", []):
-            result = check_weather_compatibility(act, day_weather)
+        for act in day.activities:
+            pairs.append((act, day_weather))
+            pair_days.append((date, issues_for_day))
 
-            if result == "IS_INCOMPATIBLE":
-                issues.append(
-                    {
-                        "date": date,
-                        "activity": act.get("name"),
-                        "issue": f"incompatible with {day_weather}",
-                    }
-                )
+    check_pairs = (
+        check_weather_compatibility_batch
+        if mode == "batch"
+        else check_weather_compatibility_many
+    )
+    results = check_pairs(pairs, max_concurrency=max_concurrency, timeout=timeout)
+
+    for (act, day_weather), (date, issues_for_day), (result, _) in zip(
+        pairs, pair_days, results
+    ):
+        if result == "IS_INCOMPATIBLE":
+            issues_for_day.append(
+                {
+                    "date": date,
+                    "activity": act.get("name"),
+                    "issue": f"incompatible with {day_weather}",
+                }
+            )
+        elif result == CHECK_FAILED:
+            issues_for_day.append(
+                {
+                    "date": date,
+                    "activity": act.get("name"),
+                    "issue": f"{UNVERIFIED_ISSUE} {day_weather}",
+                }
+            )
+
+    return day_issues, results
 
+
+def _eval_result(
+    day_issues: List[List[dict]], results: List[Tuple[str, str]], **extra
+) -> Dict[str, Any]:
+    issues = [issue for issues_for_day in day_issues for issue in issues_for_day]
     passed = len(issues) == 0
 
-    return json.dumps(
-        {"passed": passed, "issues": issues, "summary": f"{len(issues)} issue(s)"}
+    return {
+        "passed": passed,
+        "issues": issues,
+        "summary": f"{len(issues)} issue(s)",
+        "tiers": count_tiers(results),
+        **extra,
+    }
+
+
+def evaluate_plan(
+    plan: Union[dict, CompactPlan],
+    weather: Dict[str, str],
+    max_concurrency: int = EVAL_MAX_CONCURRENCY,
+    timeout: Optional[float] = WEATHER_CHECK_TIMEOUT_S,
+    mode: str = EVAL_MODE,
+) -> Dict[str, Any]:
+    """
+    run_evals_tool on an already parsed plan and weather; returns the result
+    dict instead of its JSON.
+    """
+    plan = CompactPlan.from_plan(plan)
+    day_issues, results = _evaluate_days(
+        plan.days, weather, max_concurrency, timeout, mode
+    )
+    return _eval_result(day_issues, results)
+
+
+def run_evals_tool(
+    itinerary_json: str,
+    weather_json: str,
+    activities_db: dict,
+    max_concurrency: int = EVAL_MAX_CONCURRENCY,
+    timeout: Optional[float] = WEATHER_CHECK_TIMEOUT_S,
+    mode: str = EVAL_MODE,
+) -> str:
+    """
+    Evaluates itinerary constraints and flags issues.
+    Weather compatibility is decided by local rules where clear-cut and via LLM
+    otherwise. mode="batch" sends the LLM checks as a few batched requests,
+    mode="concurrent" sends one request per pair; either way requests run
+    concurrently (up to max_concurrency, each bounded by timeout). Issues are
+    reported in itinerary order regardless of completion order, and "tiers"
+    reports how many checks each tier answered.
+    """
+
+    result = evaluate_plan(
+        json.loads(itinerary_json),
+        json.loads(weather_json),
+        max_concurrency,
+        timeout,
+        mode,
     )
+    return json.dumps(result)
+
+
+def day_fingerprint(day: dict, weather: Dict[str, str]) -> tuple:
+    """
+    (date, weather, activity ids and content digests): what a day's eval
+    result depends on.
+    """
+    return CompactDay.from_dict(day).fingerprint(weather)
+
+
+class IncrementalEvaluator:
+    """
+    run_evals_tool for one session: keeps each day's issues keyed by its
+    fingerprint and re-evaluates only days whose fingerprint changed since
+    the previous call, so eval cost scales with the edit, not the trip.
+    Days with a failed weather check are not kept, so the check is retried.
+    Options are passed through to the checks (max_concurrency, timeout, mode).
+    Plans sent as JSON have their activities interned in activity_table.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = EVAL_MAX_CONCURRENCY,
+        timeout: Optional[float] = WEATHER_CHECK_TIMEOUT_S,
+        mode: str = EVAL_MODE,
+        day_cache: Optional[Dict[tuple, List[dict]]] = None,
+        activity_table: Optional[ActivityTable] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.mode = mode
+        # Pass one dict to several evaluators to share day results between sessions
+        self._days: Dict[tuple, List[dict]] = {} if day_cache is None else day_cache
+        self.activity_table = activity_table or ActivityTable()
+        self.days_evaluated = 0
+        self.days_reused = 0
+
+    def run(self, itinerary_json: str, weather_json: str) -> str:
+        plan = CompactPlan.from_plan(itinerary_json, self.activity_table)
+        return json.dumps(self.evaluate(plan, json.loads(weather_json)))
+
+    def evaluate(
+        self, plan: Union[dict, CompactPlan], weather: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """
+        run() on an already parsed plan and weather, returning the result dict.
+        """
+        days = CompactPlan.from_plan(plan).days
+        fingerprints = [day.fingerprint(weather) for day in days]
+
+        changed = [
+            index
+            for index, fingerprint in enumerate(fingerprints)
+            if fingerprint not in self._days
+        ]
+        fresh_issues, results = _evaluate_days(
+            [days[index] for index in changed],
+            weather,
+            self.max_concurrency,
+            self.timeout,
+            self.mode,
+        )
+        fresh = dict(zip(changed, fresh_issues))
+        for index, issues_for_day in fresh.items():
+            # A failed check is retried next time instead of sticking to the day
+            if not any(
+                issue["issue"].startswith(UNVERIFIED_ISSUE) for issue in issues_for_day
+            ):
+                self._days[fingerprints[index]] = issues_for_day
+
+        day_issues = [
+            fresh[index] if index in fresh else self._days[fingerprint]
+            for index, fingerprint in enumerate(fingerprints)
+        ]
+        self.days_evaluated += len(changed)
+        self.days_reused += len(days) - len(changed)
+        return _eval_result(
+            day_issues,
+            results,
+            days_evaluated=len(changed),
+            days_reused=len(days) - len(changed),
+        )
+
+
+class ToolResultCache:
+    """
+    Results of deterministic tool calls (same tool, same arguments, same
+    read-only session data), shared by every session that uses it.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._results: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def get_or_call(
+        self, tool_name: str, arguments: Dict[str, Any], call: Callable[[], str]
+    ) -> str:
+        key = json.dumps([tool_name, arguments], sort_keys=True, default=str)
+        with self._lock:
+            result = self._results.get(key)
+            self._counters["hits" if result is not None else "misses"] += 1
+        if result is None:
+            result = call()
+            with self._lock:
+                if len(self._results) >= self.max_entries:
+                    self._results.pop(next(iter(self._results)))
+                self._results[key] = result
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, entries=len(self._results))
 
 
 def final_answer_tool(final_travelplan_json: str) -> str:
@@ -0,0 +1,262 @@
+# agentsville/tracing.py
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+# Numeric span attributes that are also summed per span name for metrics.
+AGGREGATED_ATTRIBUTES = (
+    "tokens.input",
+    "tokens.output",
+    "tokens.cached",
+    "retries",
+    "cache_hit",
+    "tier.rules",
+    "tier.cache",
+    "tier.llm",
+    "tier.failed",
+)
+_AGGREGATED = frozenset(AGGREGATED_ATTRIBUTES)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "agentsville_span", default=None
+)
+
+
+class Span:
+    """
+    One timed pipeline stage. Attributes are set with span.set(key, value).
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_unix_ns",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.start_unix_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_s(self) -> float:
+        return ((self.end_ns or time.perf_counter_ns()) - self.start_ns) / 1e9
+
+
+class _NoopSpan:
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects spans for pipeline stages and keeps running aggregates.
+
+    Finished spans are kept in a bounded ring buffer (max_spans) for export;
+    aggregates (count, total/max seconds, errors and AGGREGATED_ATTRIBUTES sums
+    per span name) cover every span ever recorded. A disabled tracer hands out
+    a shared no-op span, so instrumentation costs almost nothing.
+    """
+
+    def __init__(self, enabled: bool = True, max_spans: int = 10_000):
+        self.enabled = enabled
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            self._record(span)
+
+    def _record(self, span: Span) -> None:
+        duration = span.duration_s
+        with self._lock:
+            self._spans.append(span)
+            stats = self._stats[span.name]
+            stats["count"] += 1
+            stats["total_s"] += duration
+            stats["max_s"] = max(stats["max_s"], duration)
+            stats["errors"] += 1 if span.error else 0
+            for key, value in span.attributes.items():
+                if key in _AGGREGATED and isinstance(value, (int, float)):
+                    stats[key] += value
+
+    def finished_spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(values) for name, values in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._stats.clear()
+
+    def export_otlp_json(self, path: str) -> None:
+        """
+        Writes finished spans in the OpenTelemetry OTLP/JSON trace format.
+        """
+
+        def attribute(key: str, value: Any) -> dict:
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        spans = []
+        for span in self.finished_spans():
+            end_unix_ns = span.start_unix_ns + (span.end_ns - span.start_ns)
+            record = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_unix_ns),
+                "endTimeUnixNano": str(end_unix_ns),
+                "attributes": [attribute(k, v) for k, v in span.attributes.items()],
+                "status": (
+                    {"code": 2, "message": span.error} if span.error else {"code": 1}
+                ),
+            }
+            if span.parent_id:
+                record["parentSpanId"] = span.parent_id
+            spans.append(record)
+
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [attribute("service.name", "agentsville")]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "agentsville.tracing"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+
+    def prometheus_text(self) -> str:
+        """
+        Aggregates in the Prometheus text exposition format.
+        """
+        stats = self.stats()
+        lines = [
+            "# HELP agentsville_span_duration_seconds Wall time per pipeline stage.",
+            "# TYPE agentsville_span_duration_seconds summary",
+        ]
+        for name, values in sorted(stats.items()):
+            lines.append(
+                f'agentsville_span_duration_seconds_count{{span="{name}"}} {int(values["count"])}'
+            )
+            lines.append(
+                f'agentsville_span_duration_seconds_sum{{span="{name}"}} {values["total_s"]:.6f}'
+            )
+        lines += [
+            "# HELP agentsville_span_errors_total Spans that ended with an exception.",
+            "# TYPE agentsville_span_errors_total counter",
+        ]
+        for name, values in sorted(stats.items()):
+            lines.append(
+                f'agentsville_span_errors_total{{span="{name}"}} {int(values["errors"])}'
+            )
+        for key in AGGREGATED_ATTRIBUTES:
+            metric = "agentsville_" + key.replace(".", "_") + "_total"
+            lines += [f"# TYPE {metric} counter"]
+            for name, values in sorted(stats.items()):
+                if key in values:
+                    lines.append(f'{metric}{{span="{name}"}} {values[key]:g}')
+        return "\n".join(lines) + "\n"
+
+
+tracer = Tracer(enabled=os.getenv("AGENTSVILLE_TRACING", "1") != "0")
+span = tracer.span
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator that runs the whole function inside a span called `name`.
+    """
+
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def propagate(func: Callable) -> Callable:
+    """
+    Wraps func to run in a copy of the caller's context, so spans opened on
+    worker threads (thread pools, run_in_executor) keep their parent span.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
+
+
+def record_usage(current_span: Any, response: Any) -> None:
+    """
+    Copies token usage and cache status from a Responses API response onto a span.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        current_span.set("tokens.input", getattr(usage, "input_tokens", None) or 0)
+        current_span.set("tokens.output", getattr(usage, "output_tokens", None) or 0)
+        details = getattr(usage, "input_tokens_details", None)
+        current_span.set("tokens.cached", getattr(details, "cached_tokens", None) or 0)
+    current_span.set("cache_hit", bool(getattr(response, "cached", False)))
@@ -0,0 +1,370 @@
+# agentsville/transport.py
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+import openai
+
+from agentsville.history import estimate_tokens
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors.
+RETRY_STATUSES = {408, 409, 429}
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised without contacting the endpoint while the circuit breaker is open.
+    """
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    return isinstance(exc, (openai.APIConnectionError, TimeoutError, ConnectionError))
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """
+    Seconds the server asked us to wait (Retry-After header), if any.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `rate` tokens per second, bursts up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(capacity or rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, amount: float) -> float:
+        """
+        Takes `amount` tokens if available and returns 0, otherwise returns the
+        seconds until they will be.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        return self._take(min(amount, self.capacity)) == 0.0
+
+    def acquire(self, amount: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until `amount` tokens are taken; False if that would exceed timeout.
+        """
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_s = self._take(amount)
+            if wait_s == 0.0:
+                return True
+            if deadline is not None and time.monotonic() + wait_s > deadline:
+                return False
+            time.sleep(wait_s)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transport failures and rejects
+    calls for `reset_after_s`; then lets a single probe through (half-open) and
+    closes again on its success. A probe that never reaches the endpoint is
+    handed back with release_probe(), so the next call probes instead.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if (
+                self.state == "open"
+                and time.monotonic() - self._opened_at >= self.reset_after_s
+            ):
+                self.state = "half-open"
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def release_probe(self) -> None:
+        with self._lock:
+            if self.state == "half-open":
+                self.state = "open"
+                self._opened_at = time.monotonic() - self.reset_after_s
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(
+                max_workers=32, thread_name_prefix="agentsville-hedge"
+            )
+        return _hedge_pool
+
+
+def _acquire(in_flight: Optional[threading.Semaphore], blocking: bool = True) -> bool:
+    return in_flight is None or in_flight.acquire(blocking)
+
+
+def _release(in_flight: Optional[threading.Semaphore]) -> None:
+    if in_flight is not None:
+        in_flight.release()
+
+
+class Transport:
+    """
+    Resilience policy shared by every LLM call site (see llm.create_response).
+
+    - retries: up to max_retries on 429/5xx/connection errors, with full-jitter
+      exponential backoff (backoff_base_s * 2**attempt, capped at backoff_max_s)
+      that honours Retry-After
+    - deadline: deadline_s bounds the whole call, retries included; each
+      attempt's timeout is cut to the time left
+    - hedging: with hedge_percentile > 0, an attempt still running after that
+      percentile of recent latencies gets a duplicate request; the first
+      reply wins
+    - rate limits: requests_per_minute / tokens_per_minute token buckets
+      (0 disables), tokens estimated from the request input
+    - circuit breaker: fails fast with CircuitOpenError while the endpoint is down
+    - in-flight limit: each request sent holds one slot of the caller's
+      semaphore while it runs (not during backoff); a hedge is skipped when no
+      slot is free
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+        deadline_s: Optional[float] = 120.0,
+        hedge_percentile: float = 0.0,
+        hedge_min_samples: int = 20,
+        requests_per_minute: float = 0.0,
+        tokens_per_minute: float = 0.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.deadline_s = deadline_s
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.request_bucket = (
+            TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute / 6.0)
+            if tokens_per_minute
+            else None
+        )
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies: deque = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "breaker_rejections": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "Transport":
+        return cls(
+            max_retries=int(os.getenv("AGENTSVILLE_LLM_MAX_RETRIES", "3")),
+            deadline_s=float(os.getenv("AGENTSVILLE_LLM_DEADLINE_S", "120")) or None,
+            hedge_percentile=float(os.getenv("AGENTSVILLE_LLM_HEDGE_PERCENTILE", "0")),
+            requests_per_minute=float(os.getenv("AGENTSVILLE_LLM_RPM", "0")),
+            tokens_per_minute=float(os.getenv("AGENTSVILLE_LLM_TPM", "0")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(
+                    os.getenv("AGENTSVILLE_LLM_BREAKER_FAILURES", "5")
+                ),
+                reset_after_s=float(os.getenv("AGENTSVILLE_LLM_BREAKER_RESET_S", "30")),
+            ),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, breaker_state=self.breaker.state)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile <= 0:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    def _throttle(self, kwargs: Dict[str, Any], deadline: Optional[float]) -> None:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if self.request_bucket and not self.request_bucket.acquire(1, timeout):
+            raise TimeoutError("LLM call deadline passed while rate limited")
+        if self.token_bucket:
+            tokens = estimate_tokens(str(kwargs.get("input", "")))
+            if not self.token_bucket.acquire(tokens, timeout):
+                raise TimeoutError("LLM call deadline passed while rate limited")
+
+    def _send(self, send: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        started = time.monotonic()
+        response = send(**kwargs)
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+        return response
+
+    def _attempt(
+        self,
+        send: Callable[..., Any],
+        kwargs: Dict[str, Any],
+        hedge: bool,
+        in_flight: Optional[threading.Semaphore],
+    ) -> Any:
+        delay = self._hedge_delay() if hedge else None
+        _acquire(in_flight)
+        if delay is None:
+            try:
+                return self._send(send, kwargs)
+            finally:
+                _release(in_flight)
+
+        # Each request gives its slot back when it ends, even if it lost the race
+        pool = _get_hedge_pool()
+        primary = pool.submit(self._send, send, kwargs)
+        primary.add_done_callback(lambda _: _release(in_flight))
+        done, _ = wait([primary], timeout=delay)
+        if done or not _acquire(in_flight, blocking=False):
+            return primary.result()
+        if not (self.request_bucket is None or self.request_bucket.try_acquire()):
+            _release(in_flight)
+            return primary.result()
+
+        self._count("hedges")
+        backup = pool.submit(self._send, send, kwargs)
+        backup.add_done_callback(lambda _: _release(in_flight))
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(
+        self,
+        send: Callable[..., Any],
+        kwargs: Dict[str, Any],
+        deadline_s: Optional[float] = None,
+        hedge: bool = True,
+        span: Any = None,
+        in_flight: Optional[threading.Semaphore] = None,
+    ) -> Any:
+        """
+        send(**kwargs) under the policy above. `span` (a tracing span) receives
+        the retry and hedge counts. `in_flight` is the global request limit
+        (see llm.create_response).
+        """
+        self._count("calls")
+        deadline_s = deadline_s if deadline_s is not None else self.deadline_s
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        retries = 0
+        try:
+            while True:
+                if not self.breaker.allow():
+                    self._count("breaker_rejections")
+                    raise CircuitOpenError("LLM endpoint circuit breaker is open")
+                try:
+                    self._throttle(kwargs, deadline)
+                except TimeoutError:
+                    self.breaker.release_probe()
+                    raise
+
+                attempt_kwargs = dict(kwargs)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    attempt_kwargs["timeout"] = min(
+                        kwargs.get("timeout") or remaining, remaining
+                    )
+                try:
+                    response = self._attempt(send, attempt_kwargs, hedge, in_flight)
+                except Exception as exc:
+                    if not is_retryable(exc):
+                        if isinstance(exc, openai.APIStatusError):
+                            # The endpoint answered: it is up, the request was bad
+                            self.breaker.record_success()
+                        else:
+                            # A local error (replay miss, bad kwargs): no verdict
+                            self.breaker.release_probe()
+                        raise
+                    self.breaker.record_failure()
+                    backoff = random.uniform(
+                        0, min(self.backoff_max_s, self.backoff_base_s * 2**retries)
+                    )
+                    backoff = max(backoff, _retry_after(exc) or 0.0)
+                    if retries >= self.max_retries or (
+                        deadline is not None and time.monotonic() + backoff >= deadline
+                    ):
+                        raise
+                    retries += 1
+                    self._count("retries")
+                    time.sleep(backoff)
+                    continue
+
+                self.breaker.record_success()
+                return response
+        finally:
+            if span is not None:
+                span.set("retries", retries)
@@ -1,12 +1,77 @@
 # agentsville/utils.py
-from datetime import date, datetime
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, List
+
+_SCALARS = (str, int, float, bool, type(None))
 
 
 def make_json_safe(obj):
-    if isinstance(obj, (date, datetime)):
-        return obj.isoformat()
+    """
+    JSON-safe form of obj in a single pass: dates become ISO strings, tuples
+    become lists and Pydantic models are dumped in JSON mode.
+
+    Containers are only copied on the path to a converted value; anything that
+    is already JSON-safe is returned as is (not copied), so callers that
+    modify the result must copy what they change.
+    """
+    if isinstance(obj, _SCALARS):
+        return obj
     if isinstance(obj, dict):
-        return {k: make_json_safe(v) for k, v in obj.items()}
+        copied = None
+        for key, value in obj.items():
+            safe = value if isinstance(value, _SCALARS) else make_json_safe(value)
+            if safe is not value:
+                if copied is None:
+                    copied = dict(obj)
+                copied[key] = safe
+        return obj if copied is None else copied
     if isinstance(obj, list):
+        copied = None
+        for index, value in enumerate(obj):
+            safe = value if isinstance(value, _SCALARS) else make_json_safe(value)
+            if safe is not value:
+                if copied is None:
+                    copied = list(obj)
+                copied[index] = safe
+        return obj if copied is None else copied
+    if isinstance(obj, tuple):
         return [make_json_safe(v) for v in obj]
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
     return obj
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_json(obj: Any, **kwargs) -> str:
+    """
+    json.dumps that encodes dates and Pydantic models while serializing,
+    without a make_json_safe copy first.
+    """
+    return json.dumps(obj, default=_json_default, **kwargs)
+
+
+def date_range(start: date, end: date) -> List[str]:
+    """
+    ISO dates from start to end, inclusive.
+    """
+    return [
+        (start + timedelta(days=offset)).isoformat()
+        for offset in range((end - start).days + 1)
+    ]
+
+
+def trip_dates(vacation_info) -> List[str]:
+    """
+    ISO dates from vacation_info.start_date to end_date, inclusive.
+    """
+    return date_range(vacation_info.start_date, vacation_info.end_date)
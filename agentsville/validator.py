@@ -0,0 +1,143 @@
+# agentsville/validator.py
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from agentsville import prompt_cache
+from agentsville.models import VacationInfo
+from agentsville.tools import IncrementalEvaluator, evaluate_plan
+from agentsville.utils import date_range, make_json_safe, trip_dates
+
+
+def validate_plan(
+    plan: Dict[str, Any],
+    weather_data: Dict[str, str],
+    activities_db: Dict[str, Any],
+    vacation_info: Optional[VacationInfo] = None,
+    evaluator: Optional[IncrementalEvaluator] = None,
+) -> Dict[str, Any]:
+    """
+    Pre-flight validator for a TravelPlan-like dict.
+
+    Recomputes each day's estimated_cost_usd and the total_cost_usd from the
+    activity costs (the corrected plan is returned), then checks:
+    - the run_evals_tool constraints (>= 2 activities/day, weather compatibility)
+    - every activity id exists in activities_db for that date
+    - the days cover start_date..end_date exactly, once each
+    - the total stays within vacation_info.budget_usd
+    Dates and budget come from vacation_info when given, else from the plan.
+    Passing the session's IncrementalEvaluator primes it for later evals.
+
+    Returns {"passed": bool, "issues": [...], "corrections": [...], "plan": dict}.
+    """
+    # make_json_safe does not copy JSON-safe input; copy what is corrected below
+    plan = dict(make_json_safe(plan))
+    if isinstance(plan.get("days"), list):
+        plan["days"] = [dict(day) for day in plan["days"]]
+    issues: List[Dict[str, Any]] = []
+    corrections: List[str] = []
+
+    total = 0.0
+    for day in plan.get("days", []):
+        day_date = str(day.get("date"))
+        activities = day.get("activities", [])
+        day_cost = round(sum(float(a.get("cost_usd", 0.0)) for a in activities), 2)
+        if day.get("estimated_cost_usd") != day_cost:
+            corrections.append(
+                f"{day_date}: estimated_cost_usd {day.get('estimated_cost_usd')} -> {day_cost}"
+            )
+            day["estimated_cost_usd"] = day_cost
+        total += day_cost
+
+        known_ids = {a.get("id") for a in activities_db.get(day_date, []) or []}
+        for act in activities:
+            if act.get("id") not in known_ids:
+                issues.append(
+                    {
+                        "date": day_date,
+                        "activity": act.get("name"),
+                        "issue": f"activity id {act.get('id')} is not available on {day_date}",
+                    }
+                )
+
+    total = round(total, 2)
+    if plan.get("total_cost_usd") != total:
+        corrections.append(f"total_cost_usd {plan.get('total_cost_usd')} -> {total}")
+        plan["total_cost_usd"] = total
+
+    if vacation_info is not None:
+        expected_dates = trip_dates(vacation_info)
+        if total > vacation_info.budget_usd:
+            issues.append(
+                {
+                    "issue": f"total cost {total} exceeds budget {vacation_info.budget_usd}"
+                }
+            )
+    else:
+        expected_dates = date_range(
+            date.fromisoformat(plan["start_date"]), date.fromisoformat(plan["end_date"])
+        )
+
+    planned_dates = [str(day.get("date")) for day in plan.get("days", [])]
+    for day_date in expected_dates:
+        if day_date not in planned_dates:
+            issues.append({"date": day_date, "issue": "date missing from itinerary"})
+    for day_date in sorted(set(planned_dates)):
+        if day_date not in expected_dates:
+            issues.append({"date": day_date, "issue": "date outside the trip"})
+        elif planned_dates.count(day_date) > 1:
+            issues.append({"date": day_date, "issue": "date planned more than once"})
+
+    weather_data = make_json_safe(weather_data)
+    if evaluator is not None:
+        evals = evaluator.evaluate(plan, weather_data)
+    else:
+        evals = evaluate_plan(plan, weather_data)
+    issues = evals["issues"] + issues
+
+    return {
+        "passed": not issues,
+        "issues": issues,
+        "corrections": corrections,
+        "plan": plan,
+    }
+
+
+def rank_plans(
+    plans: List[Any],
+    weather_data: Dict[str, str],
+    activities_db: Dict[str, Any],
+    vacation_info: VacationInfo,
+    max_hours_per_day: Optional[float] = None,
+):
+    """
+    Bulk pre-flight check: scores many candidate plans at once with
+    analytics.CatalogArrays and returns a pandas DataFrame, best first, indexed
+    by each plan's position in `plans`.
+
+    Columns are analytics.SCORE_COLUMNS plus date_issues (trip dates missing,
+    repeated or outside the trip); a "feasible" plan also has no date issues.
+    Ranking: feasible, fewest unverified weather pairs (each needs an LLM
+    check), best interest coverage, then cheapest. Unlike validate_plan this
+    makes no LLM calls, so unverified pairs are not decided here.
+    """
+    from agentsville.analytics import CatalogArrays
+
+    expected = trip_dates(vacation_info)
+    catalog = CatalogArrays(
+        prompt_cache.catalog_for(
+            activities_db, expected, destination=vacation_info.destination
+        ),
+        make_json_safe(weather_data),
+        vacation_info.interests,
+    )
+    frame = catalog.score(
+        plans,
+        vacation_info.budget_usd,
+        max_hours_per_day=max_hours_per_day,
+        trip_dates=expected,
+    )
+    return frame.sort_values(
+        ["feasible", "unverified", "interest_coverage", "total_cost_usd"],
+        ascending=[False, True, False, True],
+        kind="stable",
+    )
@@ -1,35 +1,407 @@
+import hashlib
 import json
-from agentsville.llm import client
-from agentsville.prompts import ACTIVITY_AND_WEATHER_ARE_COMPATIBLE_SYSTEM_PROMPT
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
+from agentsville.cache import VerdictCache, get_verdict_cache, verdict_key
+from agentsville.llm import create_response
+from agentsville.routing import model_for
+from agentsville.schemas import (
+    BATCH_VERDICTS_SCHEMA,
+    parse_json_output,
+    structured_output,
+)
+from agentsville.tracing import propagate, span
+from agentsville.prompts import (
+    ACTIVITY_AND_WEATHER_ARE_COMPATIBLE_SYSTEM_PROMPT,
+    BATCH_WEATHER_COMPATIBILITY_SYSTEM_PROMPT,
+)
 
-def check_weather_compatibility(activity: dict, weather: str) -> str:
+# Concurrency and per-call deadline for evaluating many (activity, weather) pairs.
+EVAL_MAX_CONCURRENCY = int(os.getenv("AGENTSVILLE_EVAL_CONCURRENCY", "8"))
+WEATHER_CHECK_TIMEOUT_S = float(os.getenv("AGENTSVILLE_WEATHER_TIMEOUT_S", "30"))
+
+# Batched checks: "batch" sends many pairs per request, "concurrent" one request per pair.
+EVAL_MODE = os.getenv("AGENTSVILLE_EVAL_MODE", "batch")
+BATCH_MAX_INPUT_TOKENS = int(os.getenv("AGENTSVILLE_BATCH_MAX_INPUT_TOKENS", "6000"))
+BATCH_MAX_PAIRS = int(os.getenv("AGENTSVILLE_BATCH_MAX_PAIRS", "40"))
+
+# Verdict reported when a check could not complete (timeout, transport error).
+CHECK_FAILED = "CHECK_FAILED"
+
+# Tiers that can answer a check, cheapest first.
+VERDICT_TIERS = ("rules", "cache", "llm", "failed")
+
+# Weather that rules out anything tagged "outdoor" (mirrors the system prompt criteria).
+SEVERE_WEATHER = {"heavy-rain", "snow"}
+
+# Changes to the system prompts invalidate previously cached verdicts.
+WEATHER_PROMPT_VERSION = hashlib.sha256(
+    ACTIVITY_AND_WEATHER_ARE_COMPATIBLE_SYSTEM_PROMPT.encode("utf-8")
+).hexdigest()[:12]
+BATCH_WEATHER_PROMPT_VERSION = hashlib.sha256(
+    BATCH_WEATHER_COMPATIBILITY_SYSTEM_PROMPT.encode("utf-8")
+).hexdigest()[:12]
+
+
+def rule_based_verdict(activity: dict, weather: str) -> Optional[str]:
     """
-    Uses an LLM to determine whether an activity is compatible with the given weather.
-    Returns exactly: "IS_COMPATIBLE" or "IS_INCOMPATIBLE".
+    Decides the clear-cut cases locally, following the same criteria the LLM is given:
+    - weather listed in activity["weather_suitable"] -> IS_COMPATIBLE
+    - activity tagged "indoor" -> IS_COMPATIBLE
+    - activity tagged "outdoor" in heavy rain or snow -> IS_INCOMPATIBLE
+    Returns None for ambiguous cases (e.g. light rain at an outdoor market).
+    """
+    if weather in activity.get("weather_suitable", []):
+        return "IS_COMPATIBLE"
+
+    suitability = activity.get("suitability", [])
+    if "indoor" in suitability:
+        return "IS_COMPATIBLE"
+    if "outdoor" in suitability and weather in SEVERE_WEATHER:
+        return "IS_INCOMPATIBLE"
+
+    return None
+
+
+def resolve_weather_compatibility(
+    activity: dict,
+    weather: str,
+    model: Optional[str] = None,
+    cache: Optional[VerdictCache] = None,
+    timeout: Optional[float] = None,
+    use_rules: bool = True,
+) -> Tuple[str, str]:
     """
+    Tiered weather check: rules, then the verdict cache, then the LLM.
+    Returns (verdict, tier) where tier is one of VERDICT_TIERS.
+    model defaults to the "weather" route's small tier; an unparseable reply is
+    asked once more one tier up unless the model was pinned.
+    """
+    with span(
+        "check_weather_compatibility",
+        activity=str(activity.get("id", "")),
+        weather=weather,
+    ) as current:
+        verdict, tier = _resolve(activity, weather, model, cache, timeout, use_rules)
+        current.set("tier", tier)
+        current.set("cache_hit", tier == "cache")
+        return verdict, tier
+
+
+def _resolve(
+    activity: dict,
+    weather: str,
+    model: Optional[str],
+    cache: Optional[VerdictCache],
+    timeout: Optional[float],
+    use_rules: bool,
+) -> Tuple[str, str]:
+    if use_rules:
+        verdict = rule_based_verdict(activity, weather)
+        if verdict is not None:
+            return verdict, "rules"
+
+    if cache is None:
+        cache = get_verdict_cache()
+
+    escalations = [model] if model else [model_for("weather"), model_for("weather", 1)]
+    key = verdict_key(activity, weather, escalations[0], WEATHER_PROMPT_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, "cache"
 
     user_input = f"""
             Activity: {json.dumps(activity)}
             Weather: "{weather}"
         """
 
-    response = client.responses.create(
-        model="gpt-4.1-mini",
-        input=[
-            {
-                "role": "system",
-                "content": ACTIVITY_AND_WEATHER_ARE_COMPATIBLE_SYSTEM_PROMPT,
-            },
-            {"role": "user", "content": user_input},
-        ],
+    request_options = {} if timeout is None else {"timeout": timeout}
+    for attempt_model in dict.fromkeys(escalations):
+        response = create_response(
+            site="weather",
+            model=attempt_model,
+            input=[
+                {
+                    "role": "system",
+                    "content": ACTIVITY_AND_WEATHER_ARE_COMPATIBLE_SYSTEM_PROMPT,
+                },
+                {"role": "user", "content": user_input},
+            ],
+            **request_options,
+        )
+
+        text = response.output_text.strip()
+        if text.startswith("IS_COMPATIBLE"):
+            verdict = "IS_COMPATIBLE"
+            break
+        if text.startswith("IS_INCOMPATIBLE"):
+            verdict = "IS_INCOMPATIBLE"
+            break
+    else:
+        # Unparseable answers fall back to the safe verdict but are not cached.
+        return "IS_INCOMPATIBLE", "llm"
+
+    cache.set(key, verdict)
+    return verdict, "llm"
+
+
+def check_weather_compatibility(
+    activity: dict,
+    weather: str,
+    model: Optional[str] = None,
+    cache: Optional[VerdictCache] = None,
+    timeout: Optional[float] = None,
+    use_rules: bool = True,
+) -> str:
+    """
+    Determines whether an activity is compatible with the given weather.
+    Returns exactly: "IS_COMPATIBLE" or "IS_INCOMPATIBLE".
+
+    Clear-cut cases are decided by rule_based_verdict; the rest go to the LLM.
+    Verdicts are memoized in `cache` (defaults to the process-wide verdict cache).
+    `timeout` bounds the LLM request in seconds.
+    """
+    verdict, _ = resolve_weather_compatibility(
+        activity,
+        weather,
+        model=model,
+        cache=cache,
+        timeout=timeout,
+        use_rules=use_rules,
     )
+    return verdict
 
-    text = response.output_text.strip()
 
-    if text.startswith("IS_COMPATIBLE"):
-        return "IS_COMPATIBLE"
-    if text.startswith("IS_INCOMPATIBLE"):
-        return "IS_INCOMPATIBLE"
+def check_weather_compatibility_many(
+    pairs: List[Tuple[dict, str]],
+    max_concurrency: int = EVAL_MAX_CONCURRENCY,
+    timeout: Optional[float] = WEATHER_CHECK_TIMEOUT_S,
+) -> List[Tuple[str, str]]:
+    """
+    Checks many (activity, weather) pairs, running up to `max_concurrency`
+    LLM calls at once. Returns one (verdict, tier) per pair, in input order.
+    A pair whose call fails or exceeds `timeout` gets (CHECK_FAILED, "failed").
+    Pairs answered by rules never reach the thread pool, so the enclosing span
+    carries the per-tier counts (tier.rules, tier.cache, ...).
+    """
+    with span("check_weather_compatibility_many", pairs=len(pairs)) as current:
+        results = _resolve_many(pairs, max_concurrency, timeout)
+        _set_tier_counts(current, results)
+        return results
+
+
+def _resolve_many(
+    pairs: List[Tuple[dict, str]],
+    max_concurrency: int,
+    timeout: Optional[float],
+) -> List[Tuple[str, str]]:
+    results: List[Optional[Tuple[str, str]]] = []
+    pending = []
+    for index, (activity, weather) in enumerate(pairs):
+        verdict = rule_based_verdict(activity, weather)
+        results.append(None if verdict is None else (verdict, "rules"))
+        if verdict is None:
+            pending.append(index)
+
+    def check(index: int) -> Tuple[str, str]:
+        activity, weather = pairs[index]
+        try:
+            return resolve_weather_compatibility(
+                activity, weather, timeout=timeout, use_rules=False
+            )
+        except Exception:
+            return CHECK_FAILED, "failed"
 
-    return "IS_INCOMPATIBLE"
+    if max_concurrency <= 1 or len(pending) <= 1:
+        checked = [check(index) for index in pending]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(pending))) as pool:
+            checked = list(pool.map(propagate(check), pending))
+
+    for index, result in zip(pending, checked):
+        results[index] = result
+    return results
+
+
+def _chunk_batch_items(items: List[dict]) -> List[List[dict]]:
+    """
+    Splits batch items into chunks that stay under BATCH_MAX_INPUT_TOKENS
+    (estimated at ~4 characters per token) and BATCH_MAX_PAIRS.
+    """
+    chunks: List[List[dict]] = []
+    current: List[dict] = []
+    current_tokens = 0
+    for item in items:
+        tokens = len(json.dumps(item)) // 4 + 1
+        if current and (
+            current_tokens + tokens > BATCH_MAX_INPUT_TOKENS
+            or len(current) >= BATCH_MAX_PAIRS
+        ):
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _parse_batch_verdicts(text: str, pair_ids: List[str]) -> Dict[str, str]:
+    """
+    Parses {"verdicts": [{"pair_id", "verdict"}]} and keeps only pair_ids that
+    were asked for and answered exactly once with a valid verdict.
+    """
+    payload = parse_json_output(text)
+    if payload is None:
+        return {}
+
+    entries = payload.get("verdicts", []) if isinstance(payload, dict) else payload
+    if not isinstance(entries, list):
+        return {}
+
+    answers: Dict[str, List[str]] = {}
+    for entry in entries:
+        if isinstance(entry, dict):
+            answers.setdefault(str(entry.get("pair_id")), []).append(
+                entry.get("verdict")
+            )
+
+    return {
+        pair_id: answers[pair_id][0]
+        for pair_id in pair_ids
+        if len(answers.get(pair_id, [])) == 1
+        and answers[pair_id][0] in ("IS_COMPATIBLE", "IS_INCOMPATIBLE")
+    }
+
+
+def _check_batch_chunk(
+    chunk: List[dict], model: str, timeout: Optional[float]
+) -> Dict[str, str]:
+    request_options = {} if timeout is None else {"timeout": timeout}
+    try:
+        response = create_response(
+            site="weather_batch",
+            model=model,
+            input=[
+                {
+                    "role": "system",
+                    "content": BATCH_WEATHER_COMPATIBILITY_SYSTEM_PROMPT,
+                },
+                {"role": "user", "content": json.dumps(chunk)},
+            ],
+            **structured_output("WeatherVerdicts", BATCH_VERDICTS_SCHEMA),
+            **request_options,
+        )
+    except Exception:
+        return {}
+    return _parse_batch_verdicts(
+        response.output_text, [item["pair_id"] for item in chunk]
+    )
+
+
+def check_weather_compatibility_batch(
+    pairs: List[Tuple[dict, str]],
+    max_concurrency: int = EVAL_MAX_CONCURRENCY,
+    timeout: Optional[float] = WEATHER_CHECK_TIMEOUT_S,
+    model: Optional[str] = None,
+    cache: Optional[VerdictCache] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Checks many (activity, weather) pairs with one LLM request per chunk instead
+    of one per pair. Returns one (verdict, tier) per pair, in input order.
+
+    Rules and the verdict cache are consulted first. The remaining pairs are sent
+    as {"pair_id", "activity", "weather"} items, chunked to fit the context window.
+    Pairs the model drops, duplicates or answers invalidly are retried on the
+    single-pair path. model defaults to the "weather_batch" route.
+    """
+    with span("check_weather_compatibility_batch", pairs=len(pairs)) as current:
+        results = _resolve_batch(pairs, max_concurrency, timeout, model, cache)
+        current.set("cache_hit", sum(1 for _, tier in results if tier == "cache"))
+        _set_tier_counts(current, results)
+        return results
+
+
+def _resolve_batch(
+    pairs: List[Tuple[dict, str]],
+    max_concurrency: int,
+    timeout: Optional[float],
+    model: Optional[str],
+    cache: Optional[VerdictCache],
+) -> List[Tuple[str, str]]:
+    if cache is None:
+        cache = get_verdict_cache()
+    model = model or model_for("weather_batch")
+
+    results: List[Optional[Tuple[str, str]]] = [None] * len(pairs)
+    items = []
+    for index, (activity, weather) in enumerate(pairs):
+        verdict = rule_based_verdict(activity, weather)
+        if verdict is not None:
+            results[index] = (verdict, "rules")
+            continue
+        cached = cache.get(
+            verdict_key(activity, weather, model, BATCH_WEATHER_PROMPT_VERSION)
+        )
+        if cached is not None:
+            results[index] = (cached, "cache")
+            continue
+        items.append({"pair_id": f"p{index}", "activity": activity, "weather": weather})
+
+    # A single pending pair gains nothing from batching.
+    if len(items) > 1:
+        chunks = _chunk_batch_items(items)
+        if max_concurrency <= 1 or len(chunks) == 1:
+            answered = [_check_batch_chunk(chunk, model, timeout) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(max_concurrency, len(chunks))
+            ) as pool:
+                answered = list(
+                    pool.map(
+                        propagate(
+                            lambda chunk: _check_batch_chunk(chunk, model, timeout)
+                        ),
+                        chunks,
+                    )
+                )
+
+        for verdicts in answered:
+            for pair_id, verdict in verdicts.items():
+                index = int(pair_id[1:])
+                activity, weather = pairs[index]
+                cache.set(
+                    verdict_key(activity, weather, model, BATCH_WEATHER_PROMPT_VERSION),
+                    verdict,
+                )
+                results[index] = (verdict, "llm")
+
+    missing = [index for index, result in enumerate(results) if result is None]
+    retried = check_weather_compatibility_many(
+        [pairs[index] for index in missing],
+        max_concurrency=max_concurrency,
+        timeout=timeout,
+    )
+    for index, result in zip(missing, retried):
+        results[index] = result
+    return results
+
+
+def count_tiers(results: List[Tuple[str, str]]) -> Dict[str, int]:
+    """
+    Tallies how many checks each tier answered, e.g. {"rules": 9, "cache": 2, "llm": 1, "failed": 0}.
+    """
+    counts = {tier: 0 for tier in VERDICT_TIERS}
+    for _, tier in results:
+        counts[tier] += 1
+    return counts
+
+
+def _set_tier_counts(current, results: List[Tuple[str, str]]) -> None:
+    """
+    Records count_tiers(results) on a span as tier.<name> attributes.
+    """
+    for tier, count in count_tiers(results).items():
+        current.set(f"tier.{tier}", count)
@@ -4,18 +4,21 @@ from agentsville.data_loader import load_activities, load_weather
 from agentsville.react_agent import revise_itinerary_with_react_agent
 
 
-def main():
-    activities_data = load_activities()
-    weather_data = load_weather()
-
-    vacation = VacationInfo(
-        destination="AgentsVille",
-        start_date="2025-07-15",
-        end_date="2025-07-18",
-        interests=["food", "nature"],
-        budget_usd=1000,
-        travelers=[Traveler(name="Alice", age=30), Traveler(name="Bob", age=32)],
-    )
+def main(vacation=None, activities_data=None, weather_data=None):
+    if activities_data is None:
+        activities_data = load_activities()
+    if weather_data is None:
+        weather_data = load_weather()
+
+    if vacation is None:
+        vacation = VacationInfo(
+            destination="AgentsVille",
+            start_date="2025-07-15",
+            end_date="2025-07-18",
+            interests=["food", "nature"],
+            budget_usd=1000,
+            travelers=[Traveler(name="Alice", age=30), Traveler(name="Bob", age=32)],
+        )
 
     # initial itinerary
     initial_plan = generate_itinerary(
@@ -33,12 +36,14 @@ def main():
         weather_data=weather_data,
         activities_db=activities_data,
         max_iterations=8,
+        vacation_info=vacation,
     )
 
     print("Final plan summary:")
     print("Total cost:", final_plan.total_cost_usd)
     for d in final_plan.days:
         print(d.date, "-", d.summary)
+    return final_plan
 
 
 if __name__ == "__main__":
@@ -0,0 +1,606 @@
+# benchmarks/run.py
+"""
+Offline benchmark suite. Runs generate_itinerary (plain, streaming and
+per-day parallel), run_evals_tool and the full app.main flow against
+SimulatedLLM on synthetic catalogs of growing size, compares prompt layouts by
+cached prefix tokens, runs many ReAct sessions on a shared ReActSessionPool,
+adds LLM call tail latency with and without hedging, compares speculative
+multi-candidate generation against single requests, and prints
+machine-readable JSON.
+
+    python -m benchmarks.run --latency 0.05 --output bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+# Offline: no API key needed (the client is built at import time).
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+import agentsville.llm as llm  # noqa: E402
+import app  # noqa: E402
+from agentsville import prompt_cache  # noqa: E402
+from agentsville.cache import (  # noqa: E402
+    VerdictCache,
+    get_verdict_cache,
+    set_verdict_cache,
+)
+from agentsville.react_agent import revise_itinerary_with_react_agent  # noqa: E402
+from agentsville.sessions import ReActSessionPool  # noqa: E402
+from agentsville.planner import (  # noqa: E402
+    generate_itinerary,
+    generate_itinerary_parallel,
+    stream_itinerary,
+)
+from agentsville.solver import solve_itinerary  # noqa: E402
+from agentsville.speculation import speculation_stats  # noqa: E402
+from agentsville.transport import Transport  # noqa: E402
+from agentsville.tools import calculator_tool, run_evals_tool  # noqa: E402
+from agentsville.validator import rank_plans  # noqa: E402
+from agentsville.weather import rule_based_verdict  # noqa: E402
+from benchmarks.simulated_llm import SimulatedLLM  # noqa: E402
+from benchmarks.synthetic import make_catalog, make_vacation  # noqa: E402
+
+DEFAULT_SIZES = [(3, 6), (7, 12), (14, 24)]
+DEFAULT_USERS = [1, 8]
+
+# Requests per prompt layout in the prefix-cache comparison.
+PREFIX_CACHE_PLANS = 4
+# Candidate itineraries per bulk scoring run.
+BULK_SCORING_CANDIDATES = 2000
+# Plans per speculative generation run, and the share of defective drafts.
+SPECULATION_PLANS = 8
+SPECULATION_DEFECT_RATE = 0.5
+
+
+def _measure(fake: SimulatedLLM, func: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Times one cold run (empty verdict cache), then repeats it under tracemalloc
+    for peak memory, since tracing would distort the timing.
+    """
+    fake.reset()
+    get_verdict_cache().clear()
+    started = time.perf_counter()
+    func()
+    latency = time.perf_counter() - started
+    stats = fake.stats()
+
+    get_verdict_cache().clear()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "latency_s": round(latency, 4),
+        "peak_memory_kb": round(peak / 1024, 1),
+        **stats,
+    }
+
+
+def _measure_stream(fake: SimulatedLLM, start: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    _measure for a streaming generator, adding the time until its first item.
+    """
+    first = []
+
+    def consume():
+        started = time.perf_counter()
+        for _ in start():
+            if not first:
+                first.append(time.perf_counter() - started)
+
+    row = _measure(fake, consume)
+    row["time_to_first_day_s"] = round(first[0], 4) if first else None
+    return row
+
+
+def _prefix_cache(
+    activities: Dict[str, List[dict]],
+    weather: Dict[str, str],
+    days: int,
+    prefix_catalog: bool,
+    **llm_options,
+) -> Dict[str, Any]:
+    """
+    PREFIX_CACHE_PLANS sequential planner requests for different travelers to
+    the same destination, with the catalog in the shared prefix or in the
+    per-request prompt. Reports the cached share of prompt tokens and the mean
+    latency of the requests after the first (cold) one.
+    """
+    fake = SimulatedLLM(activities, weather, **llm_options)
+    previous_client, previous_layout = llm.client, prompt_cache.PREFIX_CATALOG
+    llm.client, prompt_cache.PREFIX_CATALOG = fake, prefix_catalog
+    latencies = []
+    try:
+        for index in range(PREFIX_CACHE_PLANS):
+            vacation = make_vacation(days).model_copy(
+                update={
+                    "interests": [["food", "nature"], ["culture"], ["active"]][
+                        index % 3
+                    ],
+                    "budget_usd": 100.0 * days + 25 * index,
+                }
+            )
+            started = time.perf_counter()
+            generate_itinerary(vacation, activities, weather)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        llm.client, prompt_cache.PREFIX_CATALOG = previous_client, previous_layout
+
+    stats = fake.stats()
+    return {
+        "benchmark": "prompt_prefix_cache",
+        "prefix_catalog": prefix_catalog,
+        "plans": PREFIX_CACHE_PLANS,
+        "warm_latency_s": round(sum(latencies[1:]) / (len(latencies) - 1), 4),
+        "prompt_tokens": stats["prompt_tokens"],
+        "cached_tokens": stats["cached_tokens"],
+        "cached_share": round(stats["cached_tokens"] / stats["prompt_tokens"], 3),
+    }
+
+
+def _session_pool(
+    fake: SimulatedLLM,
+    activities: Dict[str, List[dict]],
+    weather: Dict[str, str],
+    vacation: Any,
+    sessions: int,
+) -> Dict[str, Any]:
+    """
+    `sessions` concurrent ReAct revisions of the same defective draft on one
+    ReActSessionPool, with per-plan LLM calls and the pool's reuse statistics.
+    """
+    draft = generate_itinerary(vacation, activities, weather).model_dump_json()
+    pool_stats = {}
+
+    def revise_all():
+        with ReActSessionPool(activities, weather, max_workers=sessions) as pool:
+            pool.revise_many(
+                [json.loads(draft) for _ in range(sessions)], [vacation] * sessions
+            )
+        pool_stats.update(pool.stats())
+
+    row = _measure(fake, revise_all)
+    return {
+        "benchmark": "react_session_pool",
+        "sessions": sessions,
+        "plans_per_s": round(sessions / row["latency_s"], 3),
+        "llm_calls_per_plan": round(row["llm_calls"] / sessions, 2),
+        "uncached_prompt_tokens_per_plan": round(
+            (row["prompt_tokens"] - row["cached_tokens"]) / sessions
+        ),
+        "day_reuse_rate": pool_stats["day_reuse_rate"],
+        "tool_cache_hits": pool_stats["tool_cache"]["hits"],
+        **row,
+    }
+
+
+def _react_iterations(
+    fake: SimulatedLLM,
+    activities: Dict[str, List[dict]],
+    weather: Dict[str, str],
+    vacation: Any,
+    sessions: int = 10,
+) -> Dict[str, Any]:
+    """
+    CPU time and peak memory per ReAct iteration over `sessions` sequential
+    revisions of a defective draft (as app.main passes it: a model_dump()).
+    """
+    draft = generate_itinerary(vacation, activities, weather).model_dump()
+    iterations = []
+
+    def revise():
+        iterations.clear()
+        for _ in range(sessions):
+            log: List[Dict[str, Any]] = []
+            revise_itinerary_with_react_agent(
+                draft, weather, activities, vacation_info=vacation, iteration_log=log
+            )
+            iterations.append(len(log))
+
+    fake.reset()
+    get_verdict_cache().clear()
+    started, wall_started = time.process_time(), time.perf_counter()
+    revise()
+    cpu = time.process_time() - started
+    latency = time.perf_counter() - wall_started
+
+    tracemalloc.start()
+    revise()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = sum(iterations)
+    return {
+        "benchmark": "react_iteration",
+        "sessions": sessions,
+        "iterations": total,
+        "latency_s": round(latency, 4),
+        "cpu_ms_per_iteration": round(cpu * 1000 / total, 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def _bulk_scoring(
+    activities: Dict[str, List[dict]],
+    weather: Dict[str, str],
+    vacation: Any,
+    candidates: int = BULK_SCORING_CANDIDATES,
+) -> Dict[str, Any]:
+    """
+    Scores `candidates` random itineraries with validator.rank_plans (one
+    vectorized pass, catalog load included) and, for comparison, the way the
+    agent did it before: one calculator_tool call per plan for the cost plus
+    a Python loop over the weather rules.
+    """
+    rng = random.Random(0)
+    plans = [
+        {
+            date: [a["id"] for a in rng.sample(acts, min(len(acts), rng.randint(2, 3)))]
+            for date, acts in activities.items()
+        }
+        for _ in range(candidates)
+    ]
+
+    started = time.perf_counter()
+    ranked = rank_plans(plans, weather, activities, vacation)
+    latency = time.perf_counter() - started
+    tracemalloc.start()
+    rank_plans(plans, weather, activities, vacation)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    by_id = {(date, a["id"]): a for date, acts in activities.items() for a in acts}
+    started = time.perf_counter()
+    for plan in plans:
+        chosen = [by_id[(date, i)] for date, ids in plan.items() for i in ids]
+        calculator_tool("+".join(str(a["cost_usd"]) for a in chosen))
+        for date, ids in plan.items():
+            for i in ids:
+                rule_based_verdict(by_id[(date, i)], weather[date])
+    loop_latency = time.perf_counter() - started
+
+    return {
+        "benchmark": "bulk_plan_scoring",
+        "candidates": candidates,
+        "feasible": int(ranked["feasible"].sum()),
+        "latency_s": round(latency, 4),
+        "calculator_loop_s": round(loop_latency, 4),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def _speculative_generation(
+    activities: Dict[str, List[dict]],
+    weather: Dict[str, str],
+    vacation: Any,
+    fan_out: int,
+    llm_options: Dict[str, float],
+    plans: int = SPECULATION_PLANS,
+) -> Dict[str, Any]:
+    """
+    generate_itinerary + ReAct revision of `plans` trips with `fan_out`
+    candidates per planner call and ReAct step, against a planner that drafts
+    a defective plan SPECULATION_DEFECT_RATE of the time. Reports drafts that
+    still needed repair, ReAct iterations, the speculation tallies and the
+    extra tokens the candidates cost.
+    """
+    fake = SimulatedLLM(
+        activities, weather, defect_rate=SPECULATION_DEFECT_RATE, **llm_options
+    )
+    previous_client = llm.client
+    llm.client = fake
+    # Tallies per run; _measure runs twice and the first run is reported.
+    runs: List[Dict[str, Any]] = []
+
+    def run():
+        speculation_stats.reset()
+        tally = {"defective_drafts": 0, "iterations": 0}
+        for _ in range(plans):
+            draft = generate_itinerary(
+                vacation, activities, weather, candidates=fan_out
+            )
+            tally["defective_drafts"] += any(
+                len(day.activities) < 2 for day in draft.days
+            )
+            log: List[Dict[str, Any]] = []
+            revise_itinerary_with_react_agent(
+                draft.model_dump(),
+                weather,
+                activities,
+                vacation_info=vacation,
+                iteration_log=log,
+                speculation=fan_out,
+            )
+            tally["iterations"] += len(log)
+        tally["speculation"] = speculation_stats.stats()
+        runs.append(tally)
+
+    try:
+        row = _measure(fake, run)
+    finally:
+        llm.client = previous_client
+    tally = runs[0]
+    return {
+        "benchmark": "speculative_generation",
+        "fan_out": fan_out,
+        "plans": plans,
+        "defective_drafts": tally["defective_drafts"],
+        "react_iterations_per_plan": round(tally["iterations"] / plans, 2),
+        "iterations_saved": sum(
+            site["iterations_saved"] for site in tally["speculation"].values()
+        ),
+        "cancelled_candidates": sum(
+            site["cancelled"] for site in tally["speculation"].values()
+        ),
+        **row,
+    }
+
+
+def _tail_latency(calls: int, hedge_percentile: float) -> Dict[str, Any]:
+    """
+    p50/p99 of `calls` sequential LLM calls against a backend where 5% of calls
+    are 20x slower, with the transport hedging at hedge_percentile (0 = off).
+    """
+    fake = SimulatedLLM({}, {}, latency_s=0.005, slow_call_rate=0.05)
+    transport = Transport(hedge_percentile=hedge_percentile, hedge_min_samples=10)
+    previous_client, previous_transport = llm.client, llm.transport
+    llm.client, llm.transport = fake, transport
+    latencies = []
+    try:
+        for i in range(calls):
+            started = time.perf_counter()
+            llm.create_response(
+                model="sim", input=[{"role": "user", "content": str(i)}]
+            )
+            latencies.append(time.perf_counter() - started)
+    finally:
+        llm.client, llm.transport = previous_client, previous_transport
+
+    latencies.sort()
+    return {
+        "benchmark": "llm_tail_latency",
+        "hedge_percentile": hedge_percentile,
+        "calls": calls,
+        "p50_s": round(latencies[len(latencies) // 2], 4),
+        "p99_s": round(
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 4
+        ),
+        "hedges": transport.stats()["hedges"],
+    }
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    users=DEFAULT_USERS,
+    latency_s: float = 0.0,
+    per_output_token_s: float = 0.0,
+    per_input_token_s: float = 0.0,
+    repeat: int = 1,
+    tail_calls: int = 200,
+) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    original_client = llm.client
+    # Verdicts in memory only, and the caller's cache left untouched
+    original_cache = set_verdict_cache(VerdictCache(path=None))
+    try:
+        for days, per_day in sizes:
+            activities, weather = make_catalog(days, per_day)
+            vacation = make_vacation(days)
+            llm_options = {
+                "latency_s": latency_s,
+                "per_output_token_s": per_output_token_s,
+                "per_input_token_s": per_input_token_s,
+            }
+            fake = SimulatedLLM(activities, weather, **llm_options)
+            llm.client = fake
+            size = {"days": days, "activities_per_day": per_day}
+            # Unfiltered picks, so the eval also hits ambiguous (LLM-tier) pairs.
+            eval_plan = solve_itinerary(vacation, activities, weather).model_dump()
+            for day in eval_plan["days"]:
+                day["activities"] = activities[day["date"].isoformat()][:3]
+            plan_json = json.dumps(eval_plan, default=str)
+
+            for _ in range(repeat):
+                results.append(
+                    {
+                        "benchmark": "generate_itinerary",
+                        **size,
+                        **_measure(
+                            fake,
+                            lambda: generate_itinerary(vacation, activities, weather),
+                        ),
+                    }
+                )
+                results.append(
+                    {
+                        "benchmark": "stream_itinerary",
+                        **size,
+                        **_measure_stream(
+                            fake,
+                            lambda: stream_itinerary(vacation, activities, weather),
+                        ),
+                    }
+                )
+                results.append(
+                    {
+                        "benchmark": "generate_itinerary_parallel",
+                        **size,
+                        **_measure(
+                            fake,
+                            lambda: generate_itinerary_parallel(
+                                vacation, activities, weather
+                            ),
+                        ),
+                    }
+                )
+                for prefix_catalog in (False, True):
+                    results.append(
+                        {
+                            **_prefix_cache(
+                                activities,
+                                weather,
+                                days,
+                                prefix_catalog,
+                                **llm_options,
+                            ),
+                            **size,
+                        }
+                    )
+                results.append(
+                    {
+                        "benchmark": "run_evals_tool",
+                        **size,
+                        **_measure(
+                            fake,
+                            lambda: run_evals_tool(
+                                plan_json, json.dumps(weather), activities
+                            ),
+                        ),
+                    }
+                )
+
+                results.append(
+                    {
+                        **_react_iterations(fake, activities, weather, vacation),
+                        **size,
+                    }
+                )
+                results.append({**_bulk_scoring(activities, weather, vacation), **size})
+                for fan_out in (1, 3):
+                    results.append(
+                        {
+                            **_speculative_generation(
+                                activities, weather, vacation, fan_out, llm_options
+                            ),
+                            **size,
+                        }
+                    )
+                for concurrent_users in users:
+                    results.append(
+                        {
+                            **_session_pool(
+                                fake, activities, weather, vacation, concurrent_users
+                            ),
+                            **size,
+                        }
+                    )
+
+                    def pipeline():
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            with ThreadPoolExecutor(concurrent_users) as pool:
+                                list(
+                                    pool.map(
+                                        lambda _: app.main(
+                                            vacation, activities, weather
+                                        ),
+                                        range(concurrent_users),
+                                    )
+                                )
+
+                    row = {
+                        "benchmark": "app_main",
+                        **size,
+                        "concurrent_users": concurrent_users,
+                        **_measure(fake, pipeline),
+                    }
+                    row["react_iterations_per_plan"] = (
+                        row["llm_calls_by_site"].get("react", 0) / concurrent_users
+                    )
+                    row["plans_per_s"] = round(concurrent_users / row["latency_s"], 3)
+                    results.append(row)
+    finally:
+        llm.client = original_client
+        set_verdict_cache(original_cache)
+
+    if tail_calls:
+        results += [_tail_latency(tail_calls, p) for p in (0.0, 90.0)]
+
+    return {
+        "suite": "agentsville-offline",
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "latency_s": latency_s,
+            "per_output_token_s": per_output_token_s,
+            "per_input_token_s": per_input_token_s,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _parse_size(text: str):
+    days, per_day = text.lower().split("x")
+    return int(days), int(per_day)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=_parse_size,
+        default=DEFAULT_SIZES,
+        help="DAYSxACTIVITIES_PER_DAY, e.g. 3x6 14x24",
+    )
+    parser.add_argument("--users", nargs="+", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per call")
+    parser.add_argument(
+        "--per-token-latency", type=float, default=0.0, help="seconds per output token"
+    )
+    parser.add_argument(
+        "--per-input-token-latency",
+        type=float,
+        default=0.0,
+        help="seconds per uncached prompt token",
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--tail-calls", type=int, default=200, help="calls per tail-latency run"
+    )
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        sizes=args.sizes,
+        users=args.users,
+        latency_s=args.latency,
+        per_output_token_s=args.per_token_latency,
+        per_input_token_s=args.per_input_token_latency,
+        repeat=args.repeat,
+        tail_calls=args.tail_calls,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
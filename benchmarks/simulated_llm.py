@@ -0,0 +1,231 @@
+# benchmarks/simulated_llm.py
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from agentsville.history import estimate_tokens
+from agentsville.models import VacationInfo
+from agentsville.solver import solve_itinerary
+
+# Tokens per streamed delta (~4 characters per token).
+STREAM_CHUNK_TOKENS = 8
+
+# Simulated provider prompt caching: prefixes of at least PREFIX_CACHE_MIN_TOKENS
+# are cached in PREFIX_CACHE_BLOCK_TOKENS increments.
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_BLOCK_TOKENS = 128
+
+
+def _action(tool_name: str, **arguments) -> str:
+    action = json.dumps({"tool_name": tool_name, "arguments": arguments})
+    return f"THOUGHT: Next step.\nACTION: {action}"
+
+
+class SimulatedLLM:
+    """
+    Scripted, offline stand-in for the OpenAI client (exposes responses.create).
+
+    Recognizes each call site by its system prompt and answers like a well-behaved
+    model: the planner gets a solver-built TravelPlan (with `plan_defects` days
+    stripped to one activity, so the ReAct loop has something to repair; with
+    defect_rate only that share of replies is defective), the
+    ReAct agent submits the repaired plan, evaluates and finishes, and weather
+    checks answer IS_COMPATIBLE. Each call sleeps latency_s, plus
+    per_input_token_s per uncached prompt token (prefill), plus
+    per_output_token_s per generated token, and reports estimated token usage.
+    Like a provider's prompt cache, a prompt prefix is cached once a request
+    carrying it has completed, and later requests report the longest cached
+    prefix as usage.input_tokens_details.cached_tokens.
+    stream=True requests get Responses API streaming events. A slow_call_rate
+    share of calls is slow_call_factor times slower (a latency tail).
+    """
+
+    def __init__(
+        self,
+        activities_by_date: Dict[str, List[dict]],
+        weather_by_date: Dict[str, str],
+        latency_s: float = 0.0,
+        per_output_token_s: float = 0.0,
+        per_input_token_s: float = 0.0,
+        plan_defects: int = 1,
+        defect_rate: Optional[float] = None,
+        slow_call_rate: float = 0.0,
+        slow_call_factor: float = 20.0,
+        seed: int = 0,
+    ):
+        self.activities_by_date = activities_by_date
+        self.weather_by_date = weather_by_date
+        self.latency_s = latency_s
+        self.per_output_token_s = per_output_token_s
+        self.per_input_token_s = per_input_token_s
+        self.plan_defects = plan_defects
+        self.defect_rate = defect_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_factor = slow_call_factor
+        self._rng = random.Random(seed)
+        self.responses = self
+        self._lock = threading.Lock()
+        self._good_plans: Dict[str, dict] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = Counter()
+            self.prompt_tokens = 0
+            self.cached_tokens = 0
+            self.completion_tokens = 0
+            self._cached_prefixes = set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "llm_calls": sum(self.calls.values()),
+                "llm_calls_by_site": dict(self.calls),
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+    def create(self, **kwargs):
+        messages = kwargs["input"]
+        system = messages[0]["content"]
+        if "expert travel planner" in system:
+            site, text = "planner", self._plan(messages[-1]["content"])
+        elif "Itinerary Revision Agent" in system:
+            site, text = "react", self._react(messages)
+        elif "JSON list of checks" in system:
+            site, text = "weather_batch", self._batch_verdicts(messages[-1]["content"])
+        elif "weather compatibility evaluator" in system:
+            site, text = "weather", "IS_COMPATIBLE REASON: Simulated."
+        else:
+            site, text = "other", "{}"
+
+        prompt_tokens = sum(estimate_tokens(str(m["content"])) for m in messages)
+        completion_tokens = estimate_tokens(text)
+        prefixes = self._prefix_digests(messages)
+        with self._lock:
+            cached_tokens = 0
+            for blocks, digest in enumerate(prefixes, start=1):
+                tokens = blocks * PREFIX_CACHE_BLOCK_TOKENS
+                if (
+                    tokens >= PREFIX_CACHE_MIN_TOKENS
+                    and digest in self._cached_prefixes
+                ):
+                    cached_tokens = min(tokens, prompt_tokens)
+            self.calls[site] += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.completion_tokens += completion_tokens
+        usage = SimpleNamespace(
+            input_tokens=prompt_tokens,
+            output_tokens=completion_tokens,
+            input_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+        )
+        prefill = self.per_input_token_s * (prompt_tokens - cached_tokens)
+        if kwargs.get("stream"):
+            return self._stream(text, usage, prefill, prefixes)
+
+        delay = self.latency_s + prefill + self.per_output_token_s * completion_tokens
+        with self._lock:
+            if self._rng.random() < self.slow_call_rate:
+                delay *= self.slow_call_factor
+        time.sleep(delay)
+        self._cache_prefixes(prefixes)
+        return SimpleNamespace(output_text=text, usage=usage)
+
+    @staticmethod
+    def _prefix_digests(messages: List[dict]) -> List[bytes]:
+        """
+        Digest of the rendered prompt up to each PREFIX_CACHE_BLOCK_TOKENS boundary.
+        """
+        text = "".join(f"{m['role']}\x1f{m['content']}\x1e" for m in messages)
+        block = PREFIX_CACHE_BLOCK_TOKENS * 4
+        running = hashlib.sha256()
+        digests = []
+        for end in range(block, len(text) + 1, block):
+            running.update(text[end - block : end].encode("utf-8"))
+            digests.append(running.copy().digest())
+        return digests
+
+    def _cache_prefixes(self, prefixes: List[bytes]) -> None:
+        with self._lock:
+            self._cached_prefixes.update(prefixes)
+
+    def _stream(
+        self,
+        text: str,
+        usage: SimpleNamespace,
+        prefill: float,
+        prefixes: List[bytes],
+    ):
+        """
+        Responses API streaming events: text deltas of ~STREAM_CHUNK_TOKENS tokens,
+        each paced like generation, then response.completed with the usage.
+        """
+        time.sleep(self.latency_s + prefill)
+        self._cache_prefixes(prefixes)
+        step = STREAM_CHUNK_TOKENS * 4
+        for start in range(0, len(text), step):
+            delta = text[start : start + step]
+            time.sleep(self.per_output_token_s * estimate_tokens(delta))
+            yield SimpleNamespace(type="response.output_text.delta", delta=delta)
+        yield SimpleNamespace(
+            type="response.completed", response=SimpleNamespace(usage=usage)
+        )
+
+    def _plan(self, user_prompt: str) -> str:
+        vacation_json = user_prompt.split("VacationInfo:", 1)[1].split("Activities:")[0]
+        vacation = VacationInfo.model_validate_json(vacation_json)
+        plan = solve_itinerary(
+            vacation, self.activities_by_date, self.weather_by_date
+        ).model_dump(mode="json")
+        with self._lock:
+            self._good_plans[plan["start_date"]] = json.loads(json.dumps(plan))
+            defective = (
+                self.defect_rate is None or self._rng.random() < self.defect_rate
+            )
+        if defective:
+            for day in plan["days"][: self.plan_defects]:
+                day["activities"] = day["activities"][:1]
+        return json.dumps(plan)
+
+    def _react(self, messages: List[dict]) -> str:
+        transcript = " ".join(str(m["content"]) for m in messages)
+        if "Evaluation PASSED" in transcript:
+            return _action("final_answer_tool")
+
+        already_repaired = any(
+            "run_evals_tool" in str(m["content"])
+            for m in messages
+            if m["role"] == "assistant"
+        )
+        current = next(
+            (
+                json.loads(str(m["content"]).split("): ", 1)[1])
+                for m in messages
+                if str(m["content"]).startswith("CURRENT PLAN")
+            ),
+            None,
+        )
+        if not already_repaired and current is not None:
+            with self._lock:
+                repaired = self._good_plans.get(current.get("start_date"))
+            if repaired is not None and repaired != current:
+                return _action("run_evals_tool", itinerary_json=json.dumps(repaired))
+        return _action("run_evals_tool")
+
+    def _batch_verdicts(self, user_input: str) -> str:
+        items = json.loads(user_input)
+        return json.dumps(
+            {
+                "verdicts": [
+                    {"pair_id": item["pair_id"], "verdict": "IS_COMPATIBLE"}
+                    for item in items
+                ]
+            }
+        )
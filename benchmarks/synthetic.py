@@ -0,0 +1,58 @@
+# benchmarks/synthetic.py
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from agentsville.models import Traveler, VacationInfo
+
+WEATHER = ["sunny", "cloudy", "light-rain", "heavy-rain"]
+TAGS = ["food", "nature", "culture", "active", "relaxed", "family", "hands-on"]
+
+
+def make_catalog(
+    days: int, activities_per_day: int, seed: int = 0, start: date = date(2025, 7, 1)
+) -> Tuple[Dict[str, List[dict]], Dict[str, str]]:
+    """
+    Synthetic (activities_by_date, weather_by_date) in the data/ layout.
+    Each day has at least two indoor activities (so every day is plannable) and
+    roughly a third indoor overall; outdoor ones list a random subset of
+    weather types, so rules, cache and LLM tiers are all exercised.
+    """
+    rng = random.Random(seed)
+    activities_by_date, weather_by_date = {}, {}
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        weather_by_date[day] = rng.choice(WEATHER)
+        activities = []
+        for index in range(activities_per_day):
+            indoor = index < 2 or rng.random() < 0.35
+            tags = ["indoor" if indoor else "outdoor"] + rng.sample(TAGS, 2)
+            suitable = (
+                list(WEATHER)
+                if indoor
+                else sorted(rng.sample(WEATHER[:3], rng.randint(1, 3)))
+            )
+            activities.append(
+                {
+                    "id": f"S{offset}-{index}",
+                    "name": f"{tags[1].title()} spot {offset}-{index}",
+                    "description": f"A synthetic {tags[1]} activity for benchmarking.",
+                    "duration_hours": rng.choice([1.0, 1.5, 2.0, 2.5]),
+                    "cost_usd": float(rng.randint(0, 60)),
+                    "suitability": tags,
+                    "weather_suitable": suitable,
+                }
+            )
+        activities_by_date[day] = activities
+    return activities_by_date, weather_by_date
+
+
+def make_vacation(days: int, start: date = date(2025, 7, 1)) -> VacationInfo:
+    return VacationInfo(
+        destination="AgentsVille",
+        start_date=start,
+        end_date=start + timedelta(days=days - 1),
+        interests=["food", "nature"],
+        budget_usd=150.0 * days,
+        travelers=[Traveler(name="Alice", age=30), Traveler(name="Bob", age=32)],
+    )
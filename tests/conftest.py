@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# The LLM client is built at import time; tests never reach the network.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("AGENTSVILLE_CACHE_DIR", tempfile.mkdtemp(prefix="agentsville-"))
+
+
+class FakeResponses:
+    """
+    Stand-in for client.responses: returns scripted output_text values in order
+    (the last one repeats) and records every call's keyword arguments.
+    A callable output is called with the request kwargs to produce the text.
+    """
+
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+            index = min(len(self.calls), len(self.outputs)) - 1
+        output = self.outputs[index]
+        if callable(output):
+            output = output(kwargs)
+        return SimpleNamespace(output_text=output)
+
+
+@pytest.fixture(autouse=True)
+def fresh_transport(monkeypatch):
+    """
+    A fresh transport per test (closed circuit breaker) that retries without sleeping.
+    """
+    from agentsville.transport import Transport
+
+    transport = Transport(backoff_base_s=0.0)
+    monkeypatch.setattr("agentsville.llm.transport", transport)
+    return transport
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """
+    Returns a factory that installs a scripted fake client for the given outputs.
+    """
+
+    def install(*outputs):
+        fake = SimpleNamespace(responses=FakeResponses(outputs))
+        monkeypatch.setattr("agentsville.llm.client", fake)
+        return fake.responses
+
+    return install
+
+
+@pytest.fixture
+def sample_plan_json():
+    """
+    A TravelPlan as produced by the notebook (notebooks/outputs/final_travelplan.json).
+    """
+    path = Path(__file__).resolve().parent.parent / "notebooks" / "outputs"
+    with open(path / "final_travelplan.json", "r", encoding="utf-8") as f:
+        return json.load(f)
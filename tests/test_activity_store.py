@@ -0,0 +1,65 @@
+import json
+
+from agentsville.activity_store import ActivityStore
+from agentsville.data_loader import load_activity_store
+from agentsville.models import VacationInfo
+from agentsville.planner import build_user_prompt
+from agentsville.tools import get_activities_by_date_tool
+
+
+def test_indexed_queries_match_the_json_catalog(tmp_path):
+    store = load_activity_store(path=tmp_path / "activities.sqlite3")
+
+    assert len(store) == 9
+    indoor_food = store.query(date="2025-07-16", tags=["indoor", "food"], max_cost=60)
+    assert [a["id"] for a in indoor_food] == ["A6"]
+    assert store.query(date="2025-07-16", tags=["indoor", "food"], max_cost=40) == []
+    assert [a["id"] for a in store.query(weather="heavy-rain")] == ["A2", "A6", "A8"]
+
+    observation = json.loads(get_activities_by_date_tool("2025-07-17", store))
+    assert [a["id"] for a in observation["activities"]] == ["A7", "A8", "A9"]
+
+
+def test_jsonl_catalog_with_many_destinations(tmp_path):
+    source = tmp_path / "catalog.jsonl"
+    rows = [
+        {"id": "L1", "date": "2025-07-15", "destination": "Lisbon", "cost_usd": 5},
+        {"id": "P1", "date": "2025-07-15", "destination": "Porto", "cost_usd": 5},
+    ]
+    source.write_text("\n".join(json.dumps(r) for r in rows))
+    store = ActivityStore.build(source, tmp_path / "catalog.sqlite3")
+
+    vacation = VacationInfo(
+        destination="Porto",
+        start_date="2025-07-15",
+        end_date="2025-07-16",
+        interests=[],
+        budget_usd=100,
+        travelers=[],
+    )
+    prompt = build_user_prompt(vacation, store, {})
+    assert '"P1"' in prompt and '"L1"' not in prompt
+
+
+def test_same_named_sources_get_their_own_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("AGENTSVILLE_CACHE_DIR", str(tmp_path / "cache"))
+    stores = []
+    for city in ("lisbon", "porto"):
+        source = tmp_path / city / "catalog.jsonl"
+        source.parent.mkdir()
+        source.write_text(json.dumps({"id": city, "date": "2025-07-15"}))
+        stores.append(load_activity_store(source))
+
+    assert stores[0].path != stores[1].path
+    assert [a["id"] for a in stores[0].query(date="2025-07-15")] == ["lisbon"]
+    assert [a["id"] for a in stores[1].query(date="2025-07-15")] == ["porto"]
+
+
+def test_empty_cache_dir_keeps_the_store_out_of_the_default_cache(monkeypatch):
+    from agentsville.cache import DEFAULT_CACHE_DIR
+
+    monkeypatch.setenv("AGENTSVILLE_CACHE_DIR", "")
+    store = load_activity_store()
+
+    assert len(store) == 9
+    assert DEFAULT_CACHE_DIR not in store.path.parents
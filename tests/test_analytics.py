@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from agentsville.analytics import CatalogArrays
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.react_agent import execute_tool, revise_itinerary_with_react_agent
+from agentsville.validator import rank_plans
+
+VACATION = VacationInfo(
+    destination="AgentsVille",
+    start_date="2025-07-15",
+    end_date="2025-07-15",
+    interests=["food", "culture"],
+    budget_usd=50,
+    travelers=[],
+)
+
+
+def test_scores_a_batch_of_plans_at_once(sample_plan_json):
+    catalog = CatalogArrays(load_activities(), load_weather(), ["food", "culture"])
+    rainy_outdoor = {"2025-07-15": ["A1", "A2"], "2025-07-16": ["A4", "A5"]}
+
+    scores = catalog.score([sample_plan_json, rainy_outdoor], budget_usd=150)
+
+    first, second = scores.to_dict("records")
+    assert first["total_cost_usd"] == sum(
+        a["cost_usd"] for day in sample_plan_json["days"] for a in day["activities"]
+    )
+    assert second["total_cost_usd"] == 115.0
+    assert second["incompatible"] == 2 and not second["feasible"]
+    assert second["interest_coverage"] == 1.0
+    days = catalog.day_totals([rainy_outdoor])
+    assert days["cost_usd"].tolist() == [25.0, 90.0]
+
+
+def test_rank_plans_puts_feasible_best_covered_plans_first():
+    candidates = [
+        {"2025-07-15": ["A1", "A2"]},
+        {"2025-07-15": ["A2", "A3"]},
+        {"2025-07-15": ["A2", "X9"]},
+        {"2025-07-15": ["A2", "A3"], "2025-07-16": ["A6"]},
+    ]
+
+    ranked = rank_plans(candidates, load_weather(), load_activities(), VACATION)
+
+    assert ranked.index.tolist()[:2] == [1, 0]
+    assert ranked.loc[2, "unknown_activities"] == 1
+    assert ranked.loc[3, "date_issues"] == 1
+    assert not ranked.loc[[2, 3], "feasible"].any()
+
+
+def test_agent_scores_candidates_in_one_tool_call():
+    context = {
+        "activities_db": load_activities(),
+        "weather_json": json.dumps(load_weather()),
+        "budget_usd": 30,
+    }
+    candidates = [{"2025-07-15": ["A1", "A2"]}, {"2025-07-15": ["A2", "A3"]}]
+
+    observation = json.loads(
+        execute_tool(
+            "score_plans_tool", {"candidates_json": json.dumps(candidates)}, context
+        )
+    )
+
+    cheap, pricey = observation["candidates"]
+    assert cheap["feasible"] and cheap["day_costs"] == {"2025-07-15": 25.0}
+    assert not pricey["within_budget"] and pricey["total_cost_usd"] == 40.0
+
+
+def test_agent_scores_days_the_draft_is_missing(fake_llm, sample_plan_json):
+    draft = {**sample_plan_json, "days": sample_plan_json["days"][:2]}
+    vacation = VacationInfo(
+        **{**VACATION.model_dump(), "end_date": "2025-07-17", "budget_usd": 500}
+    )
+    candidate = {
+        date: [a["id"] for a in acts[:2]] for date, acts in load_activities().items()
+    }
+    action = json.dumps(
+        {
+            "tool_name": "score_plans_tool",
+            "arguments": {"candidates_json": json.dumps([candidate])},
+        }
+    )
+    calls = fake_llm(f"THOUGHT: add the last day.\nACTION: {action}").calls
+
+    with pytest.raises(RuntimeError, match="max iterations"):
+        revise_itinerary_with_react_agent(
+            draft,
+            load_weather(),
+            load_activities(),
+            vacation_info=vacation,
+            max_iterations=2,
+        )
+
+    observation = json.loads(
+        calls[1]["input"][-1]["content"].split("OBSERVATION: ", 1)[1]
+    )
+    assert observation["candidates"][0]["unknown_activities"] == 0
+    assert observation["candidates"][0]["day_costs"]["2025-07-17"] > 0
@@ -0,0 +1,58 @@
+import json
+import os
+
+from agentsville.cache import get_verdict_cache
+from benchmarks.run import run_benchmarks
+
+
+def test_offline_benchmark_report_is_machine_readable():
+    report = run_benchmarks(sizes=[(2, 4)], users=[2], tail_calls=20)
+
+    results = json.loads(json.dumps(report))["results"]
+    rows = {row["benchmark"]: row for row in results}
+    assert set(rows) == {
+        "generate_itinerary",
+        "stream_itinerary",
+        "generate_itinerary_parallel",
+        "prompt_prefix_cache",
+        "react_session_pool",
+        "react_iteration",
+        "bulk_plan_scoring",
+        "speculative_generation",
+        "run_evals_tool",
+        "app_main",
+        "llm_tail_latency",
+    }
+    assert rows["stream_itinerary"]["time_to_first_day_s"] is not None
+    assert rows["generate_itinerary"]["llm_calls"] == 1
+    assert rows["generate_itinerary_parallel"]["llm_calls"] == 2
+    assert rows["app_main"]["react_iterations_per_plan"] == 2
+    assert rows["react_session_pool"]["day_reuse_rate"] > 0.5
+    assert rows["llm_tail_latency"]["p99_s"] > 0
+    assert rows["react_iteration"]["cpu_ms_per_iteration"] > 0
+    assert rows["bulk_plan_scoring"]["candidates"] == 2000
+    single, speculative = [
+        r for r in results if r["benchmark"] == "speculative_generation"
+    ]
+    assert speculative["defective_drafts"] <= single["defective_drafts"]
+    assert (
+        speculative["llm_calls_by_site"]["planner"]
+        > single["llm_calls_by_site"]["planner"]
+    )
+    split, shared = [r for r in results if r["benchmark"] == "prompt_prefix_cache"]
+    assert shared["cached_share"] > split["cached_share"] > 0
+    for row in rows.values():
+        if row["benchmark"] in ("llm_tail_latency", "prompt_prefix_cache"):
+            continue
+        assert row["latency_s"] >= 0 and row["peak_memory_kb"] > 0
+
+
+def test_benchmarks_leave_the_cache_settings_alone():
+    env = os.environ.get("AGENTSVILLE_CACHE_DIR")
+    cache = get_verdict_cache()
+
+    run_benchmarks(sizes=[(2, 4)], users=[2], tail_calls=5)
+
+    assert os.environ.get("AGENTSVILLE_CACHE_DIR") == env
+    assert env  # conftest's temp dir, not the blank the benchmark used to set
+    assert get_verdict_cache() is cache
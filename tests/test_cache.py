@@ -0,0 +1,81 @@
+import sqlite3
+
+from agentsville.cache import VerdictCache, verdict_key
+from agentsville.weather import check_weather_compatibility
+
+MARKET = {
+    "id": "A5",
+    "name": "Local Food Market Tour",
+    "suitability": ["food", "outdoor"],
+    "weather_suitable": ["sunny", "cloudy"],
+}
+
+
+def test_verdict_key_ignores_key_order():
+    reordered = dict(reversed(list(MARKET.items())))
+    assert verdict_key(MARKET, "cloudy", "m", "v1") == verdict_key(
+        reordered, "cloudy", "m", "v1"
+    )
+    assert verdict_key(MARKET, "cloudy", "m", "v1") != verdict_key(
+        MARKET, "cloudy", "m", "v2"
+    )
+
+
+def test_verdicts_survive_restart_and_expire(tmp_path):
+    path = tmp_path / "verdicts.sqlite3"
+    VerdictCache(path=path).set("k", "IS_COMPATIBLE")
+
+    reopened = VerdictCache(path=path)
+    assert reopened.get("k") == "IS_COMPATIBLE"
+    assert reopened.stats()["disk_hits"] == 1
+
+    expired = VerdictCache(path=path, ttl_seconds=-1)
+    assert expired.get("k") is None
+    assert expired.stats()["misses"] == 1
+
+
+def test_lru_and_disk_size_eviction(tmp_path):
+    cache = VerdictCache(
+        path=tmp_path / "v.sqlite3", max_memory_entries=1, max_disk_entries=2
+    )
+    for key in ("a", "b", "c"):
+        cache.set(key, "IS_COMPATIBLE")
+    assert cache.stats()["memory_entries"] == 1
+    assert cache.get("a") is None
+    assert cache.get("c") == "IS_COMPATIBLE"
+
+
+def test_disk_eviction_breaks_time_ties_by_write_order(tmp_path, monkeypatch):
+    path = tmp_path / "v.sqlite3"
+    monkeypatch.setattr("agentsville.cache.time.time", lambda: 1000.0)
+    cache = VerdictCache(path=path, max_memory_entries=1, max_disk_entries=2)
+    statements = []
+    cache._db.set_trace_callback(statements.append)
+    for key in ("a", "b", "a", "c", "d"):
+        cache.set(key, "IS_COMPATIBLE")
+    assert not any("COUNT" in statement for statement in statements)
+
+    # Same timestamp everywhere: the oldest writes go, the last two stay
+    reopened = VerdictCache(path=path, ttl_seconds=None, max_disk_entries=2)
+    assert [reopened.get(key) is not None for key in "abcd"] == [
+        False,
+        False,
+        True,
+        True,
+    ]
+    assert cache.stats()["evictions"] >= 2
+    reopened.set("e", "IS_COMPATIBLE")  # the row count carries over on reopen
+    rows = sqlite3.connect(str(path)).execute("SELECT key FROM verdicts").fetchall()
+    assert sorted(rows) == [("d",), ("e",)]
+
+
+def test_check_weather_compatibility_is_memoized(fake_llm):
+    calls = fake_llm("IS_INCOMPATIBLE REASON: wet market.").calls
+    cache = VerdictCache()
+
+    first = check_weather_compatibility(MARKET, "light-rain", cache=cache)
+    second = check_weather_compatibility(MARKET, "light-rain", cache=cache)
+
+    assert first == second == "IS_INCOMPATIBLE"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,52 @@
+import json
+from datetime import date
+
+from agentsville.compact import ActivityTable, CompactPlan
+from agentsville.tools import IncrementalEvaluator
+from agentsville.utils import make_json_safe, to_json
+
+MUSEUM = {"id": "C1", "name": "Museum", "cost_usd": 10.0, "suitability": ["indoor"]}
+GALLERY = {"id": "C2", "name": "Gallery", "cost_usd": 5.0, "suitability": ["indoor"]}
+PLAN = {
+    "destination": "AgentsVille",
+    "days": [{"date": "2025-07-15", "activities": [MUSEUM, GALLERY]}],
+}
+
+
+def test_make_json_safe_copies_only_what_it_converts():
+    assert make_json_safe(PLAN) is PLAN
+
+    dated = {"meta": {"tags": ("a", "b")}, "days": [{"date": date(2025, 7, 15)}]}
+    safe = make_json_safe(dated)
+    assert safe == {"meta": {"tags": ["a", "b"]}, "days": [{"date": "2025-07-15"}]}
+    assert dated["days"][0]["date"] == date(2025, 7, 15)
+    assert json.loads(to_json(dated)) == safe
+
+
+def test_plans_parsed_from_json_share_interned_activities():
+    table = ActivityTable()
+    first = CompactPlan.from_plan(json.dumps(PLAN), table)
+    second = CompactPlan.from_plan(json.dumps(PLAN), table)
+
+    assert first.source is not second.source
+    assert first.days[0].activities[0] is second.days[0].activities[0]
+    assert first.days[0].activity_ids == ("C1", "C2")
+    assert table.stats() == {"entries": 2, "hits": 2, "misses": 2}
+    assert json.loads(first.to_json()) == PLAN
+
+    # An edited activity keeps its own dict.
+    edited = json.loads(json.dumps(PLAN))
+    edited["days"][0]["activities"][0]["cost_usd"] = 99.0
+    third = CompactPlan.from_plan(json.dumps(edited), table)
+    assert third.days[0].activities[0]["cost_usd"] == 99.0
+
+
+def test_evaluate_on_dicts_matches_run_on_json():
+    weather = {"2025-07-15": "sunny"}
+    by_dict = IncrementalEvaluator().evaluate(PLAN, weather)
+    by_json = json.loads(
+        IncrementalEvaluator().run(json.dumps(PLAN), json.dumps(weather))
+    )
+
+    assert by_dict == by_json
+    assert by_dict["passed"] is True
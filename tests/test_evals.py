@@ -0,0 +1,152 @@
+import json
+import time
+
+from agentsville.tools import IncrementalEvaluator, run_evals_tool
+
+WEATHER = {"2025-07-15": "cloudy", "2025-07-16": "heavy-rain"}
+
+
+def _activity(activity_id, name):
+    return {"id": activity_id, "name": name, "suitability": [], "weather_suitable": []}
+
+
+def _plan(*days):
+    return json.dumps(
+        {"days": [{"date": date, "activities": acts} for date, acts in days]}
+    )
+
+
+def test_concurrent_evals_keep_itinerary_order(fake_llm):
+    def slow_verdict(request):
+        user = request["input"][-1]["content"]
+        # Earlier activities answer last, so completion order is reversed.
+        time.sleep(0.2 if "First" in user else 0.01)
+        return "IS_INCOMPATIBLE" if "heavy-rain" in user else "IS_COMPATIBLE"
+
+    calls = fake_llm(slow_verdict).calls
+    plan = _plan(
+        ("2025-07-15", [_activity("X1", "First"), _activity("X2", "Second")]),
+        ("2025-07-16", [_activity("X3", "Third"), _activity("X4", "Fourth")]),
+    )
+
+    started = time.perf_counter()
+    result = json.loads(
+        run_evals_tool(plan, json.dumps(WEATHER), {}, mode="concurrent")
+    )
+    elapsed = time.perf_counter() - started
+
+    assert len(calls) == 4
+    assert elapsed < 0.35
+    assert [issue["activity"] for issue in result["issues"]] == ["Third", "Fourth"]
+
+
+def test_failed_checks_are_reported_not_raised(fake_llm):
+    def broken(request):
+        raise TimeoutError("slow endpoint")
+
+    fake_llm(broken)
+    plan = _plan(("2025-07-15", [_activity("X5", "Fifth")]))
+
+    result = json.loads(run_evals_tool(plan, json.dumps(WEATHER), {}))
+
+    assert result["passed"] is False
+    assert [issue["issue"] for issue in result["issues"]] == [
+        "fewer than 2 activities",
+        "could not verify compatibility with cloudy",
+    ]
+
+
+def test_clear_cut_checks_skip_the_llm(fake_llm):
+    calls = fake_llm("IS_COMPATIBLE").calls
+    museum = {"id": "A2", "name": "City Museum", "suitability": ["indoor"]}
+    kayak = {"id": "A4", "name": "Guided Kayak", "suitability": ["outdoor"]}
+    market = {"id": "A5", "name": "Market", "suitability": ["food", "outdoor"]}
+    plan = _plan(
+        ("2025-07-16", [museum, kayak]),
+        ("2025-07-17", [market, {**kayak, "weather_suitable": ["light-rain"]}]),
+    )
+    weather = {"2025-07-16": "heavy-rain", "2025-07-17": "light-rain"}
+
+    result = json.loads(run_evals_tool(plan, json.dumps(weather), {}))
+
+    assert [issue["activity"] for issue in result["issues"]] == ["Guided Kayak"]
+    assert result["tiers"] == {"rules": 3, "cache": 0, "llm": 1, "failed": 0}
+    assert len(calls) == 1
+
+
+def test_batch_mode_retries_only_dropped_pairs(fake_llm):
+    def batch_then_single(request):
+        user = request["input"][-1]["content"]
+        if user.startswith("["):
+            # Answers p0 twice and drops p2: both go to the single-pair path.
+            return json.dumps(
+                {
+                    "verdicts": [
+                        {"pair_id": "p0", "verdict": "IS_COMPATIBLE"},
+                        {"pair_id": "p0", "verdict": "IS_COMPATIBLE"},
+                        {"pair_id": "p1", "verdict": "IS_INCOMPATIBLE"},
+                        {"pair_id": "p9", "verdict": "IS_COMPATIBLE"},
+                    ]
+                }
+            )
+        return "IS_COMPATIBLE"
+
+    calls = fake_llm(batch_then_single).calls
+    plan = _plan(
+        ("2025-07-15", [_activity("B1", "Bay"), _activity("B2", "Bluff")]),
+        ("2025-07-16", [_activity("B3", "Beach")]),
+    )
+
+    result = json.loads(run_evals_tool(plan, json.dumps(WEATHER), {}, mode="batch"))
+
+    assert len(calls) == 3
+    assert [issue.get("activity") for issue in result["issues"]] == [
+        "Bluff",
+        None,
+    ]
+    assert result["tiers"]["llm"] == 3
+
+
+def test_incremental_evaluator_rechecks_only_changed_days(fake_llm):
+    calls = fake_llm("IS_COMPATIBLE").calls
+    days = [
+        (f"2025-08-{day:02d}", [_activity(f"D{day}a", "a"), _activity(f"D{day}b", "b")])
+        for day in range(1, 15)
+    ]
+    weather = json.dumps({date: "light-rain" for date, _ in days})
+    evaluator = IncrementalEvaluator(mode="concurrent")
+
+    first = json.loads(evaluator.run(_plan(*days), weather))
+    days[3] = (days[3][0], [_activity("D4a", "a"), _activity("X", "swapped")])
+    second = json.loads(evaluator.run(_plan(*days), weather))
+
+    assert first["days_evaluated"] == 14 and second["days_evaluated"] == 1
+    assert second["days_reused"] == 13 and second["passed"] is True
+    # 28 checks for the first eval, then only the swapped-in activity.
+    assert len(calls) == 29
+
+
+def test_a_failed_check_is_retried_on_the_next_eval(monkeypatch):
+    # The first check times out, the retry answers.
+    answers = iter(["CHECK_FAILED", "IS_COMPATIBLE"])
+    checked = []
+
+    def check(pairs, **options):
+        checked.append(len(pairs))
+        verdict = next(answers)
+        return [(verdict, "failed" if verdict == "CHECK_FAILED" else "llm")] + [
+            ("IS_COMPATIBLE", "llm")
+        ] * (len(pairs) - 1)
+
+    monkeypatch.setattr("agentsville.tools.check_weather_compatibility_many", check)
+    plan = _plan(("2025-07-15", [_activity("R1", "Kite"), _activity("R2", "Boat")]))
+    weather = json.dumps({"2025-07-15": "cloudy"})
+    evaluator = IncrementalEvaluator(mode="concurrent")
+
+    first = json.loads(evaluator.run(plan, weather))
+    second = json.loads(evaluator.run(plan, weather))
+
+    assert not first["passed"]
+    assert first["issues"][0]["issue"] == "could not verify compatibility with cloudy"
+    assert second["passed"] and second["days_evaluated"] == 1
+    assert checked == [2, 2]
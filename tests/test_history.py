@@ -0,0 +1,62 @@
+import json
+
+from agentsville.history import ConversationHistory, plan_diff
+
+
+def _plan(day_ids):
+    return {
+        "total_cost_usd": 10.0 * len(day_ids),
+        "days": [
+            {
+                "date": f"2025-07-{15 + i}",
+                "activities": [{"id": a, "description": "x" * 400} for a in ids],
+            }
+            for i, ids in enumerate(day_ids)
+        ],
+    }
+
+
+def test_plan_diff_reports_changed_days_only():
+    old = _plan([["A1", "A2"], ["A4", "A5"]])
+    new = _plan([["A1", "A2"], ["A4", "A6"]])
+    assert plan_diff(old, new) == "2025-07-16: -A5 +A6"
+
+
+def test_edits_beyond_activity_ids_replace_the_current_plan():
+    plan = _plan([["A1", "A2"]])
+    history = ConversationHistory("SYSTEM", plan=plan)
+    edited = json.loads(json.dumps(plan))
+    edited["days"][0]["activities"][0]["description"] = "Indoor now."
+    edited["notes"] = "Rain plan."
+
+    history.record_action(
+        "relabel",
+        {"tool_name": "run_evals_tool", "arguments": {"itinerary_json": edited}},
+    )
+
+    assert history.plan == edited and history.plan_version == 2
+    assert "details edited" in history.turns[-1]["content"]
+
+
+def test_prompt_stays_flat_as_plans_are_resubmitted():
+    history = ConversationHistory("SYSTEM", plan=_plan([["A1", "A2"]] * 4))
+    sizes = []
+    for step in range(8):
+        plan = _plan([["A1", "A2"]] * 3 + [["A3", f"B{step}"]])
+        history.record_action(
+            "evaluate",
+            {
+                "tool_name": "run_evals_tool",
+                "arguments": {"itinerary_json": json.dumps(plan)},
+            },
+        )
+        history.record_observation(
+            json.dumps({"passed": False, "issues": ["y" * 2000]})
+        )
+        sizes.append(history.count_tokens(history.messages()))
+
+    messages = history.messages()
+    assert "B7" in messages[1]["content"]  # the current plan slot is up to date
+    assert "<CURRENT PLAN v9; changes: 2025-07-18: -B6 +B7>" in messages[-2]["content"]
+    # Growth per step is bounded by the compacted turns, not by plan size.
+    assert sizes[-1] - sizes[2] < 5 * 150
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agentsville.llm_cache import CacheMissError, CachingClient
+
+
+def _request(text, temperature=0.2):
+    return {
+        "model": "gpt-4.1-mini",
+        "input": [{"role": "user", "content": text}],
+        "temperature": temperature,
+    }
+
+
+def test_record_then_replay_offline(tmp_path, fake_llm):
+    fake = fake_llm("first", "second")
+    recorder = CachingClient(SimpleNamespace(responses=fake), "record", tmp_path)
+
+    assert recorder.responses.create(**_request("hi")).output_text == "first"
+    assert recorder.responses.create(**_request("hi"), timeout=5).output_text == "first"
+    assert recorder.responses.create(**_request("hi", 0.9)).output_text == "second"
+    assert len(fake.calls) == 2
+    assert recorder.stats() == {"hits": 1, "misses": 2}
+
+    replayer = CachingClient(None, "replay", tmp_path)
+    assert replayer.responses.create(**_request("hi", 0.9)).output_text == "second"
+    with pytest.raises(CacheMissError):
+        replayer.responses.create(**_request("unseen"))
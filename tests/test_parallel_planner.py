@@ -0,0 +1,96 @@
+import json
+
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.planner import generate_itinerary_parallel
+
+VACATION = VacationInfo(
+    destination="AgentsVille",
+    start_date="2025-07-15",
+    end_date="2025-07-17",
+    interests=["food", "culture"],
+    budget_usd=120,
+    travelers=[],
+)
+
+PICKS = {"2025-07-15": ["A2", "A3"], "2025-07-16": ["A6"], "2025-07-17": ["A8", "A9"]}
+
+
+def _day_plan(request):
+    """
+    Answers a one-day sub-request with the PICKS for that day.
+    """
+    prompt = request["input"][-1]["content"]
+    vacation = json.loads(prompt.split("VacationInfo:", 1)[1].split("Activities:")[0])
+    day = vacation["start_date"]
+    activities = [a for a in load_activities()[day] if a["id"] in PICKS[day]]
+    cost = sum(a["cost_usd"] for a in activities)
+    return json.dumps(
+        {
+            "destination": "AgentsVille",
+            "start_date": day,
+            "end_date": day,
+            "total_cost_usd": cost,
+            "days": [
+                {
+                    "date": day,
+                    "summary": "Planned.",
+                    "activities": activities,
+                    "estimated_cost_usd": cost,
+                }
+            ],
+        }
+    )
+
+
+def test_days_are_planned_separately_and_merged_within_budget(fake_llm):
+    calls = fake_llm(_day_plan).calls
+
+    plan = generate_itinerary_parallel(VACATION, load_activities(), load_weather())
+
+    assert len(calls) == 3
+    assert all(
+        f'"budget_usd":{VACATION.budget_usd / 3}' in c["input"][-1]["content"]
+        for c in calls
+    )
+    assert [d.date.isoformat() for d in plan.days] == list(PICKS)
+    # 40 + 55 + 57 = 152 is over budget; swapping A9 ($45) for A7 ($0) settles it.
+    assert [a.id for a in plan.days[2].activities] == ["A8", "A7"]
+    assert plan.total_cost_usd == 107
+    assert "swapped A9 for A7" in plan.notes
+
+
+def test_chunks_span_several_days(fake_llm):
+    calls = fake_llm(_day_plan).calls
+
+    plan = generate_itinerary_parallel(
+        VACATION.model_copy(update={"budget_usd": 1000}),
+        load_activities(),
+        load_weather(),
+        chunk_days=2,
+    )
+
+    # The fake only plans each chunk's first day; the missing one is retried.
+    assert len(calls) == 3
+    assert [d.date.isoformat() for d in plan.days] == list(PICKS)
+    assert plan.total_cost_usd == 152
+
+
+def test_a_day_no_reply_covers_is_named_in_the_notes(fake_llm):
+    def skip_the_16th(request):
+        plan = json.loads(_day_plan(request))
+        if plan["start_date"] == "2025-07-16":
+            plan["days"] = []
+        return json.dumps(plan)
+
+    calls = fake_llm(skip_the_16th).calls
+
+    plan = generate_itinerary_parallel(
+        VACATION.model_copy(update={"budget_usd": 1000}),
+        load_activities(),
+        load_weather(),
+    )
+
+    assert len(calls) == 4
+    assert [d.date.isoformat() for d in plan.days] == ["2025-07-15", "2025-07-17"]
+    assert "2025-07-16: not planned" in plan.notes
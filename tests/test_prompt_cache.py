@@ -0,0 +1,63 @@
+import json
+from types import SimpleNamespace
+
+from agentsville import llm
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.planner import generate_itinerary
+from agentsville.prompt_cache import CATALOG_HEADER, PrefixCacheStats
+
+VACATION = VacationInfo(
+    destination="AgentsVille",
+    start_date="2025-07-15",
+    end_date="2025-07-17",
+    interests=["food", "nature"],
+    budget_usd=150,
+    travelers=[],
+)
+
+
+def test_planner_requests_share_a_byte_identical_prefix(fake_llm, sample_plan_json):
+    calls = fake_llm(json.dumps(sample_plan_json)).calls
+    activities, weather = load_activities(), load_weather()
+
+    generate_itinerary(VACATION, activities, weather)
+    other = VACATION.model_copy(update={"interests": ["culture"], "budget_usd": 90})
+    generate_itinerary(other, activities, weather)
+
+    first, second = (call["input"] for call in calls)
+    assert first[:-1] == second[:-1]
+    assert first[1]["content"].startswith(CATALOG_HEADER)
+    assert calls[0]["prompt_cache_key"] == calls[1]["prompt_cache_key"]
+    # Only the per-request part differs, and it lists ids instead of activities.
+    assert first[-1] != second[-1]
+    assert '"A1"' in first[-1]["content"]
+    assert "description" not in first[-1]["content"]
+
+
+def test_cached_tokens_are_tallied_per_site(monkeypatch):
+    usage = SimpleNamespace(
+        input_tokens=2000,
+        output_tokens=10,
+        input_tokens_details=SimpleNamespace(cached_tokens=1536),
+    )
+    client = SimpleNamespace(
+        responses=SimpleNamespace(
+            create=lambda **kwargs: SimpleNamespace(output_text="{}", usage=usage)
+        )
+    )
+    stats = PrefixCacheStats()
+    monkeypatch.setattr(llm, "client", client)
+    monkeypatch.setattr(llm, "prefix_stats", stats)
+
+    llm.create_response(site="planner", input=[])
+    llm.create_response(site="planner", input=[])
+
+    assert stats.stats() == {
+        "planner": {
+            "calls": 2,
+            "input_tokens": 4000,
+            "cached_tokens": 3072,
+            "cached_share": 0.768,
+        }
+    }
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from agentsville.models import VacationInfo
+from agentsville.solver import solve_itinerary
+from benchmarks.synthetic import make_catalog, make_vacation
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.react_agent import execute_tool, revise_itinerary_with_react_agent
+
+ACTIVITIES = load_activities()
+WEATHER = load_weather()
+
+PLAN = {
+    "destination": "AgentsVille",
+    "start_date": "2025-07-15",
+    "end_date": "2025-07-15",
+    "total_cost_usd": 25.0,
+    "days": [
+        {
+            "date": "2025-07-15",
+            "summary": "Museum and riverside walk.",
+            "activities": ACTIVITIES["2025-07-15"][:2],
+            "estimated_cost_usd": 25.0,
+        }
+    ],
+}
+
+
+def _action(tool_name, **arguments):
+    action = json.dumps({"tool_name": tool_name, "arguments": arguments})
+    return f"THOUGHT: next step.\nACTION: {action}"
+
+
+def test_execute_tool_binds_session_data():
+    context = {"activities_db": ACTIVITIES, "weather_json": "{}", "current_plan": {}}
+    observation = json.loads(
+        execute_tool("get_activities_by_date_tool", {"date_str": "2025-07-16"}, context)
+    )
+    assert [a["id"] for a in observation["activities"]] == ["A4", "A5", "A6"]
+
+
+def test_react_loop_runs_on_plan_references(fake_llm):
+    calls = fake_llm(
+        _action("run_evals_tool"),
+        _action("final_answer_tool"),
+    ).calls
+
+    plan = revise_itinerary_with_react_agent(PLAN, WEATHER, ACTIVITIES, preflight=False)
+
+    assert plan.days[0].activities[1].id == "A2"
+    assert len(calls) == 2
+    assert "Evaluation PASSED" in calls[1]["input"][-1]["content"]
+
+
+def test_valid_initial_plan_skips_the_loop(fake_llm):
+    calls = fake_llm("unused").calls
+    plan = revise_itinerary_with_react_agent(
+        {**PLAN, "total_cost_usd": 999.0}, WEATHER, ACTIVITIES
+    )
+
+    assert calls == []
+    assert plan.total_cost_usd == 25.0
+
+
+def test_failed_preflight_seeds_the_loop_and_gates_the_final_answer(fake_llm):
+    calls = fake_llm(_action("run_evals_tool"), _action("final_answer_tool")).calls
+    vacation = VacationInfo(
+        destination="AgentsVille",
+        start_date="2025-07-15",
+        end_date="2025-07-16",
+        interests=[],
+        budget_usd=20,
+        travelers=[],
+    )
+
+    with pytest.raises(RuntimeError, match="max iterations"):
+        revise_itinerary_with_react_agent(
+            PLAN, WEATHER, ACTIVITIES, vacation_info=vacation, max_iterations=3
+        )
+
+    seeded = calls[0]["input"][-1]["content"]
+    assert "PRE-FLIGHT VALIDATION" in seeded
+    assert "2025-07-16" in seeded and "exceeds budget 20" in seeded
+    # run_evals passes (the day itself is fine), the final answer does not
+    rejected = calls[2]["input"][-1]["content"]
+    assert "final_answer_tool rejected" in rejected and "exceeds budget 20" in rejected
+
+
+def test_final_answer_is_rejected_when_validation_cannot_run(fake_llm, monkeypatch):
+    from agentsville.transport import CircuitOpenError
+
+    def unavailable(*args, **kwargs):
+        raise CircuitOpenError("LLM endpoint circuit breaker is open")
+
+    monkeypatch.setattr("agentsville.react_agent.validate_plan", unavailable)
+    calls = fake_llm(_action("run_evals_tool"), _action("final_answer_tool")).calls
+
+    with pytest.raises(RuntimeError, match="max iterations"):
+        revise_itinerary_with_react_agent(PLAN, WEATHER, ACTIVITIES, max_iterations=3)
+
+    assert "could not be validated" in calls[0]["input"][-1]["content"]
+    # run_evals passes, then the final answer is rejected instead of accepted
+    rejected = calls[2]["input"][-1]["content"]
+    assert "final_answer_tool rejected" in rejected and "circuit breaker" in rejected
+
+
+def test_large_catalog_prefix_does_not_crowd_out_recent_turns(fake_llm):
+    activities, weather = make_catalog(14, 24)
+    vacation = make_vacation(14)
+    draft = solve_itinerary(vacation, activities, weather).model_dump(mode="json")
+    draft["days"][0]["activities"] = draft["days"][0]["activities"][:1]
+    calls = fake_llm(_action("get_activities_by_date_tool", date_str="2025-07-01"))
+    calls = calls.calls
+
+    with pytest.raises(RuntimeError, match="max iterations"):
+        revise_itinerary_with_react_agent(
+            draft, weather, activities, vacation_info=vacation, max_iterations=4
+        )
+
+    last = calls[-1]["input"]
+    assert sum(len(m["content"]) for m in last) // 4 > 8000  # catalog included
+    assert not any("earlier messages omitted" in m["content"] for m in last)
+    assert sum(m["content"].startswith("OBSERVATION") for m in last) >= 4
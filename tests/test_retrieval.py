@@ -0,0 +1,36 @@
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.planner import build_user_prompt
+from agentsville.retrieval import select_candidates
+
+VACATION = VacationInfo(
+    destination="AgentsVille",
+    start_date="2025-07-15",
+    end_date="2025-07-17",
+    interests=["food", "nature"],
+    budget_usd=150,
+    travelers=[],
+)
+
+
+def test_candidates_are_weather_and_budget_feasible_and_ranked():
+    candidates = select_candidates(VACATION, load_activities(), load_weather(), top_k=2)
+
+    assert [a["id"] for a in candidates["2025-07-15"]] == ["A3", "A1"]
+    # Heavy rain rules out the outdoor kayak and market.
+    assert [a["id"] for a in candidates["2025-07-16"]] == ["A6"]
+
+    tight = VACATION.model_copy(update={"budget_usd": 40})
+    assert "2025-07-16" not in select_candidates(
+        tight, load_activities(), load_weather()
+    )
+
+
+def test_prompt_stats_report_the_savings():
+    stats = {}
+    prompt = build_user_prompt(
+        VACATION, load_activities(), load_weather(), top_k=2, prompt_stats=stats
+    )
+
+    assert '"A4"' not in prompt
+    assert stats["after_tokens"] < stats["before_tokens"] / 2
@@ -0,0 +1,63 @@
+import pytest
+
+from agentsville import routing
+from agentsville.cache import VerdictCache
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.react_agent import revise_itinerary_with_react_agent
+from agentsville.routing import ModelRouter
+from agentsville.weather import resolve_weather_compatibility
+
+TIERS = {"small": "s", "standard": "m", "strong": "l"}
+MARKET = {"id": "X1", "name": "Open-air market", "suitability": ["outdoor"]}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = ModelRouter(tiers=TIERS)
+    monkeypatch.setattr(routing, "router", router)
+    return router
+
+
+def test_routes_escalate_and_cap_at_the_strongest_tier():
+    router = ModelRouter(tiers=TIERS, routes={"react": "standard"})
+    assert router.model_for("weather") == ("s", "small")
+    assert router.model_for("react") == ("m", "standard")
+    assert router.model_for("weather", escalation=5) == ("l", "strong")
+    assert router.model_for("unknown-site") == ("m", "standard")
+    assert router.tier_of("custom-model") == "pinned"
+    with pytest.raises(ValueError):
+        ModelRouter(routes={"react": "huge"})
+
+
+def test_weather_checks_use_the_small_tier_and_escalate_once(router, fake_llm):
+    calls = fake_llm("maybe?", "IS_COMPATIBLE")
+    cache = VerdictCache(path=None)
+
+    verdict, tier = resolve_weather_compatibility(MARKET, "light-rain", cache=cache)
+
+    assert (verdict, tier) == ("IS_COMPATIBLE", "llm")
+    assert [call["model"] for call in calls.calls] == ["s", "m"]
+    assert router.stats() == {"weather": {"small": 1, "standard": 1}}
+
+    # A pinned model is never swapped.
+    calls = fake_llm("maybe?")
+    resolve_weather_compatibility(MARKET, "light-rain", model="pinned", cache=cache)
+    assert [call["model"] for call in calls.calls] == ["pinned"]
+
+
+def test_react_agent_escalates_after_repeated_failures(
+    router, fake_llm, sample_plan_json
+):
+    calls = fake_llm("no action here", "still nothing", "nope")
+
+    with pytest.raises(RuntimeError):
+        revise_itinerary_with_react_agent(
+            sample_plan_json,
+            load_weather(),
+            load_activities(),
+            max_iterations=3,
+            preflight=False,
+        )
+
+    assert [call["model"] for call in calls.calls] == ["s", "s", "m"]
+    assert router.stats() == {"react": {"small": 2, "standard": 1}}
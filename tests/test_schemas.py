@@ -0,0 +1,89 @@
+import json
+
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.planner import generate_itinerary
+from agentsville.prompts import ITINERARY_REVISION_AGENT_SYSTEM_PROMPT
+from agentsville.react_agent import parse_thought_and_action
+from agentsville.schemas import ACTION_SCHEMA, TRAVEL_PLAN_SCHEMA, parse_json_output
+
+
+def _objects(node):
+    if isinstance(node, dict):
+        if node.get("type") == "object":
+            yield node
+        for value in node.values():
+            yield from _objects(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _objects(value)
+
+
+def test_travel_plan_schema_is_strict():
+    objects = list(_objects(TRAVEL_PLAN_SCHEMA))
+    assert len(objects) == 3  # TravelPlan, DayPlan, Activity
+    for node in objects:
+        assert node["additionalProperties"] is False
+        assert node["required"] == list(node["properties"])
+
+
+def test_parse_json_output_repairs_near_misses():
+    assert parse_json_output('{"a": 1}') == {"a": 1}
+    assert parse_json_output('```json\n{"a": [1, 2,]}\n```') == {"a": [1, 2]}
+    assert parse_json_output('{"a": {"b": 2') == {"a": {"b": 2}}
+    assert parse_json_output("no json here") is None
+
+
+def test_structured_and_malformed_actions_parse_without_a_retry():
+    structured = json.dumps(
+        {
+            "thought": "Evaluate.",
+            "tool_name": "run_evals_tool",
+            "arguments": {"itinerary_json": None, "date_str": None},
+        }
+    )
+    assert parse_thought_and_action(structured) == {
+        "thought": "Evaluate.",
+        "action": {"tool_name": "run_evals_tool", "arguments": {}},
+    }
+
+    sloppy = 'THOUGHT: Look.\nACTION: {"tool_name": "calculator_tool", "arguments": {"expression": "1+1",}'
+    parsed = parse_thought_and_action(sloppy)
+    assert parsed["action"] == {
+        "tool_name": "calculator_tool",
+        "arguments": {"expression": "1+1"},
+    }
+
+
+def test_planner_requests_the_travel_plan_schema(fake_llm, sample_plan_json):
+    calls = fake_llm("```json\n" + json.dumps(sample_plan_json) + "\n```").calls
+    vacation = VacationInfo(
+        destination="AgentsVille",
+        start_date="2025-07-15",
+        end_date="2025-07-17",
+        interests=["food"],
+        budget_usd=500,
+        travelers=[],
+    )
+
+    plan = generate_itinerary(vacation, load_activities(), load_weather())
+
+    text_format = calls[0]["text"]["format"]
+    assert text_format["type"] == "json_schema" and text_format["strict"] is True
+    assert text_format["schema"] == TRAVEL_PLAN_SCHEMA
+    assert len(plan.days) == 3
+
+
+def test_revision_prompt_describes_the_structured_reply():
+    example = next(
+        line
+        for line in ITINERARY_REVISION_AGENT_SYSTEM_PROMPT.splitlines()
+        if line.startswith('{"thought"')
+    )
+    step = json.loads(example)
+
+    assert set(step) == set(ACTION_SCHEMA["required"])
+    assert set(step["arguments"]) == set(
+        ACTION_SCHEMA["properties"]["arguments"]["required"]
+    )
+    assert "ACTION:" not in ITINERARY_REVISION_AGENT_SYSTEM_PROMPT
@@ -0,0 +1,114 @@
+import asyncio
+import io
+import json
+import threading
+import time
+
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.service import serve_jsonl
+
+ACTIVITIES = load_activities()
+WEATHER = load_weather()
+
+PLAN = {
+    "destination": "AgentsVille",
+    "start_date": "2025-07-15",
+    "end_date": "2025-07-15",
+    "total_cost_usd": 25.0,
+    "days": [
+        {
+            "date": "2025-07-15",
+            "summary": "Museum and riverside walk.",
+            "activities": ACTIVITIES["2025-07-15"][:2],
+            "estimated_cost_usd": 25.0,
+        }
+    ],
+}
+
+
+def scripted_agent(request):
+    time.sleep(0.1)
+    system = request["input"][0]["content"]
+    transcript = json.dumps(request["input"])
+    if "Itinerary Revision Agent" not in system:
+        return json.dumps(PLAN)
+    if "Evaluation PASSED" in transcript:
+        tool, arguments = "final_answer_tool", {
+            "final_travelplan_json": json.dumps(PLAN)
+        }
+    else:
+        tool, arguments = "run_evals_tool", {
+            "itinerary_json": json.dumps(PLAN),
+            "weather_json": json.dumps(WEATHER),
+        }
+    action = json.dumps({"tool_name": tool, "arguments": arguments})
+    return f"THOUGHT: next step.\nACTION: {action}"
+
+
+def test_serves_many_plans_concurrently(fake_llm):
+    calls = fake_llm(scripted_agent).calls
+    vacation = {
+        "destination": "AgentsVille",
+        "start_date": "2025-07-15",
+        "end_date": "2025-07-15",
+        "interests": ["culture"],
+        "budget_usd": 100,
+        "travelers": [{"name": "Alice"}],
+    }
+    lines = [json.dumps({"request_id": f"r{i}", **vacation}) for i in range(8)]
+    lines.append("not json")
+    output = io.StringIO()
+
+    started = time.perf_counter()
+    stats = asyncio.run(
+        serve_jsonl(
+            lines, output, concurrency=8, activities_db=ACTIVITIES, weather_data=WEATHER
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert stats["ok"] == 8 and stats["error"] == 1
+    assert {r["request_id"] for r in results if r["status"] == "ok"} == {
+        f"r{i}" for i in range(8)
+    }
+    # Valid initial plans skip the ReAct pass: one 100ms call per plan,
+    # so serial would take 0.8s.
+    assert len(calls) == 8
+    assert elapsed < 0.5
+
+
+def test_serving_leaves_the_event_loop_executor_alone(fake_llm):
+    fake_llm(json.dumps(PLAN))
+    vacation = {
+        "destination": "AgentsVille",
+        "start_date": "2025-07-15",
+        "end_date": "2025-07-15",
+        "interests": ["culture"],
+        "budget_usd": 100,
+        "travelers": [],
+    }
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        before = loop._default_executor
+        await serve_jsonl(
+            [json.dumps(vacation)] * 2,
+            io.StringIO(),
+            concurrency=2,
+            activities_db=ACTIVITIES,
+            weather_data=WEATHER,
+        )
+        return before, loop._default_executor
+
+    before, after = asyncio.run(serve())
+
+    assert after is before
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and any(
+        t.name.startswith("agentsville-serve") for t in threading.enumerate()
+    ):
+        time.sleep(0.01)
+    assert not any(
+        t.name.startswith("agentsville-serve") for t in threading.enumerate()
+    )
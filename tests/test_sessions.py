@@ -0,0 +1,104 @@
+import json
+
+from agentsville.cache import get_verdict_cache
+from agentsville.react_agent import execute_tool
+from agentsville.sessions import ReActSessionPool
+from agentsville.tools import IncrementalEvaluator, ToolResultCache
+
+MUSEUM = {
+    "id": "P1",
+    "name": "Pool Museum",
+    "description": "Indoor exhibits.",
+    "duration_hours": 2.0,
+    "cost_usd": 10.0,
+    "suitability": ["indoor"],
+    "weather_suitable": [],
+}
+MARKET = {
+    "id": "P2",
+    "name": "Pool Market",
+    "description": "Open-air stalls.",
+    "duration_hours": 1.0,
+    "cost_usd": 5.0,
+    "suitability": ["outdoor"],
+    "weather_suitable": [],
+}
+ACTIVITIES = {"2025-07-15": [MUSEUM, MARKET]}
+WEATHER = {"2025-07-15": "light-rain"}
+PLAN = {
+    "destination": "AgentsVille",
+    "start_date": "2025-07-15",
+    "end_date": "2025-07-15",
+    "total_cost_usd": 15.0,
+    "days": [
+        {
+            "date": "2025-07-15",
+            "summary": "Museum and market.",
+            "activities": [MUSEUM, MARKET],
+            "estimated_cost_usd": 15.0,
+        }
+    ],
+}
+
+
+def test_sessions_share_day_evals_but_not_plans(fake_llm):
+    get_verdict_cache().clear()
+    calls = fake_llm("IS_COMPATIBLE REASON: covered stalls.").calls
+
+    with ReActSessionPool(ACTIVITIES, WEATHER, max_workers=1) as pool:
+        first, second = pool.revise_many([PLAN, json.loads(json.dumps(PLAN))])
+
+    # The ambiguous market is checked once; the second session reuses the day.
+    assert len(calls) == 1
+    assert first.days[0].activities[1].id == second.days[0].activities[1].id == "P2"
+    assert first is not second
+    stats = pool.stats()
+    assert stats["completed"] == 2 and stats["failed"] == 0
+    assert (stats["days_evaluated"], stats["days_reused"]) == (1, 1)
+    assert stats["day_reuse_rate"] == 0.5
+
+
+def test_an_activity_edited_under_its_id_gets_its_own_day_result(fake_llm):
+    get_verdict_cache().clear()
+    fake_llm("IS_INCOMPATIBLE REASON: open-air stalls in the rain.")
+    relabelled = json.loads(json.dumps(PLAN))
+    relabelled["days"][0]["activities"][1]["suitability"] = ["indoor"]
+    day_cache = {}
+
+    first = IncrementalEvaluator(day_cache=day_cache).evaluate(PLAN, WEATHER)
+    second_session = IncrementalEvaluator(day_cache=day_cache)
+    second = second_session.evaluate(relabelled, WEATHER)
+
+    # Same date and ids, but the market now claims to be indoor: not reused.
+    assert not first["passed"] and second["passed"]
+    assert second_session.days_reused == 0
+
+
+def test_a_session_whose_check_failed_does_not_fail_the_next(monkeypatch):
+    verdicts = iter(["CHECK_FAILED", "IS_COMPATIBLE"])
+    monkeypatch.setattr(
+        "agentsville.tools.check_weather_compatibility_batch",
+        lambda pairs, **options: [(next(verdicts), "llm")] * len(pairs),
+    )
+    day_cache = {}
+
+    timed_out = IncrementalEvaluator(day_cache=day_cache).evaluate(PLAN, WEATHER)
+    next_session = IncrementalEvaluator(day_cache=day_cache)
+    answered = next_session.evaluate(PLAN, WEATHER)
+
+    assert not timed_out["passed"] and answered["passed"]
+    assert next_session.days_reused == 0
+    assert len(day_cache) == 1  # the passing result is shared from now on
+
+
+def test_lookup_tool_results_are_shared():
+    cache = ToolResultCache()
+    context = {"activities_db": ACTIVITIES, "tool_cache": cache}
+
+    for _ in range(3):
+        observation = execute_tool(
+            "get_activities_by_date_tool", {"date_str": "2025-07-15"}, context
+        )
+
+    assert [a["id"] for a in json.loads(observation)["activities"]] == ["P1", "P2"]
+    assert cache.stats() == {"hits": 2, "misses": 1, "entries": 1}
@@ -0,0 +1,136 @@
+import asyncio
+from itertools import combinations, product
+
+import pytest
+
+from agentsville.aio import aplan_vacation
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.retrieval import interest_score
+from agentsville.solver import solve_itinerary
+from agentsville.weather import rule_based_verdict
+from benchmarks.synthetic import make_catalog
+
+VACATION = VacationInfo(
+    destination="AgentsVille",
+    start_date="2025-07-15",
+    end_date="2025-07-17",
+    interests=["food", "culture"],
+    budget_usd=1000,
+    travelers=[],
+)
+
+
+def test_solver_plan_meets_constraints_without_llm(fake_llm):
+    calls = fake_llm("unused").calls
+    weather = load_weather()
+
+    plan = solve_itinerary(VACATION, load_activities(), weather, max_hours_per_day=4.0)
+
+    assert calls == []
+    assert plan.total_cost_usd == sum(d.estimated_cost_usd for d in plan.days)
+    for day in plan.days:
+        assert sum(a.duration_hours for a in day.activities) <= 4.0
+        for activity in day.activities:
+            assert (
+                weather[day.date.isoformat()] in activity.weather_suitable
+                or "indoor" in activity.suitability
+            )
+    # Heavy rain leaves a single compatible activity on the 16th.
+    assert [a.id for a in plan.days[1].activities] == ["A6"]
+    assert "2025-07-16: only 1" in plan.notes
+
+
+def _brute_force(vacation, activities_by_date, weather_by_date, max_hours):
+    """
+    Best (score, -cost) over every feasible 2-3 activity choice for every day.
+    """
+    per_day = []
+    for date in sorted(activities_by_date):
+        compatible = [
+            a
+            for a in activities_by_date[date]
+            if rule_based_verdict(a, weather_by_date[date]) == "IS_COMPATIBLE"
+        ]
+        per_day.append(
+            [
+                combo
+                for size in (2, 3)
+                for combo in combinations(compatible, size)
+                if sum(a["duration_hours"] for a in combo) <= max_hours
+            ]
+        )
+    best = None
+    for choice in product(*per_day):
+        acts = [a for combo in choice for a in combo]
+        cost = sum(a["cost_usd"] for a in acts)
+        if cost <= vacation.budget_usd:
+            key = (sum(interest_score(a, vacation.interests) for a in acts), -cost)
+            best = key if best is None else max(best, key)
+    return best
+
+
+@pytest.mark.parametrize("budget", [60, 120, 200, 1000])
+def test_pareto_pruned_solver_matches_brute_force(budget):
+    activities, weather = make_catalog(3, 7, seed=3)
+    dates = sorted(activities)
+    vacation = VacationInfo(
+        destination="AgentsVille",
+        start_date=dates[0],
+        end_date=dates[-1],
+        interests=["food", "nature"],
+        budget_usd=budget,
+        travelers=[],
+    )
+    best = _brute_force(vacation, activities, weather, max_hours=6.0)
+    if best is None:
+        with pytest.raises(ValueError):
+            solve_itinerary(vacation, activities, weather, max_hours_per_day=6.0)
+        return
+
+    plan = solve_itinerary(vacation, activities, weather, max_hours_per_day=6.0)
+
+    score = sum(
+        interest_score(a.model_dump(), vacation.interests)
+        for day in plan.days
+        for a in day.activities
+    )
+    assert (score, -plan.total_cost_usd) == pytest.approx(best)
+
+
+def test_solver_respects_budget_and_strict_mode():
+    cheap = VacationInfo.model_validate(
+        {**VACATION.model_dump(), "end_date": "2025-07-15", "budget_usd": 30}
+    )
+    plan = solve_itinerary(cheap, load_activities(), load_weather())
+    assert [a.id for a in plan.days[0].activities] == ["A1", "A2"]
+
+    with pytest.raises(ValueError):
+        solve_itinerary(VACATION, load_activities(), load_weather(), strict=True)
+
+
+def test_solver_pipeline_revises_plans_that_are_not_strictly_feasible(fake_llm):
+    calls = fake_llm(
+        'THOUGHT: check.\nACTION: {"tool_name": "run_evals_tool", "arguments": {}}'
+    ).calls
+    sunny = VacationInfo.model_validate(
+        {**VACATION.model_dump(), "start_date": "2025-07-17"}
+    )
+
+    plan = asyncio.run(
+        aplan_vacation(sunny, load_activities(), load_weather(), planner="solver")
+    )
+    assert calls == [] and len(plan.days[0].activities) >= 2
+
+    # 2025-07-16 has one rain-proof activity: the draft goes to the agent
+    with pytest.raises(RuntimeError, match="max iterations"):
+        asyncio.run(
+            aplan_vacation(
+                VACATION,
+                load_activities(),
+                load_weather(),
+                planner="solver",
+                max_iterations=2,
+            )
+        )
+    assert len(calls) == 2
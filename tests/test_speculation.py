@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.planner import generate_itinerary
+from agentsville.react_agent import revise_itinerary_with_react_agent
+from agentsville.speculation import speculate, stream_text
+
+ACTIVITIES = load_activities()
+WEATHER = load_weather()
+
+VACATION = VacationInfo(
+    destination="AgentsVille",
+    start_date="2025-07-15",
+    end_date="2025-07-15",
+    interests=["culture"],
+    budget_usd=100,
+    travelers=[],
+)
+PLAN = {
+    "destination": "AgentsVille",
+    "start_date": "2025-07-15",
+    "end_date": "2025-07-15",
+    "total_cost_usd": 25.0,
+    "days": [
+        {
+            "date": "2025-07-15",
+            "summary": "Riverside walk and museum.",
+            "activities": ACTIVITIES["2025-07-15"][:2],
+            "estimated_cost_usd": 25.0,
+        }
+    ],
+}
+# Only one activity on the day: fails the local checks.
+DEFECTIVE = {
+    **PLAN,
+    "total_cost_usd": 10.0,
+    "days": [{**PLAN["days"][0], "activities": ACTIVITIES["2025-07-15"][:1]}],
+}
+
+
+def _action(tool_name, **arguments):
+    action = json.dumps({"tool_name": tool_name, "arguments": arguments})
+    return f"THOUGHT: next step.\nACTION: {action}"
+
+
+def test_first_accepted_candidate_wins_and_the_rest_are_cancelled():
+    stopped = []
+
+    def request(index, cancelled):
+        if index == 0:
+            stopped.append(cancelled.wait(5))
+        return index * 10
+
+    result = speculate(request, 3, score=lambda value: value, accept=lambda s: s > 5)
+
+    assert result.accepted and result.value in (10, 20)
+    assert result.cancelled >= 1
+    assert result.iterations_saved == 0  # the first candidate never answered
+    deadline = time.monotonic() + 2
+    while not stopped and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stopped == [True]
+
+
+def test_stream_text_closes_a_cancelled_stream():
+    cancelled = threading.Event()
+    closed = []
+
+    def deltas():
+        try:
+            yield "a"
+            cancelled.set()
+            yield "b"
+            yield "c"
+        finally:
+            closed.append(True)
+
+    with pytest.raises(CancelledError):
+        stream_text(deltas(), cancelled)
+    assert closed == [True]
+
+
+def test_planner_keeps_a_passing_candidate_over_a_defective_first(fake_llm):
+    # The first candidate (default temperature) drafts the defective plan.
+    calls = fake_llm(
+        lambda kwargs: json.dumps(DEFECTIVE if kwargs["temperature"] == 0.3 else PLAN)
+    ).calls
+    prompt_stats = {}
+
+    plan = generate_itinerary(
+        VACATION, ACTIVITIES, WEATHER, candidates=3, prompt_stats=prompt_stats
+    )
+
+    assert len(plan.days[0].activities) == 2
+    assert 2 <= len(calls) <= 3
+    assert prompt_stats["speculation"]["kept"] != 0
+    assert all(call["stream"] for call in calls)
+
+
+def test_transport_errors_are_not_retried_as_unusable_plans(fake_llm, monkeypatch):
+    from agentsville.transport import CircuitOpenError
+
+    sent = []
+    # Cancelled candidates of earlier tests may still be sending: count ours only
+    vacation = VACATION.model_copy(update={"interests": ["closed-circuit"]})
+
+    def closed(**kwargs):
+        if "closed-circuit" in json.dumps(kwargs["input"]):
+            sent.append(kwargs)
+        raise CircuitOpenError("LLM endpoint circuit breaker is open")
+
+    monkeypatch.setattr("agentsville.llm._send", closed)
+
+    with pytest.raises(CircuitOpenError):
+        generate_itinerary(vacation, ACTIVITIES, WEATHER, candidates=3)
+    assert len(sent) == 3  # no retry on the next model tier
+
+
+def test_react_step_keeps_the_candidate_that_repairs_the_plan(fake_llm):
+    def reply(kwargs):
+        transcript = " ".join(str(m["content"]) for m in kwargs["input"])
+        if "Evaluation PASSED" in transcript:
+            return _action("final_answer_tool")
+        if kwargs["temperature"] == 0.2:
+            return _action("run_evals_tool")
+        return _action("run_evals_tool", itinerary_json=json.dumps(PLAN))
+
+    fake_llm(reply)
+    log = []
+
+    plan = revise_itinerary_with_react_agent(
+        DEFECTIVE,
+        WEATHER,
+        ACTIVITIES,
+        vacation_info=VACATION,
+        iteration_log=log,
+        speculation=2,
+    )
+
+    assert [a.id for a in plan.days[0].activities] == ["A1", "A2"]
+    assert len(log) == 2
+    assert log[0]["kept"] == 1 and log[0]["candidates"] == 2
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agentsville.data_loader import load_activities, load_weather
+from agentsville.models import VacationInfo
+from agentsville.planner import generate_itinerary, stream_itinerary
+from agentsville.streaming import DayStreamParser, MalformedDayError
+
+VACATION = VacationInfo(
+    destination="AgentsVille",
+    start_date="2025-07-15",
+    end_date="2025-07-17",
+    interests=["food", "culture"],
+    budget_usd=1000,
+    travelers=[],
+)
+
+
+def _install_stream(monkeypatch, text, chunk=7):
+    """
+    Fake client streaming `text` in small deltas; returns the list of sent deltas.
+    """
+    sent = []
+
+    def events():
+        for start in range(0, len(text), chunk):
+            sent.append(text[start : start + chunk])
+            yield SimpleNamespace(type="response.output_text.delta", delta=sent[-1])
+        yield SimpleNamespace(type="response.completed", response=SimpleNamespace())
+
+    def create(**kwargs):
+        assert kwargs["stream"] is True
+        return events()
+
+    monkeypatch.setattr(
+        "agentsville.llm.client",
+        SimpleNamespace(responses=SimpleNamespace(create=create)),
+    )
+    return sent
+
+
+def _valid_plan(sample_plan_json):
+    plan = json.loads(json.dumps(sample_plan_json))
+    plan["days"][1]["activities"] = plan["days"][1]["activities"][:1]  # drop A10
+    plan["days"][1]["summary"] = 'Braces } and "quotes" { in a summary.'
+    return plan
+
+
+def test_parser_emits_each_day_once_complete(sample_plan_json):
+    text = json.dumps(_valid_plan(sample_plan_json))
+    parser = DayStreamParser()
+
+    emitted = []
+    for start in range(0, len(text), 5):
+        emitted += [
+            json.loads(day)["date"] for day in parser.feed(text[start : start + 5])
+        ]
+
+    assert emitted == ["2025-07-15", "2025-07-16", "2025-07-17"]
+    assert parser.text == text
+
+
+def test_days_are_yielded_before_the_stream_ends(monkeypatch, sample_plan_json):
+    text = json.dumps(_valid_plan(sample_plan_json))
+    sent = _install_stream(monkeypatch, text)
+
+    days = stream_itinerary(VACATION, load_activities(), load_weather())
+    first = next(days)
+    assert str(first.date) == "2025-07-15"
+    assert len("".join(sent)) < len(text)
+
+    seen = []
+    plan = generate_itinerary(
+        VACATION, load_activities(), load_weather(), on_day=seen.append
+    )
+    assert [str(d.date) for d in seen] == ["2025-07-15", "2025-07-16", "2025-07-17"]
+    assert plan.total_cost_usd == sum(d.estimated_cost_usd for d in plan.days)
+
+
+def test_malformed_day_cancels_the_stream(monkeypatch, sample_plan_json):
+    # Day 2 of the sample plan uses A10, which is not offered on 2025-07-16.
+    text = json.dumps(sample_plan_json)
+    sent = _install_stream(monkeypatch, text)
+
+    with pytest.raises(MalformedDayError) as error:
+        list(stream_itinerary(VACATION, load_activities(), load_weather()))
+
+    assert error.value.index == 1
+    assert [str(d.date) for d in error.value.days] == ["2025-07-15"]
+    assert len("".join(sent)) < len(text)
+    assert "A7" not in "".join(sent)
+
+
+def test_a_day_left_out_does_not_fail_the_days_after_it(monkeypatch, sample_plan_json):
+    plan = _valid_plan(sample_plan_json)
+    del plan["days"][1]
+    _install_stream(monkeypatch, json.dumps(plan))
+
+    seen = []
+    result = generate_itinerary(
+        VACATION, load_activities(), load_weather(), on_day=seen.append
+    )
+
+    assert [str(d.date) for d in seen] == ["2025-07-15", "2025-07-17"]
+    assert [str(d.date) for d in result.days] == ["2025-07-15", "2025-07-17"]
+    assert "2025-07-16: not planned" in result.notes
+
+
+def test_consumer_spans_are_not_nested_under_the_stream(monkeypatch):
+    from agentsville.llm import stream_response
+    from agentsville.tracing import tracer
+
+    _install_stream(monkeypatch, "x" * 70)
+    tracer.reset()
+    with tracer.span("caller"):
+        deltas = stream_response(input="hi")
+        next(deltas)
+        with tracer.span("on_day"):
+            pass
+    # Closing from another thread must not trip over the span's context
+    closer = threading.Thread(target=deltas.close)
+    closer.start()
+    closer.join()
+
+    spans = tracer.finished_spans()
+    caller = next(span for span in spans if span.name == "caller")
+    on_day = next(span for span in spans if span.name == "on_day")
+    assert on_day.parent_id == caller.span_id
+
+    def stream_span():
+        return [
+            span
+            for span in tracer.finished_spans()
+            if span.name == "llm.call" and span.parent_id == caller.span_id
+        ]
+
+    deadline = time.monotonic() + 2
+    while not stream_span() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stream_span()[0].attributes["cancelled"] is True
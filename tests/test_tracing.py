@@ -0,0 +1,112 @@
+import json
+from types import SimpleNamespace
+
+from agentsville.llm import create_response
+from agentsville.tracing import Tracer
+from agentsville.weather import (
+    check_weather_compatibility_batch,
+    check_weather_compatibility_many,
+    count_tiers,
+)
+
+
+def test_spans_nest_and_export(tmp_path):
+    tracer = Tracer()
+    with tracer.span("outer") as outer:
+        with tracer.span("inner", iteration=1) as inner:
+            inner.set("tokens.input", 10)
+        outer.set("tokens.input", 5)
+
+    inner_span, outer_span = tracer.finished_spans()
+    assert inner_span.parent_id == outer_span.span_id
+    assert inner_span.trace_id == outer_span.trace_id
+
+    stats = tracer.stats()
+    assert stats["inner"]["count"] == 1
+    assert stats["inner"]["tokens.input"] == 10
+
+    path = tmp_path / "trace.json"
+    tracer.export_otlp_json(str(path))
+    spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [s["name"] for s in spans] == ["inner", "outer"]
+    assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+
+    text = tracer.prometheus_text()
+    assert 'agentsville_span_duration_seconds_count{span="outer"} 1' in text
+    assert 'agentsville_tokens_input_total{span="inner"} 10' in text
+
+
+def test_errors_are_recorded_and_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    try:
+        with tracer.span("boom"):
+            raise ValueError("bad")
+    except ValueError:
+        pass
+    assert tracer.stats()["boom"]["errors"] == 1
+
+    disabled = Tracer(enabled=False)
+    with disabled.span("ignored") as span:
+        span.set("tokens.input", 1)
+    assert disabled.finished_spans() == []
+
+
+def test_llm_calls_record_usage_and_keep_parent_across_threads(monkeypatch):
+    usage = SimpleNamespace(
+        input_tokens=120,
+        output_tokens=4,
+        input_tokens_details=SimpleNamespace(cached_tokens=64),
+    )
+
+    def create(**kwargs):
+        return SimpleNamespace(output_text="IS_COMPATIBLE", usage=usage)
+
+    monkeypatch.setattr(
+        "agentsville.llm.client",
+        SimpleNamespace(responses=SimpleNamespace(create=create)),
+    )
+    tracer = Tracer()
+    monkeypatch.setattr("agentsville.llm.span", tracer.span)
+    monkeypatch.setattr("agentsville.weather.span", tracer.span)
+
+    with tracer.span("root") as root:
+        create_response(model="m", input=[])
+        pairs = [({"id": f"a{i}", "name": f"A{i}"}, "rainy") for i in range(3)]
+        check_weather_compatibility_many(pairs, max_concurrency=3)
+
+    spans = tracer.finished_spans()
+    llm_spans = [s for s in spans if s.name == "llm.call"]
+    assert llm_spans[0].attributes["tokens.cached"] == 64
+    checks = [s for s in spans if s.name == "check_weather_compatibility"]
+    assert len(checks) == 3
+    assert all(s.trace_id == root.trace_id for s in checks)
+
+
+def test_rule_answered_checks_are_counted_on_the_enclosing_span(fake_llm, monkeypatch):
+    fake_llm("IS_COMPATIBLE")
+    tracer = Tracer()
+    monkeypatch.setattr("agentsville.llm.span", tracer.span)
+    monkeypatch.setattr("agentsville.weather.span", tracer.span)
+    pairs = [
+        ({"id": "in", "suitability": ["indoor"]}, "heavy-rain"),
+        ({"id": "out", "suitability": ["outdoor"]}, "heavy-rain"),
+        ({"id": "x1", "name": "Kite day"}, "windy"),
+    ]
+
+    many = check_weather_compatibility_many(pairs)
+    batch = check_weather_compatibility_batch(pairs)
+
+    # The batch retries its single pending pair through a nested _many call.
+    spans = {s.name: s for s in tracer.finished_spans() if s.parent_id is None}
+    for name, results in (
+        ("check_weather_compatibility_many", many),
+        ("check_weather_compatibility_batch", batch),
+    ):
+        counts = {
+            key[len("tier.") :]: value
+            for key, value in spans[name].attributes.items()
+            if key.startswith("tier.")
+        }
+        assert counts == count_tiers(results)
+        assert counts["rules"] == 2
+    assert tracer.stats()["check_weather_compatibility_batch"]["tier.rules"] == 2
@@ -0,0 +1,203 @@
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from agentsville.tracing import Tracer
+from agentsville.transport import (
+    CircuitBreaker,
+    CircuitOpenError,
+    TokenBucket,
+    Transport,
+)
+
+
+class StatusError(openai.APIStatusError):
+    def __init__(self, status_code):
+        request = httpx.Request("POST", "https://llm.test/v1/responses")
+        super().__init__(
+            f"HTTP {status_code}",
+            response=httpx.Response(status_code, request=request),
+            body=None,
+        )
+
+
+def _flaky(*failures):
+    """
+    send() that raises the given errors in order, then answers "ok".
+    """
+    calls = []
+
+    def send(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return "ok"
+
+    return send, calls
+
+
+def test_retries_rate_limits_and_server_errors_but_not_bad_requests():
+    transport = Transport(backoff_base_s=0.0)
+    send, calls = _flaky(StatusError(429), StatusError(503))
+    tracer = Tracer()
+    with tracer.span("llm.call") as span:
+        assert transport.call(send, {"model": "m"}, span=span) == "ok"
+    assert len(calls) == 3
+    assert span.attributes["retries"] == 2
+
+    send, calls = _flaky(StatusError(400))
+    with pytest.raises(StatusError):
+        transport.call(send, {"model": "m"})
+    assert len(calls) == 1
+
+
+def test_deadline_bounds_attempt_timeouts_and_retries():
+    transport = Transport(
+        backoff_base_s=0.01,
+        max_retries=100,
+        breaker=CircuitBreaker(failure_threshold=1000),
+    )
+    send, calls = _flaky(*[TimeoutError("slow")] * 1000)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        transport.call(send, {"timeout": 30}, deadline_s=0.05)
+
+    assert time.monotonic() - started < 1.0
+    assert all(call["timeout"] <= 0.05 for call in calls)
+
+
+def test_circuit_breaker_fails_fast_then_probes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_after_s=0.05)
+    transport = Transport(backoff_base_s=0.0, max_retries=0, breaker=breaker)
+    send, calls = _flaky(StatusError(500), StatusError(500))
+
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            transport.call(send, {})
+    with pytest.raises(CircuitOpenError):
+        transport.call(send, {})
+    assert len(calls) == 2
+
+    time.sleep(0.06)
+    assert transport.call(send, {}) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_probe_answered_with_a_bad_request_closes_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_s=0.05)
+    transport = Transport(backoff_base_s=0.0, max_retries=0, breaker=breaker)
+    send, calls = _flaky(StatusError(500), StatusError(400))
+
+    with pytest.raises(StatusError):
+        transport.call(send, {})
+    time.sleep(0.06)
+    with pytest.raises(StatusError):
+        transport.call(send, {})
+
+    assert breaker.state == "closed"
+    assert [transport.call(send, {}) for _ in range(3)] == ["ok"] * 3
+
+
+def test_probe_failing_locally_leaves_the_breaker_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_s=0.05)
+    transport = Transport(backoff_base_s=0.0, max_retries=0, breaker=breaker)
+    send, calls = _flaky(StatusError(500), KeyError("not recorded"))
+
+    with pytest.raises(StatusError):
+        transport.call(send, {})
+    time.sleep(0.06)
+    with pytest.raises(KeyError):
+        transport.call(send, {})
+
+    # The endpoint never answered; the next call probes again.
+    assert breaker.state == "open"
+    assert transport.call(send, {}) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_probe_stuck_in_the_rate_limiter_is_handed_back():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_s=0.05)
+    transport = Transport(
+        backoff_base_s=0.0, max_retries=0, breaker=breaker, requests_per_minute=60
+    )
+    send, calls = _flaky(StatusError(500))
+
+    with pytest.raises(StatusError):
+        transport.call(send, {})
+    time.sleep(0.06)
+    with pytest.raises(TimeoutError):
+        transport.call(send, {}, deadline_s=0.01)
+
+    assert breaker.state == "open"
+    time.sleep(1.0)
+    assert transport.call(send, {}) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=20.0, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.0)
+
+    started = time.monotonic()
+    assert bucket.acquire()
+    assert 0.03 < time.monotonic() - started < 0.5
+
+
+def test_slow_attempt_is_hedged_and_the_first_reply_wins():
+    transport = Transport(hedge_percentile=90, hedge_min_samples=5)
+    transport._latencies.extend([0.01] * 10)
+    release = threading.Event()
+    calls = []
+
+    def send(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            release.wait(2.0)  # the straggler
+            return "slow"
+        return "fast"
+
+    started = time.monotonic()
+    assert transport.call(send, {}) == "fast"
+    release.set()
+
+    assert time.monotonic() - started < 1.0
+    assert transport.stats()["hedge_wins"] == 1
+
+
+def test_hedge_is_skipped_when_no_in_flight_slot_is_free():
+    transport = Transport(hedge_percentile=90, hedge_min_samples=5)
+    transport._latencies.extend([0.01] * 10)
+    in_flight = threading.BoundedSemaphore(1)
+    calls = []
+
+    def send(**kwargs):
+        calls.append(kwargs)
+        time.sleep(0.1)
+        return "only"
+
+    assert transport.call(send, {}, in_flight=in_flight) == "only"
+    assert len(calls) == 1 and transport.stats()["hedges"] == 0
+    assert in_flight.acquire(blocking=False)
+
+
+def test_in_flight_slot_is_free_during_retry_backoff(monkeypatch):
+    transport = Transport(backoff_base_s=0.01)
+    in_flight = threading.BoundedSemaphore(1)
+    send, calls = _flaky(StatusError(429))
+    free_while_sleeping = []
+
+    def sleep(seconds):
+        free = in_flight.acquire(blocking=False)
+        free_while_sleeping.append(free)
+        if free:
+            in_flight.release()
+
+    monkeypatch.setattr("agentsville.transport.time.sleep", sleep)
+
+    assert transport.call(send, {}, in_flight=in_flight) == "ok"
+    assert free_while_sleeping == [True]